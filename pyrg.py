@@ -21,30 +21,385 @@
 ##
 ################################################################################
 
-import os, sys, shutil, glob, subprocess
-import pyrg_uvm
-import pyrg_axi
+import os, sys, time, glob, argparse
+import io, contextlib
+import pyrg_model
+import pyrg_output
+import pyrg_build
+import pyrg_profile
+import pyrg_options
+
+# The emitters, the YAML parser, the process pool and the watcher are imported
+# where they are first used. A run where all blocks are up to date never needs
+# them, and is then done in the time it takes to start the interpreter.
+
+
+class Run:
+
+  # The settings of a run which every task needs
+  __slots__ = ("git_root", "options", "cache_dir", "trace", "cprofile_dir", "models")
+
+  def __init__(self, git_root, options = None, cache_dir = None, trace = False, cprofile_dir = None, models = None):
+    self.git_root     = git_root
+    self.options      = options or pyrg_options.Options()
+    self.cache_dir    = cache_dir
+    self.trace        = trace        # Record the phases of every task
+    self.cprofile_dir = cprofile_dir # Save a cProfile dump of every task here
+    self.models       = models       # Parsed blocks kept in memory, or None
+
+  def __getstate__(self):
+
+    # The models kept in memory belong to the process which runs the tasks
+    # itself, they are not sent to the workers. A worker keeps its own models
+    # instead, for the next tasks it runs.
+    return {"git_root": self.git_root, "options": self.options, "cache_dir": self.cache_dir, "trace": self.trace,
+            "cprofile_dir": self.cprofile_dir, "models": self.models is not None}
+
+  def __setstate__(self, state):
+
+    for (name, value) in state.items():
+      setattr(self, name, value)
+    self.models = _worker_models if state["models"] else None
+
+
+# The parsed blocks of the worker processes of a resident pool
+_worker_models = {}
+
+
+class Result:
+
+  # What a task returns to the process which reports it
+  __slots__ = ("task", "log", "error", "writer", "events", "block")
+
+  def __init__(self, task, log = "", error = None, writer = None, events = None, block = None):
+    self.task   = task
+    self.log    = log
+    self.error  = error
+    self.writer = writer or pyrg_output.Writer()
+    self.events = events or []
+    self.block  = block
+
+
+def run_task(task, run, yml, block = None):
+
+  # A task is either parsing the YAML file or one of the emitters. The messages
+  # of a task are captured and returned so that the caller can print them in a
+  # deterministic order, i.e., the output of workers running in parallel is
+  # never interleaved.
+  result = Result(task)
+  log    = io.StringIO()
+
+  if run.trace:
+    pyrg_profile.start()
+  if run.cprofile_dir is not None:
+    import cProfile
+    profile = cProfile.Profile()
+    profile.enable()
+
+  try:
+    with contextlib.redirect_stdout(log):
+      if task == "parse":
+        with pyrg_profile.phase("parse", file = yml):
+          result.block = pyrg_model.load_block(yml, run.cache_dir, run.models)
+      elif task == "check":
+        with pyrg_profile.phase("check", block = block.name):
+          result.error = check_block(yml, block)
+      else:
+        import pyrg_api
+        with pyrg_profile.phase(task, block = block.name, registers = len(block.registers),
+                                instances = block.n_instances, fields = sum(len(r.fields) for r in block.registers)):
+          pyrg_api.emit(task, block, run.git_root, result.writer, run.options)
+  except Exception as e:
+    result.error = "%s: %s" % (type(e).__name__, e)
+
+  if run.cprofile_dir is not None:
+    profile.disable()
+    os.makedirs(run.cprofile_dir, exist_ok = True)
+    profile.dump_stats(os.path.join(run.cprofile_dir, "%s.%s.prof" % (os.path.basename(yml), task)))
+
+  result.log    = log.getvalue()
+  result.events = pyrg_profile.stop()
+  return result
+
+
+def check_block(yml, block):
+
+  # Prints the problems of a block, returns an error if any problem is one
+  import pyrg_check
+  problems = pyrg_check.check_block(block)
+  for (level, location, message) in problems:
+    print("%s [pyrg] %s: %s: %s" % (level, yml, location, message))
+
+  errors = sum(level == pyrg_check.ERROR for (level, _, _) in problems)
+  return "%d errors" % (errors) if errors else None
+
+
+def _tasks(run, tasks):
+
+  # The tasks after the parse, by default the emitters
+  if tasks is not None:
+    return tasks
+  import pyrg_api
+  return pyrg_api.enabled_emitters(run.options)
+
+
+def run_block(yml, run, tasks = None):
+
+  parsed = run_task("parse", run, yml)
+  if parsed.error is not None:
+    return [parsed]
+
+  return [parsed] + [run_task(e, run, yml, parsed.block) for e in _tasks(run, tasks)]
+
+
+def run_blocks(yml_files, run, jobs = 1, tasks = None, pool = None):
+
+  if jobs == 1:
+    results = (run_block(yml, run, tasks) for yml in yml_files)
+  else:
+    results = _run_pool(yml_files, run, jobs, tasks, pool)
+
+  # The results are reported in the same order as a serial run
+  failed  = []
+  outputs = {} # The files generated by each block which did not fail
+  events  = [] # The phases of all tasks
+  summary = pyrg_output.Writer()
+  for (yml, block_results) in zip(yml_files, results):
+    for result in block_results:
+      sys.stdout.write(result.log)
+      if result.error is not None:
+        print("ERROR [pyrg] %s (%s): %s" % (yml, result.task, result.error))
+      summary.merge(result.writer)
+      events += result.events
+    sys.stdout.flush()
+    if any(result.error is not None for result in block_results):
+      failed.append(yml)
+    else:
+      outputs[yml] = [f for result in block_results for f in result.writer.files]
+
+  return (failed, outputs, summary, events)
+
+
+def _run_pool(yml_files, run, jobs, tasks = None, pool = None):
+
+  # The workers are started for the run, unless a pool which stays alive
+  # between the runs is given
+  if pool is None:
+    import concurrent.futures
+    with concurrent.futures.ProcessPoolExecutor(max_workers = jobs) as pool:
+      yield from _run_pool(yml_files, run, jobs, tasks, pool)
+    return
+
+  # All blocks are parsed at once, and the emitters (or checks) of a block are
+  # started as soon as its model is available. Every model is parsed only once
+  # and then shared by all emitters of the block.
+  parsed  = [(yml, pool.submit(run_task, "parse", run, yml)) for yml in yml_files]
+  emitted = []
+  for (yml, future) in parsed:
+    result = _result(future, "parse")
+    if result.error is not None:
+      emitted.append([result])
+    else:
+      emitted.append([result] + [(e, pool.submit(run_task, e, run, yml, result.block)) for e in _tasks(run, tasks)])
+
+  for block_results in emitted:
+    yield [block_results[0]] + [_result(f, e) for (e, f) in block_results[1:]]
+
+
+def _result(future, task):
+
+  # A worker which dies (e.g., killed by the OS) must not take the others down
+  try:
+    return future.result()
+  except Exception as e:
+    return Result(task, error = "%s: %s" % (type(e).__name__, e))
+
+
+def build(yml_files, manifest, run, jobs = 1, force = False, trace = None, pool = None):
+
+  # Blocks whose YAML, templates and generator are unchanged since the last run,
+  # and whose outputs still exist, are skipped
+  keys  = {yml: manifest.key(yml, run.git_root, run.options.key()) for yml in yml_files}
+  stale = [yml for yml in yml_files if force or not manifest.up_to_date(yml, keys[yml])]
+
+  if len(stale) != len(yml_files):
+    print("INFO [pyrg] %d of %d blocks are up to date" % (len(yml_files) - len(stale), len(yml_files)))
+
+  (failed, outputs, summary, events) = run_blocks(stale, run, jobs, pool = pool)
+
+  if trace is not None:
+    pyrg_profile.write_trace(trace, events)
+    print("INFO [pyrg] Saved the profile in %s" % trace)
+
+  if len(summary.files):
+    print("INFO [pyrg] %d files written, %d unchanged" % (len(summary.written), len(summary.unchanged)))
+
+  for yml in failed:
+    manifest.remove(yml)
+  for (yml, files) in outputs.items():
+    manifest.update(yml, keys[yml], files)
+  manifest.save()
+
+  return failed
+
+
+def check(yml_files, run, jobs = 1):
+
+  # Checks the blocks without generating anything, returns the failed blocks
+  start = time.perf_counter()
+  (failed, _, _, _) = run_blocks(yml_files, run, jobs, ("check",))
+  print("INFO [pyrg] Checked %d blocks in %.1f ms" % (len(yml_files), (time.perf_counter() - start) * 1e3))
+  return failed
+
+
+def watch(yml_dir, manifest, run, jobs = 1, trace = None, polling = False):
+
+  # Stays resident and regenerates the blocks whose YML file changed, or all
+  # blocks if a template changed. The templates and the parsed blocks are kept
+  # in memory between the changes, also by the workers, which are started once
+  # and only restarted when a template changed.
+  import pyrg_template, pyrg_watch
+  templates_path = os.path.abspath(pyrg_template.template_dir())
+  yml_path       = os.path.abspath(yml_dir)
+  pool           = None
+
+  def on_change(changed):
+
+    nonlocal pool
+    changed   = {os.path.abspath(path) for path in changed}
+    yml_files = sorted(glob.glob(yml_dir + "/*.yml"))
+
+    if any(os.path.dirname(path) == templates_path or path == templates_path for path in changed):
+      templates = manifest.templates
+      manifest.refresh()
+      if manifest.templates != templates:
+        pyrg_template.clear()
+        changed.add(yml_path)
+        if pool is not None:
+          pool.shutdown()
+          pool = None
+
+    if yml_path in changed:
+      blocks = yml_files
+    else:
+      blocks = [yml for yml in yml_files if os.path.abspath(yml) in changed]
+
+    # Files which were removed are forgotten
+    for path in changed:
+      if path.endswith(".yml") and not os.path.exists(path):
+        manifest.remove(path)
+
+    if not len(blocks):
+      return
+
+    if jobs > 1 and len(blocks) > 1 and pool is None:
+      import concurrent.futures
+      pool = concurrent.futures.ProcessPoolExecutor(max_workers = jobs)
+
+    start = time.perf_counter()
+    build(blocks, manifest, run, jobs if len(blocks) > 1 else 1, trace = trace, pool = pool)
+    print("INFO [pyrg] Updated %d blocks in %.1f ms" % (len(blocks), (time.perf_counter() - start) * 1e3))
+    sys.stdout.flush()
+
+  print("INFO [pyrg] Watching %s and %s" % (yml_dir, templates_path))
+  sys.stdout.flush()
+  try:
+    pyrg_watch.watch([yml_dir, templates_path], on_change, polling = polling)
+  finally:
+    if pool is not None:
+      pool.shutdown(wait = False)
 
 
 if __name__ == '__main__':
 
-  this_path = os.path.dirname(os.path.abspath(sys.argv[0]))
-  git_root  = subprocess.Popen(['git', 'rev-parse', '--show-toplevel'], stdout=subprocess.PIPE).communicate()[0].rstrip().decode('utf-8')
+  # $GIT_ROOT is the repository of the working directory, or empty outside of one
+  git_root = pyrg_build.find_git_root() or ""
+
+  parser = argparse.ArgumentParser(description = "Generates register slaves and UVM register models from YML files")
+  parser.add_argument("yml_dir", help = "Directory with YML files with register definitions")
+  parser.add_argument("-j", "--jobs", type = int, default = 1,
+                      help = "Number of worker processes, 0 uses all cores (default: 1)")
+  parser.add_argument("-f", "--force", action = "store_true",
+                      help = "Generate all blocks, also those which are up to date")
+  parser.add_argument("--manifest",
+                      help = "Build manifest used to skip unchanged blocks (default: <yml_dir>/%s)" % pyrg_build.MANIFEST_NAME)
+  parser.add_argument("--cache-dir",
+                      help = "Directory with parsed YML snapshots (default: <yml_dir>/%s)" % pyrg_model.CACHE_NAME)
+  parser.add_argument("--no-cache", action = "store_true",
+                      help = "Always parse the YML files")
+  parser.add_argument("--profile", metavar = "TRACE",
+                      help = "Save the timings of every block and phase as a Chrome trace (JSON)")
+  parser.add_argument("--profile-cprofile", metavar = "DIR",
+                      help = "Save a cProfile dump of every block and phase in this directory")
+  parser.add_argument("--uvm-reg-arrays", action = "store_true",
+                      help = "Generate repeated registers as one UVM class and an array of registers")
+  parser.add_argument("--axi-range-decode", action = "store_true",
+                      help = "Decode repeated registers by address range in the AXI slave")
+  parser.add_argument("--read-pipeline", type = int, default = 0, metavar = "N",
+                      help = "Register the read data of the AXI slave in N stages (default: 0, combinational)")
+  parser.add_argument("--axi-overlap", action = "store_true",
+                      help = "Overlap the transactions of the AXI slave, implies --read-pipeline 1 or more")
+  parser.add_argument("--axi-wstrb", action = "store_true",
+                      help = "Only write the byte lanes which are strobed by WSTRB in the AXI slave")
+  parser.add_argument("--uvm-hdl-root", default = "", metavar = "PATH",
+                      help = "HDL path of the AXI slave of every block, for UVM backdoor access ($BLOCK is the block name)")
+  parser.add_argument("--uvm-burst-seq", action = "store_true",
+                      help = "Generate a UVM sequence which writes the registers which need to be updated as bursts")
+  parser.add_argument("--c-driver", action = "store_true",
+                      help = "Generate a C driver with field accessors and a shadow copy of the registers")
+  parser.add_argument("--numpy-decoder", action = "store_true",
+                      help = "Generate a Python module which decodes register dumps with NumPy")
+  parser.add_argument("--tlm-model", action = "store_true",
+                      help = "Generate a Python transaction level model of the AXI slave")
+  parser.add_argument("--check", action = "store_true",
+                      help = "Check the YML files for errors, e.g., overlapping fields, without generating anything")
+  parser.add_argument("-w", "--watch", action = "store_true",
+                      help = "Keep running and regenerate the blocks whose YML files or templates change")
+  parser.add_argument("--poll", action = "store_true",
+                      help = "Poll for changes in watch mode instead of using inotify")
+  args = parser.parse_args()
 
-  if (len(sys.argv) != 2):
-    sys.exit("ERROR [yml] Provide a YML file with register definitions")
+  jobs = args.jobs if args.jobs > 0 else os.cpu_count()
 
-  yml_files = os.listdir(sys.argv[1])
-  yml_files = glob.glob(sys.argv[1]+"/*.yml")
+  yml_files = sorted(glob.glob(args.yml_dir + "/*.yml"))
 
-  if (len(yml_files) == 0):
+  if (len(yml_files) == 0 and not args.watch):
     sys.exit("ERROR [yml] No files found")
 
-  for yml in yml_files:
+  manifest = pyrg_build.Manifest(args.manifest or os.path.join(args.yml_dir, pyrg_build.MANIFEST_NAME))
+
+  if args.no_cache:
+    cache_dir = None
+  else:
+    cache_dir = args.cache_dir or os.path.join(args.yml_dir, pyrg_model.CACHE_NAME)
+
+  options = pyrg_options.Options(uvm_reg_arrays   = args.uvm_reg_arrays,
+                                 axi_range_decode = args.axi_range_decode,
+                                 read_pipeline    = args.read_pipeline,
+                                 axi_overlap      = args.axi_overlap,
+                                 axi_wstrb        = args.axi_wstrb,
+                                 c_driver         = args.c_driver,
+                                 numpy_decoder    = args.numpy_decoder,
+                                 uvm_hdl_root     = args.uvm_hdl_root,
+                                 uvm_burst_seq    = args.uvm_burst_seq,
+                                 tlm_model        = args.tlm_model)
+
+  run = Run(git_root, options, cache_dir, args.profile is not None, args.profile_cprofile, {} if args.watch else None)
+
+  if args.check:
+    failed = check(yml_files, run, jobs)
+    if len(failed):
+      sys.exit("ERROR [pyrg] %d of %d blocks failed the check" % (len(failed), len(yml_files)))
+    sys.exit(0)
 
-    uvm_path = '/'.join(yml.split('/')[:-2]) + "/tb/uvm_reg/"
-    pyrg_uvm.generate_uvm(yml, git_root)
-    pyrg_axi.generate_axi(yml)
+  failed = build(yml_files, manifest, run, jobs, args.force, args.profile)
 
+  if args.watch:
+    try:
+      watch(args.yml_dir, manifest, run, jobs, args.profile, args.poll)
+    except KeyboardInterrupt:
+      print("INFO [pyrg] Stopped watching")
+      sys.exit(0)
 
-  shutil.rmtree(this_path + "/__pycache__")
+  if len(failed):
+    sys.exit("ERROR [pyrg] %d of %d blocks failed" % (len(failed), len(yml_files)))
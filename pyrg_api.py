@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: The library interface of PYRG, for build tools which generate
+## many blocks from one Python process. A block is given as a path to a YAML
+## file, as YAML text or as a dictionary, and the generated files are returned
+## in memory. Nothing is written, printed or run as a subprocess unless a
+## writer is given.
+##
+##   import pyrg_api
+##   files = pyrg_api.generate("yml/my_block.yml")
+##   for (path, text) in files.items():
+##     ...
+##
+################################################################################
+
+import os
+import pyrg_model
+import pyrg_output
+import pyrg_build
+import pyrg_uvm
+import pyrg_axi
+import pyrg_c
+import pyrg_numpy
+import pyrg_tlm
+
+# ------------------------------------------------------------------------------
+# The emitters of one block. They all read the same parsed model and do not
+# depend on each other, so they can be run in any order and in parallel.
+# ------------------------------------------------------------------------------
+EMITTERS = ("uvm_reg", "sv_address_pkg", "c_address_header", "uvm_block", "axi")
+
+
+def enabled_emitters(options = None):
+
+  # The emitters which are only run if they are enabled by the options
+  if options is None:
+    return EMITTERS
+  return (EMITTERS + (("uvm_burst_seq",) if options.uvm_burst_seq else ()) + (("c_driver",) if options.c_driver else ()) +
+          (("numpy_decoder",) if options.numpy_decoder else ()) + (("tlm_model",) if options.tlm_model else ()))
+
+
+# The repository of a path, found without running git
+find_git_root = pyrg_build.find_git_root
+
+
+def load(spec, cache_dir = None):
+
+  # A spec is a parsed block, a dictionary, YAML text or a path to a YAML file
+  if isinstance(spec, pyrg_model.Block):
+    return spec
+  if isinstance(spec, dict):
+    return pyrg_model.block_from_dict(spec)
+  if isinstance(spec, str) and "\n" in spec:
+    return pyrg_model.parse_block(spec)
+  return pyrg_model.load_block(os.fspath(spec), cache_dir)
+
+
+def emit(emitter, block, git_root, writer, options = None):
+
+  if emitter == "uvm_reg":
+    pyrg_uvm.generate_uvm_regs(block, git_root, writer = writer, options = options)
+  elif emitter == "sv_address_pkg":
+    pyrg_uvm.generate_sv_address_pkg(block, git_root, writer = writer)
+  elif emitter == "c_address_header":
+    pyrg_uvm.generate_c_address_header(block, git_root, writer = writer)
+  elif emitter == "uvm_block":
+    pyrg_uvm.generate_uvm_block(block, git_root, writer = writer, options = options)
+  elif emitter == "axi":
+    pyrg_axi.generate_axi(block, writer = writer, git_root = git_root, options = options)
+  elif emitter == "uvm_burst_seq":
+    pyrg_uvm.generate_uvm_burst_seq(block, git_root, writer = writer, options = options)
+  elif emitter == "c_driver":
+    pyrg_c.generate_c_driver(block, git_root, writer = writer)
+  elif emitter == "numpy_decoder":
+    pyrg_numpy.generate_numpy_decoder(block, git_root, writer = writer)
+  elif emitter == "tlm_model":
+    pyrg_tlm.generate_tlm_model(block, git_root, writer = writer, options = options)
+  else:
+    raise ValueError("Unknown emitter: %s" % emitter)
+
+
+def generate(spec, git_root = None, writer = None, emitters = None, cache_dir = None, options = None):
+
+  # Returns the generated files as {path: text}, in the order they were
+  # generated. $GIT_ROOT in the paths of the block is replaced by git_root,
+  # which by default is the repository of the YAML file (or of the working
+  # directory). If a writer is given, e.g., pyrg_output.Writer(), the files
+  # are also written through it. The emitters are configured by options, a
+  # pyrg_options.Options, and by default all emitters it enables are run.
+  block = load(spec, cache_dir)
+
+  if git_root is None:
+    start    = os.path.dirname(block.yaml_path) if block.yaml_path is not None else "."
+    git_root = find_git_root(start) or os.path.abspath(".")
+
+  memory = pyrg_output.MemoryWriter()
+  for emitter in emitters or enabled_emitters(options):
+    emit(emitter, block, git_root, memory, options)
+
+  if writer is not None:
+    for path in memory.directories:
+      writer.makedirs(path)
+    for (path, text) in memory.buffers.items():
+      writer.write(path, text)
+
+  return memory.buffers
@@ -23,418 +23,585 @@
 ##
 ################################################################################
 
-import yaml
-import sys, os, re, math
+import os, re, math
 import itertools, operator
-from datetime import date
+import pyrg_model
+import pyrg_template
+import pyrg_output
+import pyrg_profile
+import pyrg_options
+
+AXI_PLACEHOLDERS = ["IMPORT", "PARAMETERS", "CLASS_NAME", "PORTS", "LOGIC_DECLARATIONS", "WRITE_PROCESS",
+                    "READ_PROCESS"]
+
+# The write process is either sequential, one transaction at a time, or
+# overlaps the address, data and response phases of the transactions
+WRITE_PLACEHOLDERS = ["CMD_REGISTERS", "MEM_INTERFACES", "RESETS", "AXI_WRITE_CASE", "AXI_WRITES", "AXI_WRITE_ERROR",
+                      "AXI_MEM_WRITES"]
+
+# The read process is either a combinational read data mux, or a pipeline which
+# also reads the memories
+READ_PLACEHOLDERS = ["RC_DEFAULT", "AXI_READ_CASE", "AXI_READS", "READ_LATENCY", "MEM_READ_DECLARATIONS",
+                     "AXI_MEM_READS", "MEM_READ_MERGE", "MEM_READ_RESETS", "MEM_READ_PIPELINE"]
 
 def sort_uniq(sequence):
   return map(operator.itemgetter(0),
              itertools.groupby(sorted(sequence)))
 
-def generate_axi(yaml_file_path):
+def generate_axi(block, writer = None, git_root = None, options = None):
+
+  # The emitter can be called with a path to a YAML file or a parsed block
+  if isinstance(block, str):
+    block = pyrg_model.load_block(block)
+
+  pyrg_model.check_memories(block)
+
+  # Write the AXI slave to file, in the directory "rtl" next to the YAML
+  # directory, which must exist. A block which was not read from a file uses
+  # its RTL path, which is created.
+  writer = writer or pyrg_output.Writer()
+  if block.yaml_path is not None:
+    output_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(block.yaml_path))), "rtl")
+  else:
+    output_path = block.rtl_path.replace("$GIT_ROOT", git_root or "")
+    writer.makedirs(output_path)
+  output_file = output_path + '/' + block.name + "_axi_slave.sv"
+  writer.write(output_file, emit_axi(block, options))
+
 
-  this_path          = os.path.dirname(os.path.abspath(sys.argv[0]))
-  axi_template_path  = this_path + "/templates/axi4_reg_slave.sv"
-  header_file_path   = this_path + "/templates/header.txt"
+def emit_axi(block, options = None):
+
+  options = options or pyrg_options.Options()
 
   # ----------------------------------------------------------------------------
-  # Loading in the templates
+  # Loading in the templates, they are compiled once per process
   # ----------------------------------------------------------------------------
 
-  header = ""
-  with open(header_file_path, 'r') as file:
-    header = file.read()
-
-  axi_template = ""
-  with open(axi_template_path, 'r') as file:
-    axi_template = file.read()
+  with pyrg_profile.phase("load_templates"):
+    header       = pyrg_template.load_text("header.txt")
+    axi_template = pyrg_template.load("axi4_reg_slave.sv", AXI_PLACEHOLDERS)
+    if (options.axi_overlap):
+      write_template = pyrg_template.load("axi4_write_overlapped.sv", WRITE_PLACEHOLDERS)
+    else:
+      write_template = pyrg_template.load("axi4_write.sv", WRITE_PLACEHOLDERS)
+    if (_read_latency(block, options)):
+      read_template = pyrg_template.load("axi4_read_pipelined.sv", READ_PLACEHOLDERS)
+    else:
+      read_template = pyrg_template.load("axi4_read.sv", READ_PLACEHOLDERS)
 
   # ----------------------------------------------------------------------------
-  # Loading in the YAML file and the UVM templates
+  # Every part of the slave is a generator which is consumed while the
+  # template is written
   # ----------------------------------------------------------------------------
 
-  # Variables for storing the YAML file contents
-  block_name     = None
-  block_contents = None
+  section = pyrg_profile.section
 
-  with open(yaml_file_path, 'r') as file:
+  yield header
+  yield from axi_template.render_iter(
+    IMPORT             = "import " + block.name + "_address_pkg::*;",
+    PARAMETERS         = _parameters(block),
+    CLASS_NAME         = block.name + "_axi_slave",
+    PORTS              = section("ports",          _ports(block, options)),
+    LOGIC_DECLARATIONS = section("declarations",   _logic_declarations(block, options)),
+    WRITE_PROCESS      = write_template.render_iter(
+      CMD_REGISTERS    = section("defaults",       _cmd_defaults(block)),
+      MEM_INTERFACES   = section("defaults",       _mem_interfaces(block, options)),
+      RESETS           = section("resets",         _resets(block, options)),
+      AXI_WRITE_CASE   = _case("awaddr_r0", options),
+      AXI_WRITES       = section("write_decode",   _writes(block, options)),
+      AXI_WRITE_ERROR  = section("write_decode",   _write_error(block, options)),
+      AXI_MEM_WRITES   = section("write_decode",   _mem_writes(block, options))),
+    READ_PROCESS       = read_template.render_iter(
+      RC_DEFAULT       = section("defaults",       _rc_defaults(block)),
+      AXI_READ_CASE    = _case("araddr_r0", options),
+      AXI_READS        = section("read_decode",    _reads(block, options)),
+      READ_LATENCY     = str(_read_latency(block, options)),
+      MEM_READ_DECLARATIONS = section("declarations", _mem_read_declarations(block)),
+      AXI_MEM_READS         = section("read_decode",  _mem_reads(block)),
+      MEM_READ_MERGE        = section("read_decode",  _mem_read_merge(block)),
+      MEM_READ_RESETS       = section("resets",       _mem_read_resets(block)),
+      MEM_READ_PIPELINE     = section("read_decode",  _mem_read_pipeline(block))))
 
-    yaml_reg = yaml.load(file, Loader = yaml.FullLoader)
-    block_name, block_contents = list(yaml_reg.items())[0]
 
-  # ----------------------------------------------------------------------------
-  # Creating all register classes and their uvm_reg_field's
-  # ----------------------------------------------------------------------------
+# ------------------------------------------------------------------------------
+# Widths and ranges
+# ------------------------------------------------------------------------------
 
-  # First information in the file
-  BLOCK_NAME    = block_name
-  BUS_BIT_WIDTH = block_contents['bus_width']
+def _port_width(reg, field):
 
-  # Variables for construction the AXI slave
-  rtl_parameters       = [] # Size fields which are strings are considered parameters
-  rtl_ports            = [] # We list all ports we generate as tuples (IO, PORT_WIDTH, FIELD_NAME)
-  rtl_resets           = [] # If a reset value is specified for a register we add in this list
+  _port_width = ""
+  if (reg.repeat > 1):
+    _port_width += "[%s : 0] " % (reg.repeat - 1)
+  if (isinstance(field.size, str)): # If the size is a string, i.e., a constant
+    _port_width += "[%s-1 : 0]" % (field.size)
+  elif (field.size == 1):           # If the size is just one bit
+    _port_width += " "
+  else:                             # Else, any other integer
+    _port_width += "[%s : 0]" % (str(field.size-1))
+  return _port_width
 
-  rtl_cmd_registers    = [] # Save all 'cmd_' registers here, used later to set them to '0' as default
-  all_rtl_writes       = "" # Contains the RTL writes
-  all_rtl_reads        = "" # Contains the RTL reads
-  all_mem_writes       = "" # Contains the MEM writes
-  all_rc_registers     = [] # Contains the RC registers
 
-  reg_all_fields       = [] # If a register contains 2 or more fields, we save them here because
-                            # we need to finish iterating through all fields so we later can make the
-                            # assignment like, e.g., "{f2, f1, f0} <= cif.wdata;"
-  reg_rc_accessed      = {} # ReadAndClear registers
-  reg_rc_declarations  = []
-  reg_rom_declarations = []
+def _axi_range(reg):
 
-  rtl_parameters.append("AXI_DATA_WIDTH_P")
-  rtl_parameters.append("AXI_ADDR_WIDTH_P")
-  rtl_parameters.append("AXI_ID_P")
+  # The bits of the write and read data of a register with one field
+  [(field, lsb)] = pyrg_model.field_positions(reg)
 
-  if ("parameters" in block_contents.keys()):
-    for p in block_contents['parameters']:
-      rtl_parameters.append(p)
+  if (isinstance(field.size, str)):
+    # NOTE: The lsb position must be an integer
+    if (lsb == 0):
+      return "%s-1 : 0" % (field.size)
+    return "%s+%s-1 : %s" % (field.size, lsb, lsb)
+  # If the size is just one bit we do not have to define a range
+  elif (field.size == 1):
+    return "%s" % (lsb)
+  # Else, any other integer
+  return "%s : %s" % (str(field.size+lsb-1), lsb)
 
-  # ----------------------------------------------------------------------------
-  # Iterating through the list of registers
-  # ----------------------------------------------------------------------------
-  for reg in block_contents['registers']:
 
-    # Register information
-    reg_name   = reg['name']
-    reg_access = reg['access']
-    if ("repeat" in reg.keys()):
-      reg_repeat = reg["repeat"]
-    else:
-      reg_repeat = 1
-
-    # Generate RTL code (for fields) are appended to these
-    _reg_writes = []
-    _reg_reads  = []
-
-    # Check if this register has access type RC (Read and Clear)
-    if (reg_access in ["RC"]):
-      all_rc_registers.append(reg_name)
-      reg_rc_accessed[reg_name] = []
-
-    # --------------------------------------------------------------------------
-    # Iterating through the fields
-    # --------------------------------------------------------------------------
-    for field in reg['bit_fields']:
-
-      # Field variables
-      _field_name    = field['field']['name']
-      _field_size    = field['field']['size']
-      _field_lsb_pos = field['field']['lsb_pos']
-      _field_type    = _field_name.split("_")[0].upper() # Register have names, e.g., prefix_block_register
-
-      # rtl_ports
-      _port_width = ""
-      if (reg_repeat > 1):
-        _port_width += "[%s : 0] " % (reg_repeat - 1)
-      if (isinstance(_field_size, str)): # If the size is a string, i.e., a constant
-        _port_width += "[%s-1 : 0]" % (_field_size)
-      elif (_field_size == 1):           # If the size is just one bit
-        _port_width += " "
-      else:                              # Else, any other integer
-        _port_width += "[%s : 0]" % (str(_field_size-1))
-
-      if (_field_type in ["CR", "CMD"]):
-        rtl_ports.append(("    output logic ", _port_width, _field_name))
-      elif (_field_type in ["SR", "IRQ"]):
-        rtl_ports.append(("    input  wire  ", _port_width, _field_name))
-      elif (_field_type in ["ROM"]):
-        reg_rom_declarations.append((_port_width, _field_name, field['field']['reset_value'], _field_size))
-
-      # Declaration of Read and Clear registers
-      if (reg_access in ["RC"]):
-        reg_rc_declarations.append((_port_width, _field_name))
-
-      # rtl_resets
-      if ("reset_value" in field['field'].keys() and not _field_type in ["ROM"]):
-        if (reg_repeat > 1):
-          for i in range(reg_repeat):
-            rtl_resets.append(((_field_name+"[%d]"%i), field['field']['reset_value']))
-        else:
-          rtl_resets.append((_field_name, field['field']['reset_value']))
-
-      # rtl_cmd_registers
-      if (_field_type in ["CMD"]):
-        rtl_cmd_registers.append(_field_name)
-
-
-      # Field assignments
-      _axi_range = ""
-      _wr_indent = 16
-      _rd_indent = 8
-
-      # If this register contains only one field
-      if len(reg['bit_fields']) == 1:
-
-        # Calculating the AXI range
-        if (isinstance(_field_size, str)):
-          # NOTE: The lsb position must be an integer
-          if (_field_lsb_pos == 0):
-            _axi_range = "%s-1 : 0" % (_field_size)
-          else:
-            _axi_range = "%s+%s-1 : %s" % (_field_size, _field_lsb_pos, _field_lsb_pos)
-        # If the size is just one bit we do not have to define a range
-        elif (_field_size == 1):
-          _axi_range = _field_lsb_pos
-        # Else, any other integer
+def _writable(block):
+  return [mem for mem in block.memories if mem.access in ["RW", "WO"]]
+
+
+def _readable(block):
+  return [mem for mem in block.memories if mem.access in ["RW", "RO"]]
+
+
+def _mem_strobes(mem):
+
+  # One strobe for every byte of a memory word
+  _n_strobes = (mem.width + 7) // 8
+  if (_n_strobes == 1):
+    return " "
+  return "[%d : 0]" % (_n_strobes - 1)
+
+
+def _mem_widths(block, mem):
+
+  # In order to use the "awaddr" as the address for memory, we need to add
+  # extra bits because the slave will increase the address by
+  # (BUS_BIT_WIDTH/8) for every beat. Therefore, e.g., for a 64-bit data
+  # bus, a counter's values will essentially be present in the higher bits.
+  _byte_addr_width = math.log2(block.bus_width/8)
+  _port_addr_width = "[%d : 0]" % (math.log2(mem.size) - 1 + _byte_addr_width)
+  _port_data_width = "[%d : 0]" % (mem.width-1)
+  return (_port_addr_width, _port_data_width)
+
+
+# ------------------------------------------------------------------------------
+# Parameters and ports
+# ------------------------------------------------------------------------------
+
+def _parameters(block):
+
+  rtl_parameters = ["AXI_DATA_WIDTH_P", "AXI_ADDR_WIDTH_P", "AXI_ID_P"] + block.parameters
+
+  _re = r".*\$.*\((.*)\)"
+  for i in range(len(rtl_parameters)):
+    match = re.match(_re, str(rtl_parameters[i]))
+    if match:
+      rtl_parameters[i] = match.group(1)
+
+  return ",\n".join(4*' ' + "parameter int %s = -1" % p for p in sort_uniq(rtl_parameters))
+
+
+def _port_list(block, options):
+
+  # All ports as tuples (IO, PORT_WIDTH, FIELD_NAME)
+  for reg in block.registers:
+    for field in reg.fields:
+      if (field.type in ["CR", "CMD"]):
+        yield ("    output logic ", _port_width(reg, field), field.name)
+      elif (field.type in ["SR", "IRQ"]):
+        yield ("    input  wire  ", _port_width(reg, field), field.name)
+
+  for reg in block.registers:
+    if (reg.access in ["RC"]):
+      yield ("    output logic ", " ", "clear_" + reg.name)
+
+  for mem in _writable(block):
+    (_port_addr_width, _port_data_width) = _mem_widths(block, mem)
+    yield ("    output logic ", " ", mem.name + "_we")
+    yield ("    output logic ", _port_addr_width, mem.name + "_addr")
+    yield ("    output logic ", _port_data_width, mem.name + "_wdata")
+    if (options.axi_wstrb):
+      yield ("    output logic ", _mem_strobes(mem), mem.name + "_wstrb")
+
+  for mem in _readable(block):
+    (_port_addr_width, _port_data_width) = _mem_widths(block, mem)
+    yield ("    output logic ", " ", mem.name + "_re")
+    yield ("    output logic ", _port_addr_width, mem.name + "_raddr")
+    yield ("    input  wire  ", _port_data_width, mem.name + "_rdata")
+
+
+def _ports(block, options):
+
+  # Find the longest declaration for indenting nice
+  longest = max((len(_width) for (_, _width, _) in _port_list(block, options)), default = 0)
+
+  for (i, (IO, _width, _name)) in enumerate(_port_list(block, options)):
+    yield (",\n" if i else "") + IO + _width.rjust(longest, " ") + " " + _name
+
+
+def _logic_declarations(block, options):
+
+  # Read and Clear registers and ROM fields are aligned together
+  longest = 0
+  for reg in block.registers:
+    for field in reg.fields:
+      if (reg.access in ["RC"] or field.type in ["ROM"]):
+        longest = max(longest, len(_port_width(reg, field)))
+
+  yield "\n"
+
+  # The instance of a register array is the offset in bus words
+  if (options.axi_range_decode):
+    yield "  localparam int ADDR_LSB_C = $clog2(AXI_DATA_WIDTH_P/8);\n\n"
+
+  # The bits of the write data which are written, one byte lane per strobe
+  if (options.axi_wstrb):
+    yield "  logic [AXI_DATA_WIDTH_P-1 : 0] wr_mask;\n\n"
+    yield "  always_comb begin\n"
+    yield "    for (int i = 0; i < AXI_DATA_WIDTH_P; i++) begin\n"
+    yield "      wr_mask[i] = cif.wstrb[i/8];\n"
+    yield "    end\n"
+    yield "  end\n\n"
+
+  for reg in block.registers:
+    for field in reg.fields:
+      if (field.type in ["ROM"]):
+        yield "  localparam logic unsigned " + _port_width(reg, field).rjust(longest, " ") + " " + field.name + (" = ") + str(field.reset_value) + ";\n"
+
+
+# ------------------------------------------------------------------------------
+# Resets and default values
+# ------------------------------------------------------------------------------
+
+def _reset_list(block, options):
+
+  # If a reset value is specified for a register it is reset, all instances of
+  # a register array at once when it is decoded by range, with a replication
+  # since not every tool accepts an assignment pattern on a packed array
+  for reg in block.registers:
+    for field in reg.fields:
+      if (field.has_reset and not field.type in ["ROM"]):
+        if (reg.repeat > 1 and options.axi_range_decode):
+          yield (field.name, "{%d{%s'(%s)}}" % (reg.repeat, field.size, field.reset_value))
+        elif (reg.repeat > 1):
+          for i in range(reg.repeat):
+            yield ((field.name+"[%d]"%i), field.reset_value)
         else:
-          _axi_range = "%s : 0" % (str(_field_size-1))
+          yield (field.name, field.reset_value)
 
-        # Writes
-        if (reg_access in ["WO", "RW"]):
-          _write = _wr_indent*" " + _field_name + (" <= cif.wdata[%s]" % (_axi_range))
-          _reg_writes.append(_write)
+  for mem in _writable(block):
+    yield (mem.name + "_we", 0)
+    yield (mem.name + "_addr", 0)
+    yield (mem.name + "_wdata", 0)
+    if (options.axi_wstrb):
+      yield (mem.name + "_wstrb", 0)
 
-        # Reads
-        if (reg_access in ["RO", "RW", "ROM"]):
-          _read = _rd_indent*" " + ("cif.rdata[%s] = ") % (_axi_range) + _field_name
-          _reg_reads.append(_read)
 
-        # Read and Clear
-        if (reg_access in ["RC"]):
-          _read  = _rd_indent*" " + ("cif.rdata[%s] = ") % (_axi_range) + _field_name
-          _read += _rd_indent*" " + "clear_" + reg_name + " <= '1"
-          _reg_reads.append(_read)
+def _resets(block, options):
 
-      else:
+  longest = max((len(_name) for (_name, _) in _reset_list(block, options)), default = 0)
 
-        if (reg_access in ["RC"]):
-          reg_rc_accessed[reg_name].append(_field_name)
+  for (_name, _reset_value) in _reset_list(block, options):
+    yield 6*" " + _name.ljust(longest, " ") + " <= " + str(_reset_value) + ";\n"
 
-      # If there are more than one fields we make assignments
-      if (len(reg['bit_fields']) != 1) and not (reg_access in ["RC"]):
-        reg_all_fields.append(_field_name)
 
+def _cmd_defaults(block):
 
+  # All 'cmd_' registers are set to '0' as default
+  _cmds   = [field.name for reg in block.registers for field in reg.fields if field.type in ["CMD"]]
+  longest = max((len(cmd) for cmd in _cmds), default = 0)
 
-    # </end> of field iteration
+  yield "\n"
+  for cmd in _cmds:
+    yield 6*" " + cmd.ljust(longest, " ") + " <= '0;\n"
 
 
+def _rc_defaults(block):
 
-    # For register with more than one field we make assignments
-    if len(reg_all_fields):
+  for reg in block.registers:
+    if (reg.access in ["RC"]):
+      yield 4*" " + "clear_" + reg.name + " = '0;\n"
 
-      # Reversing reg_all_fields so that the first fields is placed at the lowest bits
-      _fields_concatenated = ', '.join(reg_all_fields[::-1])
 
-      if (reg_access in ["WO", "RW"]):
-        _write = _wr_indent*" " + "{" + _fields_concatenated + "} <= cif.wdata"
-        _reg_writes.append(_write)
+def _mem_interfaces(block, options):
 
-      if (reg_access in ["RO", "RW"]):
-        _read = _rd_indent*" " + "cif.rdata = " + "{" + _fields_concatenated + "}"
-        _reg_reads.append(_read)
+  for mem in _writable(block):
+    yield 6*" " + "%s_we    <= '0;\n" % (mem.name)
+    yield 6*" " + "%s_addr  <= '0;\n" % (mem.name)
+    yield 6*" " + "%s_wdata <= '0;\n" % (mem.name)
+    if (options.axi_wstrb):
+      yield 6*" " + "%s_wstrb <= '0;\n" % (mem.name)
 
 
-      reg_all_fields = []
+# ------------------------------------------------------------------------------
+# Decoding
+#
+# A repeated register is either decoded unrolled, with one case arm per
+# instance, or by range, with one arm for the address range of all its
+# instances where the instance is indexed by the offset from the first
+# ------------------------------------------------------------------------------
 
-    # Read And Clear registers
-    if reg_name in reg_rc_accessed.keys() and len(reg_rc_accessed[reg_name]):
-      _fields_concatenated = ", ".join(reg_rc_accessed[reg_name][::-1])
-      _read                = _rd_indent*" " + "cif.rdata = " + "{" + _fields_concatenated + "};\n"
-      _read               += _rd_indent*" " + "clear_" + reg_name + " = '1"
-      _reg_reads.append(_read)
+def _field(field, index):
 
+  if index is None:
+    return field.name
+  return "%s[%s]" % (field.name, index)
 
-    # Generating all the write and read fields
-    _reg_address = "%s_ADDR" % (reg_name.upper())
-    _wr_indent -= 2
-    _rd_indent -= 2
 
-    if len(_reg_writes):
-      if (reg_repeat > 1):
-        _wr_row = ""
-        for i in range(reg_repeat):
-          _reg_address = "%s_%d_ADDR" % (reg_name.upper(), i)
-          _wr_row += _wr_indent*" " + _reg_address + ": begin\n"
+def _fields(reg, index):
 
-          for wr in _reg_writes:
-            _wr_split = wr.split(" <=")
-            _wr_row += _wr_split[0] + ("[%d] <=" % i) + _wr_split[1] + ";\n"
-          _wr_row += _wr_indent*" " + "end\n\n"
-      else:
+  # Reversing the fields so that the first fields is placed at the lowest bits
+  return "{" + ", ".join(_field(field, index) for field in reg.fields[::-1]) + "}"
 
-        _wr_row = _wr_indent*" " + _reg_address + ": begin\n"
-        for wr in _reg_writes:
-          _wr_row += wr + ";\n"
 
-        _wr_row += _wr_indent*" " + "end\n\n"
-      _reg_writes = []
-      all_rtl_writes += _wr_row
+def _instances(reg, addr, options):
 
-    if len(_reg_reads):
-      if (reg_repeat > 1):
-        _rd_row = ""
-        for i in range(reg_repeat):
-          _reg_address = "%s_%d_ADDR" % (reg_name.upper(), i)
-          _rd_row += _rd_indent*" " + _reg_address + ": begin\n"
+  # Yields the case item, the index and the condition of every arm which
+  # decodes the register. A range also matches the addresses between the
+  # instances, which are errors like any other address which is not decoded.
+  if (reg.repeat == 1):
+    yield ("%s_ADDR" % (reg.name.upper()), None, None)
+  elif (options.axi_range_decode):
+    yield ("[%s_0_ADDR : %s_%d_ADDR]" % (reg.name.upper(), reg.name.upper(), reg.repeat - 1),
+           "(%s - %s_0_ADDR) >> ADDR_LSB_C" % (addr, reg.name.upper()),
+           "%s %% (AXI_DATA_WIDTH_P/8) == 0" % (addr))
+  else:
+    for i in range(reg.repeat):
+      yield ("%s_%d_ADDR" % (reg.name.upper(), i), "%d" % i, None)
 
-          for rd in _reg_reads:
-            _rd_row += rd + "[%d];\n" % i
-          _rd_row += _rd_indent*" " + "end\n\n"
-      else:
 
-        _rd_row = _rd_indent*" " + _reg_address + ": begin\n"
-        for rd in _reg_reads:
-          _rd_row += rd + ";\n"
-        _rd_row += _rd_indent*" " + "end\n\n"
-      _reg_reads = []
-      all_rtl_reads  += _rd_row
+def _guarded(lines, condition, errors, indent):
 
+  # The statements of an arm, only if its condition holds, else the errors
+  if condition is None:
+    yield from (line + ";\n" for line in lines)
+    return
+  yield indent*" " + "if (%s) begin\n" % (condition)
+  yield from ("  " + line + ";\n" for line in lines)
+  yield indent*" " + "end\n"
+  yield indent*" " + "else begin\n"
+  yield from ((indent + 2)*" " + error + "\n" for error in errors)
+  yield indent*" " + "end\n"
 
 
-  # </end> of register iteration
+def _read_latency(block, options):
 
+  # The overlapped slave streams reads back to back, which needs the pipelined
+  # read process, and so does the read data of a memory, which arrives after
+  # its read latency
+  latency = options.read_pipeline
+  if (options.axi_overlap):
+    latency = max(latency, 1)
+  return max([latency] + [mem.read_latency for mem in _readable(block)])
 
 
-  RC_DEFAULT = ""
-  for rc in all_rc_registers:
-    rtl_ports.append(("    output logic ", " ", "clear_" + rc))
-    RC_DEFAULT += 4*" " + "clear_" + rc + " = '0;\n"
+def _case(addr, options):
 
+  # Address ranges are only matched by "case inside"
+  if (options.axi_range_decode):
+    return "case (%s) inside" % (addr)
+  return "case (%s)" % (addr)
 
 
-  # Iterating through the list of memories
-  MEMORIES = ""
-  if ('memories' in block_contents.keys()):
+# ------------------------------------------------------------------------------
+# Writes
+# ------------------------------------------------------------------------------
 
-    for mem in block_contents['memories']:
-      mem_name   = mem['name']
-      mem_access = mem['access']
-      mem_size   = mem['size']
-      mem_width  = mem['width']
+def _strobed(reg, index, target, bits):
 
-      # rtl_ports
+  # The strobed bits of the write data, the other bits keep their value. The
+  # bits of command fields are only set by the write, i.e., they are '0 if
+  # they are not strobed, also in a register with other fields.
+  if all(field.type in ["CMD"] for field in reg.fields):
+    return "%s <= cif.wdata%s & wr_mask%s" % (target, bits, bits)
+  if any(field.type in ["CMD"] for field in reg.fields):
+    _kept = "{" + ", ".join("%s'(0)" % (field.size) if field.type in ["CMD"] else _field(field, index)
+                            for field in reg.fields[::-1]) + "}"
+  else:
+    _kept = target
+  return "%s <= (cif.wdata%s & wr_mask%s) | (%s & ~wr_mask%s)" % (target, bits, bits, _kept, bits)
 
-      # In order to use the "awaddr" as the address for memory, we need to add
-      # extra bits because the slave will increase the address by
-      # (BUS_BIT_WIDTH/8) for every beat. Therefore, e.g., for a 64-bit data
-      # bus, a counter's values will essentially be present in the higher bits.
-      _byte_addr_width = math.log2(BUS_BIT_WIDTH/8)
-      _port_addr_width = "[%d : 0]" % (math.log2(mem_size) - 1 + _byte_addr_width)
-      _port_data_width = "[%d : 0]" % (mem_width-1)
-      rtl_ports.append(("    output logic ", " ", mem_name + "_we"))
-      rtl_ports.append(("    output logic ", _port_addr_width, mem_name + "_addr"))
-      rtl_ports.append(("    output logic ", _port_data_width, mem_name + "_wdata"))
 
-      # rtl_resets
-      rtl_resets.append((mem_name + "_we", 0))
-      rtl_resets.append((mem_name + "_addr", 0))
-      rtl_resets.append((mem_name + "_wdata", 0))
+def _reg_writes(reg, index, wstrb = False):
 
-      MEMORIES += 6*" " + "%s_we    <= '0;\n" % (mem_name)
-      MEMORIES += 6*" " + "%s_addr  <= '0;\n" % (mem_name)
-      MEMORIES += 6*" " + "%s_wdata <= '0;\n" % (mem_name)
+  _wr_indent = 16
 
-      # all_mem_writes
-      _mem_addr = "%s_%s_BASE_ADDR" % (BLOCK_NAME.upper(), mem_name.upper())
-      _mem_last_addr = "%s_%s_HIGH_ADDR" % (BLOCK_NAME.upper(), mem_name.upper())
-
-      if (mem_access in ["RW", "WO"]):
-        all_mem_writes += 12*" " + "if (awaddr_r0 >= %s && awaddr_r0 <= %s) begin\n" % (_mem_addr, _mem_last_addr)
-        all_mem_writes += 14*" " + "%s_we    <= '1;\n" % (mem_name)
-        all_mem_writes += 14*" " + "%s_addr  <= awaddr_r0%s;\n" % (mem_name, _port_addr_width)
-        all_mem_writes += 14*" " + "%s_wdata <= cif.wdata%s;\n" % (mem_name, _port_data_width)
-        all_mem_writes += 12*" " + "end\n\n"
-
-      # ------------------------------------------------------------------------
-      # all_mem_reads
-      # ------------------------------------------------------------------------
-      if (mem_access in ["RW", "RO"]):
-        raise Exception("Only writable memories supported yet!")
-
-
-  # rtl_ports
-  longest = 0 # Find the longest declaration for indenting nice
-  for port in rtl_ports:
-    (_, _field_size, _) = port
-    if (len(_field_size) > longest):
-      longest = len(_field_size)
+  if (reg.access not in ["WO", "RW"]):
+    return []
 
-  AXI_PORTS = ""
-  for port in rtl_ports:
-    (IO, _field_size, _field_name) = port
-    AXI_PORTS += IO + _field_size.rjust(longest, " ") + " " + _field_name + ",\n"
-  AXI_PORTS = AXI_PORTS[:-2] # Remove the last comma and newline
+  # If this register contains only one field
+  if len(reg.fields) == 1:
+    field = reg.fields[0]
+    if (wstrb):
+      return [_wr_indent*" " + _strobed(reg, index, _field(field, index), "[%s]" % (_axi_range(reg)))]
+    return [_wr_indent*" " + _field(field, index) + (" <= cif.wdata[%s]" % (_axi_range(reg)))]
 
+  # For register with more than one field we make assignments like, e.g.,
+  # "{f2, f1, f0} <= cif.wdata;"
+  if (wstrb):
+    return [_wr_indent*" " + _strobed(reg, index, _fields(reg, index), "")]
+  return [_wr_indent*" " + _fields(reg, index) + " <= cif.wdata"]
 
-  # reg_rc_declarations and reg_rom_declarations
-  longest = 0
-  for reg in reg_rc_declarations:
-    (_port_width, _field_name) = reg
-    if (len(_port_width) > longest):
-      longest = len(_port_width)
 
-  for reg in reg_rom_declarations:
-    (_port_width, _field_name, _, _) = reg
-    if (len(_port_width) > longest):
-      longest = len(_port_width)
+def _writes(block, options):
 
-  LOGIC_DECLARATIONS = "\n"
-  for reg in reg_rom_declarations:
-    (_port_width, _field_name, _reset_value, _field_size) = reg
-    LOGIC_DECLARATIONS += "  localparam logic unsigned " + _port_width.rjust(longest, " ") + " " + _field_name + (" = ") + _reset_value + ";\n"
+  _wr_indent = 14
 
+  for reg in block.registers:
 
-  # rtl_resets
-  longest = 0
-  for port in rtl_resets:
-    (_field_name, _) = port
-    if (len(_field_name) > longest):
-      longest = len(_field_name)
-  AXI_RESET = ""
-  for port in rtl_resets:
-    (_field_name, _field_reset_value) = port
-    AXI_RESET += 6*" " + _field_name.ljust(longest, " ") + " <= " + str(_field_reset_value) + ";\n"
+    if (reg.access not in ["WO", "RW"]):
+      continue
 
+    for (_item, _index, _condition) in _instances(reg, "awaddr_r0", options):
+      yield _wr_indent*" " + _item + ": begin\n"
+      yield from _guarded(_reg_writes(reg, _index, options.axi_wstrb), _condition, [_write_error_statement(options)], 16)
+      yield _wr_indent*" " + "end\n\n"
 
-  # rtl_cmd_registers
-  longest = 0
-  for cmd in rtl_cmd_registers:
-    if (len(cmd) > longest):
-      longest = len(cmd)
-  CMD_DEFAULT = "\n"
-  for cmd in rtl_cmd_registers:
-    CMD_DEFAULT += 6*" " + cmd.ljust(longest, " ") + " <= '0;\n"
 
+def _write_error_statement(options):
+  return "wr_beat_error <= '1;" if options.axi_overlap else "cif.bresp <= AXI_RESP_SLVERR_C;"
 
-  PARAMETERS = ""
-  _re = r".*\$.*\((.*)\)"
-  for i in range(len(rtl_parameters)):
-    match = re.match(_re, str(rtl_parameters[i]))
-    if match:
-      rtl_parameters[i] = match.group(1)
-  rtl_parameters = sort_uniq(rtl_parameters)
-  for p in rtl_parameters:
-    PARAMETERS += 4*' ' + "parameter int %s = -1,\n" % p
-  PARAMETERS = PARAMETERS[:-2]
-
-
-  output = header + axi_template
-  output = output.replace("IMPORT",             ("import " + BLOCK_NAME + "_address_pkg::*;"))
-  output = output.replace("PARAMETERS",         PARAMETERS)
-  output = output.replace("CLASS_NAME",         (BLOCK_NAME + "_axi_slave"))
-  output = output.replace("PORTS",              AXI_PORTS)
-  output = output.replace("LOGIC_DECLARATIONS", LOGIC_DECLARATIONS)
-  output = output.replace("CMD_REGISTERS",      CMD_DEFAULT)
-  output = output.replace("MEM_INTERFACES",     MEMORIES)
-  output = output.replace("RESETS",             AXI_RESET)
-  output = output.replace("AXI_WRITES",         all_rtl_writes)
-  output = output.replace("AXI_MEM_WRITES",     all_mem_writes)
-  output = output.replace("RC_DEFAULT",         RC_DEFAULT)
-  output = output.replace("AXI_READS",          all_rtl_reads)
-
-  # Write the AXI slave to file
-  output_path = '/'.join(yaml_file_path.split('/')[:-2]) + "/rtl/"
-  output_file = output_path + BLOCK_NAME + "_axi_slave.sv"
-  with open(output_file, 'w') as file:
-    file.write(output)
-
-  print("INFO [pyrg] Generated %s" % output_file)
+
+def _write_error(block, options):
+
+  # An address which is not a register is an error, unless it is in a memory
+  # which is written by the memory write ports
+  _error = _write_error_statement(options)
+  _hits  = ["awaddr_r0 >= %s_%s_BASE_ADDR && awaddr_r0 < %s_%s_HIGH_ADDR" % (
+    block.name.upper(), mem.name.upper(), block.name.upper(), mem.name.upper()) for mem in _writable(block)]
+
+  if not len(_hits):
+    yield 16*" " + _error
+    return
+
+  if len(_hits) > 1:
+    _hits = ["(" + _hit + ")" for _hit in _hits]
+  yield 16*" " + "if (!(%s)) begin\n" % ((" ||\n" + 22*" ").join(_hits))
+  yield 18*" " + _error + "\n"
+  yield 16*" " + "end"
+
+
+def _mem_writes(block, options):
+
+  for mem in block.memories:
+
+    (_port_addr_width, _port_data_width) = _mem_widths(block, mem)
+    _mem_addr      = "%s_%s_BASE_ADDR" % (block.name.upper(), mem.name.upper())
+    _mem_last_addr = "%s_%s_HIGH_ADDR" % (block.name.upper(), mem.name.upper())
+
+    if (mem.access in ["RW", "WO"]):
+      yield 12*" " + "if (awaddr_r0 >= %s && awaddr_r0 < %s) begin\n" % (_mem_addr, _mem_last_addr)
+      yield 14*" " + "%s_we    <= '1;\n" % (mem.name)
+      yield 14*" " + "%s_addr  <= awaddr_r0%s;\n" % (mem.name, _port_addr_width)
+      yield 14*" " + "%s_wdata <= cif.wdata%s;\n" % (mem.name, _port_data_width)
+      if (options.axi_wstrb):
+        yield 14*" " + "%s_wstrb <= cif.wstrb%s;\n" % (mem.name, _mem_strobes(mem).strip() or "[0]")
+      yield 12*" " + "end\n\n"
+
+
+# ------------------------------------------------------------------------------
+# Reads
+# ------------------------------------------------------------------------------
+
+def _reg_reads(reg, index, pipelined = False):
+
+  _rd_indent = 8
+
+  # The pipelined read decodes into the first stage, and a read and clear
+  # register is only cleared when its read is issued
+  _rdata = "rd_data_c" if pipelined else "cif.rdata"
+  _clear = "rd_issue"  if pipelined else "'1"
+
+  if (reg.access not in ["RO", "RW", "ROM", "RC"]):
+    return []
+
+  # If this register contains only one field
+  if len(reg.fields) == 1:
+    field  = reg.fields[0]
+    _reads = [_rd_indent*" " + ("%s[%s] = ") % (_rdata, _axi_range(reg)) + _field(field, index)]
+  elif (reg.access in ["RO", "RW", "RC"]):
+    _reads = [_rd_indent*" " + _rdata + " = " + _fields(reg, index)]
+  else:
+    return []
+
+  # Read and Clear
+  if (reg.access in ["RC"]):
+    _reads.append(_rd_indent*" " + "clear_" + reg.name + " = " + _clear)
+
+  return _reads
+
+
+def _reads(block, options):
+
+  _rd_indent = 6
+
+  for reg in block.registers:
+
+    if not len(_reg_reads(reg, None)):
+      continue
+
+    _pipelined = _read_latency(block, options) > 0
+    _errors    = ["rd_resp_c = AXI_RESP_SLVERR_C;", "rd_data_c = '0;"] if _pipelined else \
+                 ["cif.rresp = AXI_RESP_SLVERR_C;", "cif.rdata = '0;"]
+
+    for (_item, _index, _condition) in _instances(reg, "araddr_r0", options):
+      yield _rd_indent*" " + _item + ": begin\n"
+      yield from _guarded(_reg_reads(reg, _index, _pipelined), _condition, _errors, 8)
+      yield _rd_indent*" " + "end\n\n"
+
+
+def _mem_read_declarations(block):
+
+  for mem in _readable(block):
+    yield "  logic" + 50*" " + "%s_rsel_c;\n" % (mem.name)
+    yield "  logic" + 25*" " + "[READ_LATENCY_C-1 : 0]  %s_rsel_p;\n" % (mem.name)
+
+
+def _mem_reads(block):
+
+  # The read of a memory is issued with the beat, its address is the address
+  # counter like for the writes. The high address is the first address after
+  # the memory.
+  for mem in _readable(block):
+
+    (_port_addr_width, _port_data_width) = _mem_widths(block, mem)
+    _mem_addr      = "%s_%s_BASE_ADDR" % (block.name.upper(), mem.name.upper())
+    _mem_last_addr = "%s_%s_HIGH_ADDR" % (block.name.upper(), mem.name.upper())
+
+    yield "\n"
+    yield 4*" " + "%s_re     = '0;\n" % (mem.name)
+    yield 4*" " + "%s_raddr  = '0;\n" % (mem.name)
+    yield 4*" " + "%s_rsel_c = '0;\n" % (mem.name)
+    yield 4*" " + "if (araddr_r0 >= %s && araddr_r0 < %s) begin\n" % (_mem_addr, _mem_last_addr)
+    yield 6*" " + "%s_re     = rd_issue;\n" % (mem.name)
+    yield 6*" " + "%s_raddr  = araddr_r0%s;\n" % (mem.name, _port_addr_width)
+    yield 6*" " + "%s_rsel_c = '1;\n" % (mem.name)
+    yield 6*" " + "rd_resp_c".ljust(len(mem.name) + 7) + " = '0;\n"
+    yield 4*" " + "end\n"
+
+
+def _mem_read_merge(block):
+
+  for mem in _readable(block):
+    yield "\n"
+    yield 4*" " + "if (%s_rsel_p[%d]) begin\n" % (mem.name, mem.read_latency - 1)
+    yield 6*" " + "rd_data_d[%d] = AXI_DATA_WIDTH_P'(%s_rdata);\n" % (mem.read_latency, mem.name)
+    yield 4*" " + "end\n"
+
+
+def _mem_read_resets(block):
+
+  for mem in _readable(block):
+    yield 6*" " + "%s_rsel_p <= '0;\n" % (mem.name)
+
+
+def _mem_read_pipeline(block):
+
+  for mem in _readable(block):
+    yield 6*" " + "%s_rsel_p[0] <= rd_issue && %s_rsel_c;\n" % (mem.name, mem.name)
+    yield 6*" " + "for (int i = 1; i < READ_LATENCY_C; i++) begin\n"
+    yield 8*" " + "%s_rsel_p[i] <= %s_rsel_p[i-1];\n" % (mem.name, mem.name)
+    yield 6*" " + "end\n"
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: Benchmarks the generators on synthetic register maps. Every
+## size is run in its own process so that its peak RSS can be measured, and
+## every emitter is timed separately. The results can be saved as JSON and
+## compared against a baseline to catch regressions.
+##
+################################################################################
+
+import os, sys, json, time, argparse, tempfile, subprocess, contextlib, platform
+
+DEFAULT_SIZES = "10,100,1000,10000"
+
+# An up to date run of pyrg.py may take at most this much longer than starting
+# the interpreter
+STARTUP_BUDGET_MS = 50
+
+# Every this many registers one has a fixed address
+FIXED_EVERY = 50
+
+# Phases which are compared against the baseline, in the order they are run
+PHASES = ["parse", "parse_cached", "uvm_reg", "sv_address_pkg", "c_address_header", "uvm_block", "axi"]
+
+
+# ------------------------------------------------------------------------------
+# Synthetic register maps
+# ------------------------------------------------------------------------------
+
+def synthetic_spec(name, n_registers, n_memories = 3, repeat = 8, bus_width = 64, out_path = "$GIT_ROOT"):
+
+  # Returns the YAML text of a block with n_registers registers which mixes all
+  # kinds of registers and fields the generators support. Some registers have
+  # fixed addresses, which the others are placed around, and the memories are
+  # written, read and both, with read latencies which give the slave a read
+  # pipeline.
+  bus_bytes = bus_width // 8
+  words     = n_registers + (n_registers // 10 + 1) * (repeat - 1) + 16 * (n_registers // FIXED_EVERY + 1)
+  mem_bytes = sum((256 << i) * bus_bytes for i in range(n_memories))
+  lines = [
+    "%s:" % name,
+    "  bus_width: %d" % bus_width,
+    "  addr_width: %d" % max(16, (2 * (words * bus_bytes + mem_bytes)).bit_length()),
+    "  rtl_path: %s/rtl" % out_path,
+    "  uvm_path: %s/tb/uvm_reg" % out_path,
+    "  sw_path:  %s/sw" % out_path,
+    "  parameters:",
+    "    - DATA_WIDTH_P",
+    "  registers:"
+  ]
+
+  # The words of the registers so far, and the number of fixed registers. A
+  # fixed register is far enough after the registers before it that it is not
+  # reached by them, even when they are placed after the fixed ones before it.
+  placed = [0, 0]
+
+  def register(name, access, fields, reg_repeat = 1, fixed = False):
+    lines.append("    - name: %s" % name)
+    lines.append("      access: %s" % access)
+    lines.append("      desc: Synthetic register %s" % name)
+    if fixed:
+      placed[1] += 1
+      lines.append("      address: 0x%x" % ((placed[0] + 16 * placed[1]) * bus_bytes))
+    placed[0] += reg_repeat
+    if reg_repeat > 1:
+      lines.append("      repeat: %d" % reg_repeat)
+    lines.append("      bit_fields:")
+    for (field_name, size, lsb_pos, reset_value) in fields:
+      lines.append("        - field:")
+      lines.append("            name: %s" % field_name)
+      lines.append("            description: Synthetic field %s" % field_name)
+      lines.append("            size: %s" % size)
+      lines.append("            lsb_pos: %d" % lsb_pos)
+      if reset_value is not None:
+        lines.append("            reset_value: %s" % reset_value)
+
+  for i in range(n_registers):
+    kind = i % 10
+    if kind == 0:   # Single field control register
+      register("cr_single_%d" % i, "RW", [("cr_single_%d" % i, 16, 0, 0)], fixed = i % FIXED_EVERY == 0)
+    elif kind == 1: # Multi field control register
+      register("cr_multi_%d" % i, "RW", [("cr_multi_%d_a" % i, 8, 0, 1),
+                                         ("cr_multi_%d_b" % i, 8, 8, 2),
+                                         ("cr_multi_%d_c" % i, 16, 16, None)])
+    elif kind == 2: # Status register
+      register("sr_status_%d" % i, "RO", [("sr_status_%d" % i, 32, 0, None)])
+    elif kind == 3: # Read and clear counters
+      register("sr_count_%d" % i, "RC", [("sr_count_%d_lo" % i, 16, 0, None),
+                                         ("sr_count_%d_hi" % i, 16, 16, None)])
+    elif kind == 4: # Interrupt
+      register("irq_event_%d" % i, "RC", [("irq_event_%d" % i, 1, 0, None)])
+    elif kind == 5: # Command
+      register("cmd_start_%d" % i, "WO", [("cmd_start_%d" % i, 1, 0, None)])
+    elif kind == 6: # Constant
+      register("rom_id_%d" % i, "ROM", [("rom_id_%d" % i, 32, 0, "32'h%08X" % i)])
+    elif kind == 7: # Repeated register array
+      register("cr_array_%d" % i, "RW", [("cr_array_%d" % i, 12, 0, 0)], repeat)
+    elif kind == 8: # Parameter sized field
+      register("cr_data_%d" % i, "RW", [("cr_data_%d" % i, "DATA_WIDTH_P", 0, 0)])
+    else:           # Write only configuration
+      register("cr_config_%d" % i, "WO", [("cr_config_%d" % i, 4, 0, 5)])
+
+  if n_memories:
+    lines.append("  memories:")
+    for i in range(n_memories):
+      access = ["RW", "RO", "WO"][i % 3]
+      lines.append("    - name: mem_%d" % i)
+      lines.append("      access: %s" % access)
+      lines.append("      size: %d" % (256 << i))
+      lines.append("      width: 32")
+      if access != "WO":
+        lines.append("      read_latency: %d" % (1 + i % 3))
+
+  return "\n".join(lines) + "\n"
+
+
+# ------------------------------------------------------------------------------
+# Running one case
+# ------------------------------------------------------------------------------
+
+def run_case(n_registers, n_memories, repeat, repeats = 1):
+
+  import resource
+  import pyrg_model, pyrg_uvm, pyrg_axi, pyrg_output
+
+  result = {"registers": n_registers, "phases": {}}
+
+  with tempfile.TemporaryDirectory() as tmp:
+
+    # The AXI slave is written to <yml_dir>/../rtl
+    yml_path = os.path.join(tmp, "yml", "bench.yml")
+    os.makedirs(os.path.dirname(yml_path))
+    os.makedirs(os.path.join(tmp, "rtl"))
+    with open(yml_path, 'w') as file:
+      file.write(synthetic_spec("bench", n_registers, n_memories, repeat))
+
+    # Every phase is run a number of times and the fastest run is kept, which
+    # is the least disturbed by other processes. The outputs of the previous run
+    # are removed so that every run writes its files.
+    def phase(name, function):
+      times  = []
+      writer = pyrg_output.Writer()
+      for _ in range(repeats):
+        for path in writer.files:
+          os.unlink(path)
+        writer = pyrg_output.Writer()
+        start  = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+          value = function(writer)
+        times.append(time.perf_counter() - start)
+      result["phases"][name] = {"time": min(times), "bytes": writer.bytes}
+      return value
+
+    # PyYAML is imported on the first parse, which is not part of the timing
+    pyrg_model._yaml()
+
+    # The cached parse is timed after the cache has been filled
+    cache_dir = os.path.join(tmp, "cache")
+    block     = phase("parse", lambda w: pyrg_model.load_block(yml_path))
+    pyrg_model.load_block(yml_path, cache_dir)
+    block     = phase("parse_cached", lambda w: pyrg_model.load_block(yml_path, cache_dir))
+
+    phase("uvm_reg",          lambda w: pyrg_uvm.generate_uvm_regs(block, tmp, writer = w))
+    phase("sv_address_pkg",   lambda w: pyrg_uvm.generate_sv_address_pkg(block, tmp, writer = w))
+    phase("c_address_header", lambda w: pyrg_uvm.generate_c_address_header(block, tmp, writer = w))
+    phase("uvm_block",        lambda w: pyrg_uvm.generate_uvm_block(block, tmp, writer = w))
+    phase("axi",              lambda w: pyrg_axi.generate_axi(block, writer = w))
+
+  result["instances"]    = block.n_instances
+  result["fields"]       = sum(len(reg.fields) for reg in block.registers)
+  result["total_time"]   = sum(p["time"] for p in result["phases"].values())
+  result["output_bytes"] = sum(p["bytes"] for p in result["phases"].values())
+  result["peak_rss_kb"]  = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  result["parse_speedup"] = result["phases"]["parse"]["time"] / max(result["phases"]["parse_cached"]["time"], 1e-9)
+
+  return result
+
+
+def run_isolated(n_registers, n_memories, repeat, repeats):
+
+  # Each case is run in a fresh interpreter so that its peak RSS is its own
+  case = json.dumps([n_registers, n_memories, repeat, repeats])
+  proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-case", case],
+                        stdout = subprocess.PIPE, check = True)
+  return json.loads(proc.stdout)
+
+
+def run_startup(repeats):
+
+  # Times the command line tool on a block which is already up to date, i.e.,
+  # the cost of starting it, against starting the interpreter itself. The
+  # bytecode cache is enabled as it is for a user.
+  pyrg = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pyrg.py")
+  env  = dict(os.environ)
+  env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+  def timed(command, cwd):
+    times = []
+    for _ in range(repeats):
+      start = time.perf_counter()
+      subprocess.run(command, cwd = cwd, env = env, stdout = subprocess.DEVNULL, check = True)
+      times.append(time.perf_counter() - start)
+    return min(times)
+
+  with tempfile.TemporaryDirectory() as tmp:
+
+    # The AXI slave is written to <yml_dir>/../rtl
+    yml_dir = os.path.join(tmp, "yml")
+    os.makedirs(os.path.join(tmp, ".git"))
+    os.makedirs(os.path.join(tmp, "rtl"))
+    os.makedirs(yml_dir)
+    with open(os.path.join(yml_dir, "bench.yml"), 'w') as file:
+      file.write(synthetic_spec("bench", 10))
+
+    # The first run generates the block and fills the caches, all of its files
+    # are in the temporary directory
+    proc = subprocess.run([sys.executable, pyrg, yml_dir], cwd = tmp, env = env, stdout = subprocess.PIPE,
+                          universal_newlines = True, check = True)
+    root      = os.path.realpath(tmp)
+    generated = [line.split("Generated ", 1)[1] for line in proc.stdout.splitlines() if "Generated " in line]
+    outside   = [path for path in generated if os.path.commonpath([root, os.path.realpath(path)]) != root]
+    if not len(generated) or len(outside):
+      raise Exception("The startup benchmark wrote files outside of %s: %s" % (tmp, ", ".join(outside)))
+
+    interpreter = timed([sys.executable, "-c", "pass"], tmp)
+    up_to_date  = timed([sys.executable, pyrg, yml_dir], tmp)
+
+  return {"interpreter": interpreter, "up_to_date": up_to_date, "overhead": up_to_date - interpreter}
+
+
+# ------------------------------------------------------------------------------
+# Reporting
+# ------------------------------------------------------------------------------
+
+def report(results):
+
+  print("%-9s %9s %9s %10s %10s %10s %11s %8s" % ("registers", "instances", "fields", "parse[ms]", "emit[ms]",
+                                                  "total[ms]", "output[kB]", "rss[MB]"))
+  for result in results["cases"].values():
+    parse = result["phases"]["parse"]["time"]
+    print("%-9d %9d %9d %10.1f %10.1f %10.1f %11.1f %8.1f" % (
+      result["registers"], result["instances"], result["fields"], 1e3*parse,
+      1e3*(result["total_time"] - parse - result["phases"]["parse_cached"]["time"]),
+      1e3*result["total_time"], result["output_bytes"]/1024, result["peak_rss_kb"]/1024))
+
+  print("")
+  print("%-9s %s" % ("registers", " ".join("%16s" % p for p in PHASES)))
+  for result in results["cases"].values():
+    print("%-9d %s" % (result["registers"], " ".join("%13.1f ms" % (1e3*result["phases"][p]["time"]) for p in PHASES)))
+
+  if "startup" in results:
+    startup = results["startup"]
+    print("")
+    print("Startup: %.1f ms for an up to date run, %.1f ms for the interpreter, %.1f ms overhead" % (
+      1e3*startup["up_to_date"], 1e3*startup["interpreter"], 1e3*startup["overhead"]))
+
+  print("")
+  print("YAML loader: %s" % results["yaml_loader"])
+  for result in results["cases"].values():
+    print("%-9d parse from cache is %.1fx faster than parsing" % (result["registers"], result["parse_speedup"]))
+
+
+def compare(results, baseline, tolerance, noise):
+
+  # A phase has regressed if it is slower than the baseline by more than the
+  # tolerance, and by more than the noise floor
+  regressions = []
+  for (size, result) in results["cases"].items():
+    if size not in baseline["cases"]:
+      continue
+    for p in PHASES:
+      now  = result["phases"][p]["time"]
+      then = baseline["cases"][size]["phases"][p]["time"]
+      if now > then * (1 + tolerance) and now - then > noise:
+        regressions.append("%s registers, %s: %.1f ms -> %.1f ms (%+.0f%%)" % (size, p, 1e3*then, 1e3*now, 100*(now/then - 1)))
+    if result["output_bytes"] != baseline["cases"][size]["output_bytes"]:
+      print("INFO [bench] %s registers: output changed from %d to %d bytes" % (size, baseline["cases"][size]["output_bytes"], result["output_bytes"]))
+
+  return regressions
+
+
+if __name__ == '__main__':
+
+  parser = argparse.ArgumentParser(description = "Benchmarks PYRG on synthetic register maps")
+  parser.add_argument("--sizes", default = DEFAULT_SIZES,
+                      help = "Comma separated number of registers (default: %s)" % DEFAULT_SIZES)
+  parser.add_argument("--memories", type = int, default = 3, help = "Number of memories (default: 3)")
+  parser.add_argument("--repeat", type = int, default = 8, help = "Length of the register arrays (default: 8)")
+  parser.add_argument("--repeats", type = int, default = 3,
+                      help = "Runs per phase, the fastest is reported (default: 3)")
+  parser.add_argument("--output", help = "Save the results as JSON")
+  parser.add_argument("--baseline", help = "Compare against the results in this JSON file")
+  parser.add_argument("--tolerance", type = float, default = 0.25,
+                      help = "Allowed slowdown against the baseline (default: 0.25)")
+  parser.add_argument("--noise", type = float, default = 0.005,
+                      help = "Slowdowns below this many seconds are ignored (default: 0.005)")
+  parser.add_argument("--startup-budget", type = float, default = STARTUP_BUDGET_MS, metavar = "MS",
+                      help = "Allowed startup overhead of an up to date run (default: %d ms)" % STARTUP_BUDGET_MS)
+  parser.add_argument("--no-startup", action = "store_true",
+                      help = "Do not measure the startup time")
+  parser.add_argument("--spec", type = int, metavar = "N",
+                      help = "Print a synthetic YAML file with N registers and exit")
+  parser.add_argument("--run-case", help = argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+  if args.run_case:
+    json.dump(run_case(*json.loads(args.run_case)), sys.stdout)
+    sys.exit(0)
+
+  if args.spec is not None:
+    sys.stdout.write(synthetic_spec("synthetic", args.spec, args.memories, args.repeat))
+    sys.exit(0)
+
+  import yaml
+  results = {
+    "python":      platform.python_version(),
+    "yaml_loader": "libyaml" if hasattr(yaml, "CSafeLoader") else "python",
+    "cases":       {}
+  }
+
+  for size in [int(s) for s in args.sizes.split(",")]:
+    results["cases"][str(size)] = run_isolated(size, args.memories, args.repeat, args.repeats)
+
+  if not args.no_startup:
+    results["startup"] = run_startup(max(args.repeats, 10))
+
+  report(results)
+
+  if args.output:
+    with open(args.output, 'w') as file:
+      json.dump(results, file, indent = 2)
+
+  failed = False
+
+  if "startup" in results and 1e3*results["startup"]["overhead"] > args.startup_budget:
+    print("ERROR [bench] Startup overhead of %.1f ms is over the budget of %.1f ms" % (
+      1e3*results["startup"]["overhead"], args.startup_budget))
+    failed = True
+
+  if args.baseline:
+    with open(args.baseline, 'r') as file:
+      regressions = compare(results, json.load(file), args.tolerance, args.noise)
+    for r in regressions:
+      print("ERROR [bench] Regression: %s" % r)
+    if len(regressions):
+      failed = True
+    else:
+      print("INFO [bench] No regressions against %s" % args.baseline)
+
+  if failed:
+    sys.exit(1)
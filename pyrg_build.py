@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: The build manifest used for incremental builds. For every
+## block it records a hash of its inputs and the files it produced, so that a
+## block whose inputs are unchanged and whose outputs still exist is skipped.
+##
+################################################################################
+
+import os, glob, json, hashlib
+
+MANIFEST_NAME    = ".pyrg_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_hash(path):
+
+  with open(path, 'rb') as file:
+    return hashlib.sha256(file.read()).hexdigest()
+
+
+def _files_hash(paths):
+
+  sha = hashlib.sha256()
+  for path in sorted(paths):
+    sha.update(os.path.basename(path).encode('utf-8'))
+    sha.update(file_hash(path).encode('utf-8'))
+  return sha.hexdigest()
+
+
+def templates_hash():
+
+  this_path = os.path.dirname(os.path.abspath(__file__))
+  return _files_hash(glob.glob(this_path + "/templates/*"))
+
+
+def generator_hash():
+
+  # The generator version is the hash of its own sources, i.e., any change of
+  # the generator invalidates all blocks
+  this_path = os.path.dirname(os.path.abspath(__file__))
+  return _files_hash(glob.glob(this_path + "/pyrg*.py"))
+
+
+def find_git_root(path = "."):
+
+  # The first directory from path and upwards with a .git entry, which is a
+  # directory in a repository and a file in a worktree or a submodule
+  path = os.path.abspath(path)
+  while True:
+    if os.path.exists(os.path.join(path, ".git")):
+      return path
+    parent = os.path.dirname(path)
+    if parent == path:
+      return None
+    path = parent
+
+
+class Manifest:
+
+  def __init__(self, path):
+
+    self.path   = path
+    self.blocks = {}
+
+    # A missing or unreadable manifest just means that everything is rebuilt
+    try:
+      with open(path, 'r') as file:
+        manifest = json.load(file)
+      if manifest.get("version", None) == MANIFEST_VERSION:
+        self.blocks = manifest["blocks"]
+    except (OSError, ValueError, KeyError):
+      pass
+
+    # Hashed once per run, they are the same for all blocks
+    self.refresh()
+
+
+  def refresh(self):
+
+    # Called by a process which keeps running when the templates changed
+    self.templates = templates_hash()
+    self.generator = generator_hash()
+
+
+  def key(self, yml, git_root, options = None):
+
+    return {
+      "yaml":      file_hash(yml),
+      "templates": self.templates,
+      "generator": self.generator,
+      "git_root":  git_root,
+      "options":   options or {}
+    }
+
+
+  def up_to_date(self, yml, key):
+
+    entry = self.blocks.get(os.path.abspath(yml), None)
+    if entry is None or entry["key"] != key:
+      return False
+
+    return all(os.path.exists(output) for output in entry["outputs"])
+
+
+  def update(self, yml, key, outputs):
+    self.blocks[os.path.abspath(yml)] = {"key": key, "outputs": outputs}
+
+
+  def remove(self, yml):
+    self.blocks.pop(os.path.abspath(yml), None)
+
+
+  def save(self):
+
+    # Written to a temporary file first so an interrupted run never leaves a
+    # truncated manifest behind
+    tmp_path = self.path + ".tmp"
+    with open(tmp_path, 'w') as file:
+      json.dump({"version": MANIFEST_VERSION, "blocks": self.blocks}, file, indent = 2, sort_keys = True)
+    os.replace(tmp_path, self.path)
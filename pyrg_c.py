@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: Generates a C driver of a block, a header with static inline
+## accessors of the registers and their fields, and a source with the reset
+## values. The driver keeps a shadow copy of the writable registers, so writing
+## a field does not read the hardware, and the dirty registers are written to
+## the hardware in address order by a flush.
+##
+################################################################################
+
+import pyrg_model
+import pyrg_template
+import pyrg_output
+import pyrg_profile
+
+
+def generate_c_driver(block, git_root, writer = None):
+
+  # The emitter can be called with a path to a YAML file or a parsed block
+  if isinstance(block, str):
+    block = pyrg_model.load_block(block)
+
+  # Nothing is written for a bus which is not a C integer
+  _word(block)
+
+  header  = pyrg_template.load_text("header.txt")
+  sw_path = block.sw_path.replace("$GIT_ROOT", git_root or "")
+  writer  = writer or pyrg_output.Writer()
+  writer.makedirs(sw_path)
+
+  writer.write(sw_path + '/' + block.name + "_driver.h", pyrg_profile.section("c_driver", emit_c_driver_header(block, header)))
+  writer.write(sw_path + '/' + block.name + "_driver.c", pyrg_profile.section("c_driver", emit_c_driver_source(block, header)))
+
+
+# ------------------------------------------------------------------------------
+# Registers and fields
+# ------------------------------------------------------------------------------
+
+def _word(block):
+
+  # The registers are accessed as one integer of the bus width
+  if block.bus_width not in [8, 16, 32, 64]:
+    raise Exception("%s: the C driver needs a bus width of 8, 16, 32 or 64 bits, not %s" % (
+      block.name, block.bus_width))
+  return "uint%d_t" % (block.bus_width)
+
+
+def _cached(reg):
+
+  # Command registers pulse when they are written, they are written to the
+  # hardware directly and never flushed
+  return reg.access in ["WO", "RW"] and not any(field.type in ["CMD"] for field in reg.fields)
+
+
+def _known(field):
+
+  # The position of a field whose size is a parameter is not known in C
+  return isinstance(field.size, int) and isinstance(field.lsb_pos, int)
+
+
+def _mask(block, field):
+
+  if isinstance(field.size, int):
+    return ((1 << field.size) - 1) << field.lsb_pos
+  # A field with a parameter as size is assumed to fill the rest of the register
+  return ((1 << block.bus_width) - 1) & ~((1 << field.lsb_pos) - 1)
+
+
+def _register_reset(block, reg):
+
+  value = 0
+  for field in reg.fields:
+    if isinstance(field.lsb_pos, int):
+      value |= (pyrg_model.reset_integer(field) << field.lsb_pos) & _mask(block, field)
+  return value
+
+
+# ------------------------------------------------------------------------------
+# The header
+# ------------------------------------------------------------------------------
+
+def emit_c_driver_header(block, header):
+
+  name   = block.name
+  upper  = block.name.upper()
+  word   = _word(block)
+  digits = block.bus_width // 4
+  suffix = "ull" if block.bus_width > 32 else "u"
+  driver = name + "_driver_t"
+
+  def _hex(value):
+    return "0x%0*x%s" % (digits, value, suffix)
+
+  def _index(reg):
+    return upper + "_" + reg.name.upper() + "_INDEX" + (" + i" if reg.repeat > 1 else "")
+
+  yield header
+  yield "#ifndef %s_DRIVER_H\n" % (upper)
+  yield "#define %s_DRIVER_H\n" % (upper)
+  yield "\n"
+  yield "#include <stdint.h>\n"
+  yield "\n"
+
+  # The index of a register is its address offset in bus words, repeated
+  # registers are indexed from their first instance
+  _indexes = [("%s_N_REGISTERS" % (upper), block.high_address // block.bus_bytes)]
+  _indexes += [("%s_%s_INDEX" % (upper, reg.name.upper()), reg.address // block.bus_bytes) for reg in block.registers]
+  longest  = max(len(_name) for (_name, _) in _indexes)
+  for (_name, _value) in _indexes:
+    yield "#define %s %d\n" % (_name.ljust(longest, " "), _value)
+
+  yield "\n"
+  yield "// The writes of registers and fields only update the shadow copy, the dirty\n"
+  yield "// registers are written to the hardware by %s_flush()\n" % (name)
+  yield "typedef struct {\n"
+  yield "  volatile %s *base;\n" % (word)
+  yield "  %s           shadow[%s_N_REGISTERS];\n" % (word, upper)
+  yield "  uint8_t            dirty[%s_N_REGISTERS];\n" % (upper)
+  yield "} %s;\n" % (driver)
+  yield "\n"
+  yield "void %s_init(%s *drv, volatile void *base);\n" % (name, driver)
+  yield "void %s_flush(%s *drv);\n" % (name, driver)
+
+  for reg in block.registers:
+
+    _i    = ", unsigned i" if reg.repeat > 1 else ""
+    _ii   = ", i" if reg.repeat > 1 else ""
+    _read = reg.access in ["RO", "RW", "RC", "ROM"] or _cached(reg)
+
+    yield "\n"
+    yield "// " + "-"*77 + "\n"
+    yield "// %s: %s\n" % (reg.name, reg.desc)
+    yield "// " + "-"*77 + "\n"
+    yield "\n"
+
+    # Fields of a register value
+    for field in reg.fields:
+      if not _known(field):
+        yield "// The size of %s is a parameter (%s), use the register accessors\n\n" % (field.name, field.size)
+        continue
+      _m = _hex(_mask(block, field))
+      yield "static inline %s %s_%s_extract(%s reg) { return (reg & %s) >> %d; }\n" % (word, name, field.name, word, _m, field.lsb_pos)
+      yield "static inline %s %s_%s_insert(%s reg, %s value) { return (reg & ~%s) | ((value << %d) & %s); }\n\n" % (word, name, field.name, word, word, _m, field.lsb_pos, _m)
+
+    # The register, cached registers are read from the shadow copy
+    if _cached(reg):
+      yield "static inline %s %s_read_%s(const %s *drv%s) { return drv->shadow[%s]; }\n" % (word, name, reg.name, driver, _i, _index(reg))
+      yield "static inline void %s_write_%s(%s *drv%s, %s value)\n" % (name, reg.name, driver, _i, word)
+      yield "{\n"
+      yield "  drv->shadow[%s] = value;\n" % (_index(reg))
+      yield "  drv->dirty[%s]  = 1;\n" % (_index(reg))
+      yield "}\n"
+    else:
+      if _read:
+        yield "static inline %s %s_read_%s(const %s *drv%s) { return drv->base[%s]; }\n" % (word, name, reg.name, driver, _i, _index(reg))
+      if reg.access in ["WO", "RW"]:
+        yield "static inline void %s_write_%s(%s *drv%s, %s value) { drv->base[%s] = value; }\n" % (name, reg.name, driver, _i, word, _index(reg))
+
+    # Its fields, a field of a register which is not cached is written alone
+    for field in filter(_known, reg.fields):
+      _f = name + "_" + field.name
+      if _read:
+        yield "static inline %s %s_get_%s(const %s *drv%s) { return %s_extract(%s_read_%s(drv%s)); }\n" % (word, name, field.name, driver, _i, _f, name, reg.name, _ii)
+      if _cached(reg):
+        yield "static inline void %s_set_%s(%s *drv%s, %s value) { %s_write_%s(drv%s, %s_insert(%s_read_%s(drv%s), value)); }\n" % (
+          name, field.name, driver, _i, word, name, reg.name, _ii, _f, name, reg.name, _ii)
+      elif reg.access in ["WO", "RW"]:
+        yield "static inline void %s_set_%s(%s *drv%s, %s value) { %s_write_%s(drv%s, %s_insert(0, value)); }\n" % (
+          name, field.name, driver, _i, word, name, reg.name, _ii, _f)
+
+  yield "\n#endif\n"
+
+
+# ------------------------------------------------------------------------------
+# The source
+# ------------------------------------------------------------------------------
+
+def emit_c_driver_source(block, header):
+
+  name   = block.name
+  upper  = block.name.upper()
+  word   = _word(block)
+  digits = block.bus_width // 4
+  suffix = "ull" if block.bus_width > 32 else "u"
+  driver = name + "_driver_t"
+
+  # Every bus word in address order, the registers which are not cached, and
+  # the words without a register, are zero in the shadow copy, it is never read
+  _instances = [("", None)] * (block.high_address // block.bus_bytes)
+  for reg in block.registers:
+    for (i, _ri) in enumerate(reg.suffixes):
+      _instances[reg.address // block.bus_bytes + i] = (reg.name + _ri, reg)
+
+  yield header
+  yield "#include \"%s_driver.h\"\n" % (name)
+  yield "\n"
+  yield "static const %s %s_reset[%s_N_REGISTERS] = {\n" % (word, name, upper)
+  for (_name, reg) in _instances:
+    _value = _register_reset(block, reg) if reg is not None and _cached(reg) else 0
+    yield "  0x%0*x%s, // %s\n" % (digits, _value, suffix, _name or "-")
+  yield "};\n"
+  yield "\n"
+  yield "static const uint8_t %s_cached[%s_N_REGISTERS] = {\n" % (name, upper)
+  for (_name, reg) in _instances:
+    yield "  %d, // %s\n" % (int(reg is not None and _cached(reg)), _name or "-")
+  yield "};\n"
+  yield "\n"
+  yield "void %s_init(%s *drv, volatile void *base)\n" % (name, driver)
+  yield "{\n"
+  yield "  drv->base = (volatile %s *)base;\n" % (word)
+  yield "  for (unsigned i = 0; i < %s_N_REGISTERS; i++) {\n" % (upper)
+  yield "    drv->shadow[i] = %s_reset[i];\n" % (name)
+  yield "    drv->dirty[i]  = 0;\n"
+  yield "  }\n"
+  yield "}\n"
+  yield "\n"
+  yield "// The dirty registers are written in address order. The clean cached\n"
+  yield "// registers between them are written as well, which does not change them,\n"
+  yield "// so the writes are one burst unless a register which is not cached is in\n"
+  yield "// between.\n"
+  yield "void %s_flush(%s *drv)\n" % (name, driver)
+  yield "{\n"
+  yield "  unsigned first = %s_N_REGISTERS;\n" % (upper)
+  yield "  unsigned last  = 0;\n"
+  yield "\n"
+  yield "  for (unsigned i = 0; i < %s_N_REGISTERS; i++) {\n" % (upper)
+  yield "    if (drv->dirty[i]) {\n"
+  yield "      first = (first == %s_N_REGISTERS) ? i : first;\n" % (upper)
+  yield "      last  = i;\n"
+  yield "    }\n"
+  yield "  }\n"
+  yield "\n"
+  yield "  for (unsigned i = first; i <= last && first < %s_N_REGISTERS; i++) {\n" % (upper)
+  yield "    if (%s_cached[i]) {\n" % (name)
+  yield "      drv->base[i]  = drv->shadow[i];\n"
+  yield "      drv->dirty[i] = 0;\n"
+  yield "    }\n"
+  yield "  }\n"
+  yield "}\n"
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: Checks a parsed block for errors which the emitters do not
+## detect, but which the simulator or synthesis tool would, e.g., overlapping
+## fields, fields wider than the bus and reset values which do not fit. The bits
+## of every register are checked with integer bit masks.
+##
+################################################################################
+
+import pyrg_model
+
+ERROR   = "ERROR"
+WARNING = "WARNING"
+
+ACCESS      = ["WO", "RW", "RO", "RC", "ROM"]
+FIELD_TYPES = ["CR", "CMD", "SR", "IRQ", "ROM"]
+
+
+def check_block(block):
+
+  # Returns the problems as (level, location, message)
+  problems = []
+
+  def report(level, location, message):
+    problems.append((level, location, message))
+
+  # Every register instance and field is a name in the generated files
+  names = {}
+  for reg in block.registers:
+    for _ri in reg.suffixes:
+      _check_name(names, reg.name + _ri, "register " + reg.name, report)
+  for mem in block.memories:
+    _check_name(names, mem.name, "memory " + mem.name, report)
+
+  fields = {}
+  for reg in block.registers:
+    for field in reg.fields:
+      _check_name(fields, field.name, "register %s, field %s" % (reg.name, field.name), report)
+
+  for reg in block.registers:
+    _check_register(block, reg, report)
+
+  for mem in block.memories:
+    _check_memory(block, mem, report)
+
+  return problems
+
+
+def _check_name(names, name, location, report):
+
+  if name in names:
+    report(ERROR, location, "the name %s is also used by %s" % (name, names[name]))
+  else:
+    names[name] = location
+
+
+def _check_register(block, reg, report):
+
+  location = "register " + reg.name
+
+  if reg.access not in ACCESS:
+    report(ERROR, location, "unknown access %s, expected one of %s" % (reg.access, ", ".join(ACCESS)))
+  if reg.repeat < 1:
+    report(ERROR, location, "the repeat must be a positive integer, not %s" % (reg.repeat))
+  if not len(reg.fields):
+    report(ERROR, location, "the register has no fields")
+
+  # The bits of the fields so far, and the bits of every field
+  used   = 0
+  owners = []
+  packed = 0 # The position of the field in the AXI slave, where the fields of
+             # a register are concatenated in order
+
+  for field in reg.fields:
+
+    _location = "%s, field %s" % (location, field.name)
+
+    if field.type not in FIELD_TYPES:
+      report(WARNING, _location, "the name has no known type prefix (%s), the field is not a port of the AXI slave" % (
+        ", ".join(t.lower() + "_" for t in FIELD_TYPES)))
+
+    if not isinstance(field.lsb_pos, int) or field.lsb_pos < 0:
+      report(ERROR, _location, "the lsb position must be a non negative integer, not %s" % (field.lsb_pos))
+      packed = None
+      continue
+
+    # The bits of a field whose size is a parameter are not known
+    if not isinstance(field.size, int):
+      if packed is not None and len(reg.fields) > 1 and field.lsb_pos != packed:
+        report(ERROR, _location, "the lsb position is %d but the field is at bit %d in the AXI slave" % (field.lsb_pos, packed))
+      packed = None
+      continue
+
+    if field.size < 1:
+      report(ERROR, _location, "the size must be at least 1, not %d" % (field.size))
+      packed = None
+      continue
+
+    msb  = field.lsb_pos + field.size - 1
+    mask = ((1 << field.size) - 1) << field.lsb_pos
+
+    if msb >= block.bus_width:
+      report(ERROR, _location, "bits %d..%d do not fit in the %d bit bus" % (msb, field.lsb_pos, block.bus_width))
+
+    if used & mask:
+      for (_name, _mask) in owners:
+        if _mask & mask:
+          _bits = _mask & mask
+          report(ERROR, _location, "bits %d..%d overlap field %s" % (_bits.bit_length() - 1, _lowest(_bits), _name))
+    used |= mask
+    owners.append((field.name, mask))
+
+    # A register with several fields is written and read as the concatenation
+    # of its fields, i.e., they must follow each other from bit 0, and a single
+    # field of more than one bit is at bit 0
+    if len(reg.fields) > 1:
+      expected = packed
+    else:
+      expected = field.lsb_pos if field.size == 1 else 0
+    if expected is not None and field.lsb_pos != expected:
+      report(ERROR, _location, "the lsb position is %d but the field is at bit %d in the AXI slave" % (field.lsb_pos, expected))
+    packed = packed + field.size if packed is not None else None
+
+    if field.has_reset:
+      try:
+        value = pyrg_model.reset_integer(field)
+      except ValueError:
+        report(ERROR, _location, "the reset value %s is not an integer or a SystemVerilog literal" % (field.reset_value))
+        continue
+      if value != -1 and not 0 <= value < (1 << field.size):
+        report(ERROR, _location, "the reset value %s does not fit in %d bits" % (field.reset_value, field.size))
+
+
+def _lowest(bits):
+  return (bits & -bits).bit_length() - 1
+
+
+def _check_memory(block, mem, report):
+
+  location = "memory " + mem.name
+
+  try:
+    pyrg_model.check_memory(mem)
+  except Exception as e:
+    report(ERROR, location, str(e))
+
+  if not isinstance(mem.size, int) or mem.size < 1:
+    report(ERROR, location, "the size must be a positive integer, not %s" % (mem.size))
+  if not isinstance(mem.width, int) or not 1 <= mem.width <= block.bus_width:
+    report(ERROR, location, "the width must be 1 to %d bits, not %s" % (block.bus_width, mem.width))
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: The register model which all emitters are generated from. A
+## YAML file is parsed once into a block of registers, fields and memories with
+## their sizes, repeats and addresses already derived.
+##
+## Parsing uses the C implementation of the YAML loader when it is available.
+## Parsed blocks can also be cached on disk, an unchanged YAML file is then
+## loaded from a pickled snapshot of its block instead of being parsed again.
+##
+################################################################################
+
+import os, re, gc, math, hashlib
+
+CACHE_NAME = ".pyrg_cache"
+
+# ------------------------------------------------------------------------------
+# Model classes
+# ------------------------------------------------------------------------------
+
+class Field:
+
+  __slots__ = ("name", "description", "size", "lsb_pos", "reset_value", "has_reset", "type")
+
+  def __init__(self, entries):
+
+    self.name        = entries['name']
+    self.description = entries['description']
+    self.size        = entries['size']    # An integer, or a string if it is a parameter
+    self.lsb_pos     = entries['lsb_pos']
+    self.has_reset   = "reset_value" in entries.keys()
+    self.reset_value = entries['reset_value'] if self.has_reset else None
+
+    # Fields have names, e.g., prefix_block_register, where the prefix is the type
+    self.type = self.name.split("_")[0].upper()
+
+
+class Register:
+
+  __slots__ = ("name", "access", "desc", "repeat", "fields", "width", "address", "suffixes")
+
+  def __init__(self, entries, location):
+
+    self.name   = entries['name']
+    self.access = entries['access']
+    self.desc   = entries['desc']
+    self.fields = [_entry("%s, field %s" % (location, _name(f['field'], i)), Field, f['field'])
+                   for (i, f) in enumerate(entries['bit_fields'])]
+
+    if ("repeat" in entries.keys()):
+      self.repeat = entries["repeat"]
+    else:
+      self.repeat = 1
+
+    if not isinstance(self.repeat, int):
+      raise TypeError("the repeat must be an integer, not %r" % (self.repeat))
+
+    # Registers can be repeated with the same name but different numeric suffix
+    if self.repeat > 1:
+      self.suffixes = tuple("_%d" % i for i in range(self.repeat))
+    else:
+      self.suffixes = ("",)
+
+    # The width is only known if no field size is a parameter
+    if all(isinstance(f.size, int) for f in self.fields):
+      self.width = sum(f.size for f in self.fields)
+    else:
+      self.width = None
+
+    # Address of the first instance, fixed in the YAML file or set by the block
+    self.address = entries.get('address', None)
+
+
+class Memory:
+
+  __slots__ = ("name", "access", "size", "width", "read_latency", "hdl_path", "base_address", "high_address")
+
+  def __init__(self, entries):
+
+    self.name   = entries['name']
+    self.access = entries['access']
+    self.size   = entries['size']
+    self.width  = entries['width']
+
+    # Clock cycles from the read enable of a readable memory to its read data
+    self.read_latency = entries.get('read_latency', 1)
+
+    # The RAM array of the memory in the HDL, relative to the block, if known
+    self.hdl_path = entries.get('hdl_path', None)
+
+    self.base_address = entries.get('address', None) # Fixed, or set by the block
+    self.high_address = None
+
+
+class Block:
+
+  __slots__ = ("name", "yaml_path", "bus_width", "bus_bytes", "addr_width", "rtl_path", "uvm_path", "sw_path",
+               "hdl_path", "parameters", "registers", "memories", "n_instances", "high_address")
+
+  def __init__(self, name, entries, yaml_path = None):
+
+    self.name       = name
+    self.yaml_path  = yaml_path
+    self.bus_width  = entries['bus_width']
+    self.bus_bytes  = int(self.bus_width/8)
+    self.addr_width = entries.get('addr_width', 16)
+    self.rtl_path   = entries['rtl_path']
+    self.uvm_path   = entries['uvm_path']
+    self.sw_path    = entries['sw_path']
+    self.hdl_path   = entries.get('hdl_path', None) # The AXI slave in the HDL
+    self.parameters = list(entries.get('parameters', None) or [])
+    self.registers  = []
+    self.memories   = [_entry("block %s, memory %s" % (name, _name(m, i)), Memory, m)
+                       for (i, m) in enumerate(entries.get('memories', None) or [])]
+
+    for (i, r) in enumerate(entries['registers']):
+      _location = "block %s, register %s" % (name, _name(r, i))
+      self.registers.append(_entry(_location, Register, r, _location))
+
+    # --------------------------------------------------------------------------
+    # Addresses
+    # --------------------------------------------------------------------------
+
+    # Every register instance, i.e., including repeats, occupies one bus word
+    # and the instances of a register are consecutive
+    regions = [(reg, "register " + reg.name, reg.address, reg.repeat * self.bus_bytes, self.bus_bytes)
+               for reg in self.registers]
+
+    # Memories are placed after the registers, aligned to their size, because
+    # the address field of the interface is used as the memory address. The
+    # first '1' in the address must begin after:
+    # - bus_bytes_log2: Because we are using the address as a counter, the lower
+    #   bits increase by (AXI_DATA_WIDTH_P/8) in the slave
+    # - mem_size_log2: Because these bits will have the counting value
+    # The largest memories are placed first, so the others are aligned without
+    # any space between them.
+    bus_bytes_log2 = int(math.ceil(math.log2(self.bus_bytes)))
+    for mem in sorted(self.memories, key = lambda mem: -mem.size):
+      align = 2**(int(math.ceil(math.log2(mem.size))) + bus_bytes_log2)
+      regions.append((mem, "memory " + mem.name, mem.base_address, mem.size * self.bus_bytes, align))
+
+    addresses = AddressAllocator(self.addr_width).allocate(regions)
+
+    for reg in self.registers:
+      reg.address = addresses[id(reg)]
+    for mem in self.memories:
+      mem.base_address = addresses[id(mem)]
+      mem.high_address = mem.base_address + mem.size * self.bus_bytes
+
+    # The AXI slave decodes a memory up to its high address, i.e., the first
+    # address after it, so it must be an address in the address space
+    _errors = ["The high address 0x%x of memory %s, the first address after it, must be below 0x%x" % (
+      mem.high_address, mem.name, 2**self.addr_width) for mem in self.memories if mem.high_address >= 2**self.addr_width]
+    if len(_errors):
+      raise Exception("\n".join(_errors))
+
+    self.n_instances  = sum(reg.repeat for reg in self.registers)
+    self.high_address = max((reg.address + reg.repeat * self.bus_bytes for reg in self.registers), default = 0)
+
+
+def _entry(location, build, *args):
+
+  # The model is built before the YAML file is checked, so a missing key or a
+  # value of the wrong type is reported with the entry it is in
+  try:
+    return build(*args)
+  except KeyError as e:
+    raise Exception("%s: the key %s is missing" % (location, e)) from None
+  except TypeError as e:
+    raise Exception("%s: %s" % (location, e)) from None
+
+
+def _name(entries, index):
+
+  # The name of an entry, or its index if it has none
+  if isinstance(entries, dict) and "name" in entries:
+    return entries["name"]
+  return "#%d" % (index)
+
+
+class AddressAllocator:
+
+  # Places regions in an address space, either at their fixed address or, in
+  # order, at the first aligned address after the previous region which does
+  # not overlap a fixed region. The fixed regions are sorted once and passed in
+  # order, so placing n regions takes O(n log n).
+
+  def __init__(self, addr_width):
+
+    self.addr_width = addr_width
+
+
+  def allocate(self, regions):
+
+    # The regions are (key, description, fixed address or None, size, align),
+    # returns the address of every key as {id(key): address}
+    errors = []
+    fixed  = sorted((address, address + size, name) for (_, name, address, size, align) in regions if address is not None)
+
+    for (_, name, address, size, align) in regions:
+      if address is not None and address % align:
+        errors.append("The address 0x%x of %s is not aligned to 0x%x" % (address, name, align))
+
+    # A region overlaps the one of the regions before it which ends last
+    last = None
+    for region in fixed:
+      if last is not None and region[0] < last[1]:
+        errors.append("%s at 0x%x overlaps %s at 0x%x" % (region[2].capitalize(), region[0], last[2], last[0]))
+      if last is None or region[1] > last[1]:
+        last = region
+
+    addresses = {}
+    cursor    = 0
+    following = 0 # The first fixed region which may end after the cursor
+    for (key, name, address, size, align) in regions:
+
+      if address is None:
+        address = _align(cursor, align)
+        while following < len(fixed) and fixed[following][0] < address + size:
+          if fixed[following][1] > address:
+            address = _align(fixed[following][1], align)
+          following += 1
+        cursor = address + size
+
+      if address + size > 2**self.addr_width:
+        errors.append("%s at 0x%x ends at 0x%x, past the %d bit address space" % (
+          name.capitalize(), address, address + size, self.addr_width))
+
+      addresses[id(key)] = address
+
+    if len(errors):
+      raise Exception("\n".join(errors))
+    return addresses
+
+
+def _align(address, align):
+  return -(-address // align) * align
+
+
+def reset_integer(field):
+
+  # The reset value of a field as an integer, '1 is -1, i.e., all ones. Reset
+  # values are integers or SystemVerilog literals, e.g., 32'hCAFE0001.
+  if not field.has_reset:
+    return 0
+  if isinstance(field.reset_value, int):
+    return field.reset_value
+
+  value = str(field.reset_value).strip()
+  if (value == "'0"):
+    return 0
+  if (value == "'1"):
+    return -1
+  match = re.fullmatch(r"(\d*)\s*'[sS]?([hHdDoObB])\s*([0-9a-fA-F_]+)", value)
+  if not match:
+    raise ValueError("Unsupported reset value of field %s: %s" % (field.name, value))
+  return int(match.group(3).replace("_", ""), {"h": 16, "d": 10, "o": 8, "b": 2}[match.group(2).lower()])
+
+
+def field_positions(reg):
+
+  # The lsb position of every field of a register in the AXI slave as (field,
+  # position). The fields of a register with several fields are concatenated
+  # from bit 0, the position of a field after one whose size is a parameter is
+  # None. A single field is at bit 0, unless it is one bit or its size is a
+  # parameter, then it is at its lsb position.
+  if len(reg.fields) == 1:
+    field = reg.fields[0]
+    yield (field, field.lsb_pos if isinstance(field.size, str) or field.size == 1 else 0)
+    return
+
+  position = 0
+  for field in reg.fields:
+    yield (field, position)
+    position = position + field.size if isinstance(position, int) and isinstance(field.size, int) else None
+
+
+def check_memory(mem):
+
+  if (mem.access not in ["RW", "RO", "WO"]):
+    raise Exception("Unknown access of memory %s: %s" % (mem.name, mem.access))
+  if (mem.access in ["RW", "RO"] and mem.read_latency < 1):
+    raise Exception("The read latency of memory %s must be at least 1" % (mem.name))
+
+
+def check_memories(block):
+
+  for mem in block.memories:
+    check_memory(mem)
+
+
+# ------------------------------------------------------------------------------
+# Loading
+# ------------------------------------------------------------------------------
+
+def block_from_dict(spec, yaml_file_path = None):
+
+  # The block is the first (and only) top level entry, e.g., {"name": {...}}
+  top_name, yml_entries = list(spec.items())[0]
+  try:
+    return Block(top_name, yml_entries, yaml_file_path)
+  except KeyError as e:
+    raise Exception("block %s: the key %s is missing" % (top_name, e)) from None
+
+
+def parse_block(text, yaml_file_path = None):
+
+  # Building the model allocates many small objects but no reference cycles,
+  # the cyclic garbage collector would only rescan them over and over again
+  gc_enabled = gc.isenabled()
+  gc.disable()
+  try:
+    (yaml, loader) = _yaml()
+    return block_from_dict(yaml.load(text, Loader = loader), yaml_file_path)
+  finally:
+    if gc_enabled:
+      gc.enable()
+
+
+def _yaml():
+
+  # PyYAML is only imported when a file is parsed, blocks loaded from their
+  # snapshots do not need it. The C (libyaml) loader is many times faster than
+  # the pure Python loader.
+  import yaml
+  return (yaml, getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+def load_block(yaml_file_path, cache_dir = None, memory = None):
+
+  # The parsed blocks are cached on disk if a cache directory is given, and in
+  # memory if a dictionary is given, e.g., by a process which keeps running
+  with open(yaml_file_path, 'rb') as file:
+    text = file.read()
+
+  if cache_dir is None and memory is None:
+    return parse_block(text, yaml_file_path)
+
+  # A cached block is only used if it was made from the same file with the same
+  # contents, and by the same version of this model
+  stat = os.stat(yaml_file_path)
+  key  = (os.path.abspath(yaml_file_path), stat.st_size, stat.st_mtime_ns,
+          hashlib.sha256(text).hexdigest(), _model_version())
+
+  if memory is not None and key[0] in memory and memory[key[0]][0] == key:
+    return memory[key[0]][1]
+
+  block = None
+  if cache_dir is not None:
+    block = _load_snapshot(cache_dir, key)
+
+  if block is None:
+    block = parse_block(text, yaml_file_path)
+    if cache_dir is not None:
+      _save_snapshot(cache_dir, key, block)
+
+  if memory is not None:
+    memory[key[0]] = (key, block)
+
+  return block
+
+
+def _snapshot_path(cache_dir, key):
+  return os.path.join(cache_dir, hashlib.sha256(key[0].encode('utf-8')).hexdigest() + ".pickle")
+
+
+def _load_snapshot(cache_dir, key):
+
+  import pickle
+  try:
+    with open(_snapshot_path(cache_dir, key), 'rb') as file:
+      (cached_key, block) = pickle.load(file)
+    if cached_key == key:
+      return block
+  except Exception:
+    pass
+
+  return None
+
+
+def _save_snapshot(cache_dir, key, block):
+
+  # Written to a temporary file first, parallel workers may load the snapshot.
+  # A cache which cannot be written only costs the speedup of the next run.
+  import pickle
+  snapshot = _snapshot_path(cache_dir, key)
+  tmp_path = "%s.%d.tmp" % (snapshot, os.getpid())
+  try:
+    os.makedirs(cache_dir, exist_ok = True)
+    with open(tmp_path, 'wb') as file:
+      pickle.dump((key, block), file, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, snapshot)
+  except OSError:
+    pass
+
+
+_version = None
+
+def _model_version():
+
+  # The snapshots are invalid as soon as this file changes
+  global _version
+  if _version is None:
+    with open(os.path.abspath(__file__), 'rb') as file:
+      _version = hashlib.sha256(file.read()).hexdigest()
+  return _version
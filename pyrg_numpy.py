@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: Generates a Python module which decodes dumps of the registers
+## of a block with NumPy. A snapshot of the block is one record of a structured
+## dtype, laid out by the address map, and the fields of all snapshots are
+## extracted and inserted with array operations, i.e., without a Python loop
+## over the snapshots. Only the generated module needs NumPy.
+##
+################################################################################
+
+import pyrg_model
+import pyrg_template
+import pyrg_output
+import pyrg_profile
+
+
+def generate_numpy_decoder(block, git_root, writer = None):
+
+  # The emitter can be called with a path to a YAML file or a parsed block
+  if isinstance(block, str):
+    block = pyrg_model.load_block(block)
+
+  _word(block)
+
+  header  = pyrg_template.load_text("header.txt")
+  sw_path = block.sw_path.replace("$GIT_ROOT", git_root or "")
+
+  output_file = sw_path + '/' + block.name + "_decoder.py"
+  writer = writer or pyrg_output.Writer()
+  writer.makedirs(sw_path)
+  writer.write(output_file, pyrg_profile.section("numpy_decoder", emit_numpy_decoder(block, header)))
+
+
+def _word(block):
+
+  # A register is one little endian unsigned NumPy integer of the bus width,
+  # and the fields are extracted as 64 bit integers
+  if block.bus_width not in [8, 16, 32, 64]:
+    raise Exception("%s: the NumPy decoder needs a bus width of 8, 16, 32 or 64 bits, not %s" % (
+      block.name, block.bus_width))
+  return "<u%d" % (block.bus_bytes)
+
+
+def _fields(block):
+
+  # Every field of every register instance as (name, register, lsb, size), at
+  # its position in the AXI slave. A field whose size is a parameter is assumed
+  # to fill the rest of the word, and a field whose position is not known is
+  # skipped.
+  for reg in block.registers:
+    for _ri in reg.suffixes:
+      for (field, _lsb) in pyrg_model.field_positions(reg):
+        if not isinstance(_lsb, int):
+          continue
+        _size = field.size if isinstance(field.size, int) else block.bus_width - _lsb
+        yield (field.name + _ri, reg.name + _ri, _lsb, _size)
+
+
+def _uint(size):
+
+  # The smallest unsigned type of a field
+  for bits in (8, 16, 32):
+    if size <= bits:
+      return "u%d" % (bits // 8)
+  return "u8"
+
+
+def _comment(line):
+
+  # A line of the C comment of the header as a Python comment
+  if (line.strip("/") == ""):
+    return "#"*len(line)
+  return "##" + line[2:]
+
+
+def emit_numpy_decoder(block, header):
+
+  word      = _word(block)
+  registers = [(reg.name + _ri, reg.address + i*block.bus_bytes) for reg in block.registers for (i, _ri) in enumerate(reg.suffixes)]
+  fields    = list(_fields(block))
+
+  # The header is a C comment
+  yield "".join(_comment(line) + "\n" for line in header.splitlines())
+  yield "\n"
+  yield "import numpy as np\n"
+  yield "\n"
+  yield "BLOCK     = \"%s\"\n" % (block.name)
+  yield "BUS_WIDTH = %d\n" % (block.bus_width)
+  yield "\n"
+
+  yield "# A snapshot is every register of the block, one little endian bus word per\n"
+  yield "# register at its address\n"
+  yield "DTYPE = np.dtype({\n"
+  yield "  \"names\":    [%s],\n" % (", ".join("\"%s\"" % (_name) for (_name, _) in registers))
+  yield "  \"formats\":  [%s],\n" % (", ".join("\"%s\"" % (word) for _ in registers))
+  yield "  \"offsets\":  [%s],\n" % (", ".join(str(_address) for (_, _address) in registers))
+  yield "  \"itemsize\": %d,\n" % (block.high_address)
+  yield "})\n"
+  yield "\n"
+
+  yield "# The register, lsb position and size of every field\n"
+  yield "FIELDS = {\n"
+  longest = max((len(_name) for (_name, _, _, _) in fields), default = 0) + 3
+  for (_name, _reg, _lsb, _size) in fields:
+    yield "  %s (\"%s\", %d, %d),\n" % (("\"%s\":" % (_name)).ljust(longest, " "), _reg, _lsb, _size)
+  yield "}\n"
+  yield "\n"
+
+  yield "# The decoded fields of a snapshot\n"
+  yield "FIELD_DTYPE = np.dtype([\n"
+  for (_name, _, _, _size) in fields:
+    yield "  (\"%s\", \"%s\"),\n" % (_name, _uint(_size))
+  yield "])\n"
+  yield "\n\n"
+
+  yield '''
+def _mask(size):
+  return np.uint64((1 << size) - 1)
+
+
+def load(path, offset = 0, mode = "r"):
+
+  # Memory maps a raw binary dump of consecutive snapshots
+  return np.memmap(path, dtype = DTYPE, mode = mode, offset = offset)
+
+
+def frombuffer(data, offset = 0):
+  return np.frombuffer(data, dtype = DTYPE, offset = offset)
+
+
+def extract(snapshots, field):
+
+  # The values of a field in all snapshots
+  (register, lsb, size) = FIELDS[field]
+  words = snapshots[register].astype(np.uint64, copy = False)
+  return ((words >> np.uint64(lsb)) & _mask(size)).astype(FIELD_DTYPE[field], copy = False)
+
+
+def insert(snapshots, field, values):
+
+  # Writes a field in all snapshots, values is a scalar or one value per
+  # snapshot
+  (register, lsb, size) = FIELDS[field]
+  mask   = _mask(size) << np.uint64(lsb)
+  words  = snapshots[register].astype(np.uint64)
+  values = np.asarray(values).astype(np.uint64)
+  snapshots[register] = (words & ~mask) | ((values << np.uint64(lsb)) & mask)
+
+
+def decode(snapshots, fields = None):
+
+  # All fields, or the given ones, of all snapshots as a structured array
+  names   = list(fields) if fields is not None else list(FIELDS)
+  decoded = np.empty(np.shape(snapshots), dtype = np.dtype([(name, FIELD_DTYPE[name]) for name in names]))
+  for name in names:
+    decoded[name] = extract(snapshots, name)
+  return decoded
+
+
+def encode(decoded, snapshots = None):
+
+  # The snapshots of decoded fields, the bits which are not in a field are
+  # kept from snapshots, or are zero
+  if snapshots is None:
+    snapshots = np.zeros(np.shape(decoded), dtype = DTYPE)
+  for name in decoded.dtype.names:
+    insert(snapshots, name, decoded[name])
+  return snapshots
+'''[1:]
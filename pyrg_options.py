@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: The options of the emitters. The defaults generate the same
+## files as earlier versions of PYRG. The options are part of the key of every
+## block in the build manifest, i.e., changing them regenerates all blocks.
+##
+################################################################################
+
+
+class Options:
+
+  __slots__ = ("uvm_reg_arrays", "axi_range_decode", "read_pipeline", "axi_overlap", "axi_wstrb",
+               "c_driver", "numpy_decoder", "uvm_hdl_root", "uvm_burst_seq",
+               "tlm_model")
+
+  def __init__(self, uvm_reg_arrays = False, axi_range_decode = False, read_pipeline = 0, axi_overlap = False,
+               axi_wstrb = False, c_driver = False, numpy_decoder = False, uvm_hdl_root = "",
+               uvm_burst_seq = False, tlm_model = False):
+
+    # Repeated registers are one UVM class, instantiated as an array
+    self.uvm_reg_arrays   = uvm_reg_arrays
+
+    # Repeated registers are decoded by address range in the AXI slave
+    self.axi_range_decode = axi_range_decode
+
+    # Number of register stages of the read data in the AXI slave, 0 is the
+    # combinational read data mux
+    self.read_pipeline    = read_pipeline
+
+    # The AXI slave accepts the next transaction while the response of the
+    # previous one is pending, it implies a read pipeline of at least 1
+    self.axi_overlap      = axi_overlap
+
+    # Only the byte lanes of the write data which are strobed by WSTRB are
+    # written to the registers and memories
+    self.axi_wstrb        = axi_wstrb
+
+    # A C driver is generated next to the C address header
+    self.c_driver         = c_driver
+
+    # A Python module which decodes register dumps with NumPy is generated
+    # next to the C address header
+    self.numpy_decoder    = numpy_decoder
+
+    # The HDL path of the AXI slave of the blocks which do not give one, for
+    # the backdoor of the UVM register model. $BLOCK is the name of the block.
+    self.uvm_hdl_root     = uvm_hdl_root
+
+    # A UVM sequence which updates the register block with bursts is generated
+    # next to the register block
+    self.uvm_burst_seq    = uvm_burst_seq
+
+    # A Python model of the AXI slave is generated next to the C address header
+    self.tlm_model        = tlm_model
+
+
+  def key(self):
+    return {name: getattr(self, name) for name in self.__slots__}
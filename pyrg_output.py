@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: All generated files are written through a writer which keeps
+## track of what each emitter produced. A file is only written if its contents
+## changed, so that tools which look at modification times (e.g., incremental
+## compiles of simulators) do not rebuild everything on every run.
+##
+## The emitters yield their output in chunks which are streamed through the
+## writer, i.e., a generated file is never held in memory as a whole.
+##
+################################################################################
+
+import os, stat, time
+import pyrg_profile
+
+
+_BLOCK_SIZE = 1 << 16 # Chunks are compared and written in blocks of this size
+
+
+class Writer:
+
+  def __init__(self, verbose = True):
+    self.files     = [] # Every file generated, in order
+    self.written   = [] # Files whose contents changed and were written
+    self.unchanged = [] # Files which already had the generated contents
+    self.bytes     = 0  # Number of bytes generated
+    self.verbose   = verbose
+
+    # The directories which are created when a file is first written to them,
+    # a file in any other directory which does not exist is an error
+    self.directories = set()
+
+  def makedirs(self, path):
+    self.directories.add(os.path.abspath(path))
+
+  def write(self, path, content):
+
+    # The content is a string or an iterable of strings
+    if isinstance(content, str):
+      content = (content,)
+
+    self.files.append(path)
+
+    # The generation of the contents is timed as part of writing the file
+    written = self.bytes
+    with pyrg_profile.phase("write", file = path) as phase:
+      changed = self._write(path, _blocks(content))
+      if phase is not None:
+        phase.args["bytes"] = self.bytes - written
+
+    if changed:
+      self.written.append(path)
+      if self.verbose:
+        print("INFO [pyrg] Generated %s" % path)
+    else:
+      self.unchanged.append(path)
+
+  def merge(self, other):
+
+    self.files     += other.files
+    self.written   += other.written
+    self.unchanged += other.unchanged
+    self.bytes     += other.bytes
+
+  def _write(self, path, blocks):
+
+    # The generated blocks are compared with the existing file while they are
+    # generated. Only at the first difference a temporary file is created, and
+    # it is renamed to the destination when all blocks have been written, i.e.,
+    # a reader never sees a partially written file.
+    old  = _open(path)
+    tmp  = None
+    same = 0 # Number of leading bytes which are equal to the existing file
+
+    # The time spent on the files themselves is only measured when profiling
+    timed = pyrg_profile.enabled()
+    io    = 0.0
+
+    try:
+      for data in blocks:
+        self.bytes += len(data)
+        if timed:
+          start = time.perf_counter()
+        if tmp is None and old is not None and old.read(len(data)) == data:
+          same += len(data)
+        else:
+          if tmp is None:
+            tmp = _Temporary(path, old, same, self.directories)
+          tmp.file.write(data)
+        if timed:
+          io += time.perf_counter() - start
+
+      if timed:
+        start = time.perf_counter()
+
+      if tmp is None and old is not None and old.read(1) == b"":
+        changed = False
+      else:
+        if tmp is None:
+          tmp = _Temporary(path, old, same, self.directories)
+        tmp.commit()
+        changed = True
+
+      if timed:
+        pyrg_profile.add("file_io", io + time.perf_counter() - start)
+
+      return changed
+
+    except BaseException:
+      if tmp is not None:
+        tmp.discard()
+      raise
+
+    finally:
+      if old is not None:
+        old.close()
+
+
+class MemoryWriter(Writer):
+
+  # Keeps the generated files in memory instead of writing them. The contents
+  # of every file are in buffers, keyed by the path it would have been
+  # written to.
+  def __init__(self):
+    super().__init__(verbose = False)
+    self.buffers = {}
+
+  def write(self, path, content):
+
+    if isinstance(content, str):
+      content = (content,)
+
+    text = "".join(content)
+    self.files.append(path)
+    self.written.append(path)
+    self.buffers[path] = text
+    self.bytes        += len(text.encode('utf-8'))
+
+  def merge(self, other):
+
+    super().merge(other)
+    self.buffers.update(getattr(other, "buffers", {}))
+
+
+class _Temporary:
+
+  def __init__(self, path, old, same, directories):
+
+    # The output directories which the writer was asked to create are created
+    # when they are first written to
+    if old is None and os.path.abspath(os.path.dirname(path)) in directories:
+      os.makedirs(os.path.dirname(path), exist_ok = True)
+    elif old is None and not os.path.isdir(os.path.dirname(path) or "."):
+      raise FileNotFoundError("The directory of %s does not exist" % (path))
+
+    # A replaced file keeps its permissions, a new file gets the permissions
+    # the process would normally use, i.e., the temporary file is created like
+    # any other file and the umask is applied to it
+    (fd, self.path)  = _create(path)
+    self.mode        = stat.S_IMODE(os.fstat(old.fileno()).st_mode) if old is not None else None
+    self.destination = path
+    self.file        = os.fdopen(fd, 'wb')
+
+    # Copying the part of the existing file which was equal
+    if same:
+      old.seek(0)
+      while same:
+        data  = old.read(min(same, _BLOCK_SIZE))
+        same -= len(data)
+        self.file.write(data)
+
+  def commit(self):
+    self.file.close()
+    if self.mode is not None:
+      os.chmod(self.path, self.mode)
+    os.replace(self.path, self.destination)
+
+  def discard(self):
+    self.file.close()
+    os.unlink(self.path)
+
+
+def _create(path):
+
+  # A new temporary file next to the path, unlike tempfile.mkstemp() it is not
+  # created private to the user
+  while True:
+    name = os.path.join(os.path.dirname(path) or ".", ".%s.%s.tmp" % (os.path.basename(path), os.urandom(4).hex()))
+    try:
+      return (os.open(name, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666), name)
+    except FileExistsError:
+      continue
+
+
+def _open(path):
+
+  try:
+    return open(path, 'rb')
+  except OSError:
+    return None
+
+
+def _blocks(chunks):
+
+  # Small chunks are joined and encoded into blocks of at least _BLOCK_SIZE
+  buffer = []
+  length = 0
+  for chunk in chunks:
+    buffer.append(chunk)
+    length += len(chunk)
+    if length >= _BLOCK_SIZE:
+      yield "".join(buffer).encode('utf-8')
+      buffer = []
+      length = 0
+
+  if len(buffer):
+    yield "".join(buffer).encode('utf-8')
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: Per phase timing of a run. Phases are recorded as complete
+## events of the Chrome trace event format, i.e., the trace opens in
+## chrome://tracing or https://ui.perfetto.dev.
+##
+## The emitters stream their output, so the parts of an emitter (e.g., the
+## register writes of the AXI slave) do not run in one piece. Such parts are
+## wrapped as sections whose time is summed up in the phase they run in.
+##
+## When profiling is off every function returns at once, or returns its
+## argument unchanged, and nothing is recorded.
+##
+################################################################################
+
+import os, time, json, contextlib
+
+_active = None # The profiler of this process, None if profiling is off
+_null   = contextlib.nullcontext()
+
+
+class Profiler:
+
+  def __init__(self):
+    self.events = [] # Complete events
+    self.stack  = [] # Open phases
+
+
+  def begin(self, name, args):
+    self.stack.append((name, args, {}, time.monotonic_ns()))
+
+
+  def end(self):
+
+    (name, args, sections, start) = self.stack.pop()
+    end = time.monotonic_ns()
+
+    if len(sections):
+      args["sections_ms"] = {s: round(t * 1e3, 3) for (s, t) in sections.items()}
+
+    self.events.append({
+      "name": name,
+      "cat":  "pyrg",
+      "ph":   "X",
+      "ts":   start / 1e3,
+      "dur":  (end - start) / 1e3,
+      "pid":  os.getpid(),
+      "tid":  os.getpid(),
+      "args": args
+    })
+
+
+  def add(self, name, seconds):
+    if len(self.stack):
+      sections       = self.stack[-1][2]
+      sections[name] = sections.get(name, 0.0) + seconds
+
+
+  def section(self, name, iterable):
+
+    # Times every step of the iterable, i.e., the time spent producing its items
+    iterator = iter(iterable)
+    while True:
+      start = time.perf_counter()
+      try:
+        item = next(iterator)
+      except StopIteration:
+        self.add(name, time.perf_counter() - start)
+        return
+      self.add(name, time.perf_counter() - start)
+      yield item
+
+
+class _Phase:
+
+  __slots__ = ("profiler", "name", "args")
+
+  def __init__(self, profiler, name, args):
+    self.profiler = profiler
+    self.name     = name
+    self.args     = args
+
+  def __enter__(self):
+    self.profiler.begin(self.name, self.args)
+    return self
+
+  def __exit__(self, *exc):
+    self.profiler.end()
+    return False
+
+
+# ------------------------------------------------------------------------------
+# Instrumentation
+# ------------------------------------------------------------------------------
+
+def enabled():
+  return _active is not None
+
+
+def phase(name, **args):
+
+  if _active is None:
+    return _null
+  return _Phase(_active, name, args)
+
+
+def section(name, iterable):
+
+  if _active is None:
+    return iterable
+  return _active.section(name, iterable)
+
+
+def add(name, seconds):
+
+  if _active is not None:
+    _active.add(name, seconds)
+
+
+# ------------------------------------------------------------------------------
+# Recording
+# ------------------------------------------------------------------------------
+
+def start():
+
+  global _active
+  _active = Profiler()
+
+
+def stop():
+
+  # Returns the events recorded since start()
+  global _active
+  events  = _active.events if _active is not None else []
+  _active = None
+  return events
+
+
+def write_trace(path, events):
+
+  with open(path, 'w') as file:
+    json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: The templates in templates/ are compiled once per process into
+## a list of text segments and placeholder names. Filling in a template is then
+## a single pass over the segments, and text which has been substituted is
+## never searched for placeholders again.
+##
+################################################################################
+
+import os, re
+
+_cache = {} # Compiled templates, keyed by file name and placeholders
+
+
+class Template:
+
+  __slots__ = ("segments", "placeholders")
+
+  def __init__(self, text, placeholders):
+
+    self.placeholders = tuple(placeholders)
+
+    # A placeholder only matches as a whole word, and the longest name wins,
+    # e.g., "PORTS" does not match inside "AXI_PORTS"
+    names   = sorted(self.placeholders, key = len, reverse = True)
+    pattern = re.compile(r"(?<![A-Za-z0-9_])(" + "|".join(map(re.escape, names)) + r")(?![A-Za-z0-9_])")
+
+    # The text segments are at the even indices, the placeholders at the odd
+    self.segments = pattern.split(text) if len(names) else [text]
+
+
+  def render(self, **values):
+
+    segments       = self.segments[:]
+    segments[1::2] = [values[name] for name in segments[1::2]]
+    return "".join(segments)
+
+
+  def render_iter(self, **values):
+
+    # Yields the filled in template in chunks. A value is a string or an
+    # iterable of strings, e.g., a generator which is consumed in place.
+    segments = self.segments
+    for i in range(1, len(segments), 2):
+      yield segments[i-1]
+      value = values[segments[i]]
+      if isinstance(value, str):
+        yield value
+      else:
+        yield from value
+    yield segments[-1]
+
+
+def template_dir():
+
+  # The templates are installed next to the generator, wherever it is run from
+  return os.path.dirname(os.path.abspath(__file__)) + "/templates"
+
+
+def load(file_name, placeholders = ()):
+
+  key = (file_name, tuple(placeholders))
+
+  if key not in _cache:
+    with open(template_dir() + "/" + file_name, 'r') as file:
+      _cache[key] = Template(file.read(), placeholders)
+
+  return _cache[key]
+
+
+def clear():
+
+  # Templates which changed on disk are compiled again the next time they are
+  # loaded
+  _cache.clear()
+
+
+def load_text(file_name):
+
+  # Templates without placeholders, e.g., the file header
+  return load(file_name).segments[0]
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: Generates a transaction level model of the AXI slave of a
+## block in pure Python, for running register sequences of firmware without a
+## simulator. The model decodes the addresses like the AXI slave which
+## generate_axi() emits, and keeps one bus word per register instance in flat
+## lists indexed by a dictionary of the addresses, so an access is one lookup
+## and a few integer operations.
+##
+################################################################################
+
+import pyrg_model
+import pyrg_template
+import pyrg_output
+import pyrg_profile
+import pyrg_options
+import pyrg_axi
+import pyrg_numpy
+
+
+def generate_tlm_model(block, git_root, writer = None, options = None):
+
+  # The emitter can be called with a path to a YAML file or a parsed block
+  if isinstance(block, str):
+    block = pyrg_model.load_block(block)
+
+  pyrg_model.check_memories(block)
+
+  header  = pyrg_template.load_text("header.txt")
+  sw_path = block.sw_path.replace("$GIT_ROOT", git_root or "")
+
+  output_file = sw_path + '/' + block.name + "_model.py"
+  writer = writer or pyrg_output.Writer()
+  writer.makedirs(sw_path)
+  writer.write(output_file, pyrg_profile.section("tlm_model", emit_tlm_model(block, header, options)))
+
+
+# ------------------------------------------------------------------------------
+# The layout of the AXI slave
+# ------------------------------------------------------------------------------
+
+def _readable(reg):
+
+  # A ROM register with several fields has no arm in the read decoder
+  return reg.access in ["RO", "RW", "RC"] or (reg.access in ["ROM"] and len(reg.fields) == 1)
+
+
+def _writable(reg):
+  return reg.access in ["WO", "RW"]
+
+
+def _field_list(reg):
+
+  # The fields as (name, type, position, size, reset), the position of a field
+  # whose position is not known is None, i.e., it is found by the model
+  for (field, _at) in pyrg_model.field_positions(reg):
+    _reset = pyrg_model.reset_integer(field) if field.has_reset else 0
+    yield (field.name, field.type, _at, field.size, _reset)
+
+
+def _literal(value):
+
+  # A size which is a parameter is its name
+  if isinstance(value, str):
+    return "\"%s\"" % (value)
+  return str(value)
+
+
+def _cycles(block, options):
+
+  # The cycles of a burst on top of its beats when bursts are back to back,
+  # i.e., the address and response handshakes which are not overlapped
+  _write = 0 if options.axi_overlap else 2
+  _read  = 0 if pyrg_axi._read_latency(block, options) > 0 else 2
+  return (_write, _read)
+
+
+def emit_tlm_model(block, header, options = None):
+
+  options = options or pyrg_options.Options()
+
+  (_write_cycles, _read_cycles) = _cycles(block, options)
+  digits = block.addr_width // 4
+
+  # The header is a C comment
+  yield "".join(pyrg_numpy._comment(line) + "\n" for line in header.splitlines())
+  yield "\n"
+  yield "from array import array\n"
+  yield "\n"
+  yield "BLOCK     = \"%s\"\n" % (block.name)
+  yield "BUS_WIDTH = %d\n" % (block.bus_width)
+  yield "BUS_BYTES = %d\n" % (block.bus_bytes)
+  yield "AXI_WSTRB = %s\n" % (bool(options.axi_wstrb))
+  yield "\n"
+  yield "# The responses of the AXI slave, SLVERR is its AXI_RESP_SLVERR_C\n"
+  yield "OKAY   = 0\n"
+  yield "SLVERR = 1\n"
+  yield "\n"
+  yield "# The cycles of a burst on top of its beats, when bursts are back to back\n"
+  yield "WRITE_CYCLES = %d\n" % (_write_cycles)
+  yield "READ_CYCLES  = %d\n" % (_read_cycles)
+  yield "\n"
+
+  yield "# The registers as (name, address, repeat, readable, writable, read and clear,\n"
+  yield "# fields), and their fields as (name, type, position, size, reset)\n"
+  yield "REGISTERS = [\n"
+  for reg in block.registers:
+    yield "  (\"%s\", 0x%0*x, %d, %s, %s, %s, [\n" % (reg.name, digits, reg.address, reg.repeat, _readable(reg), _writable(reg),
+                                                    reg.access in ["RC"])
+    for (_name, _type, _at, _size, _reset) in _field_list(reg):
+      yield "    (\"%s\", \"%s\", %s, %s, 0x%x),\n" % (_name, _type, _literal(_at), _literal(_size), _reset)
+    yield "  ]),\n"
+  yield "]\n"
+  yield "\n"
+
+  yield "# The memories as (name, base address, size, width, readable, writable)\n"
+  yield "MEMORIES = [\n"
+  for mem in block.memories:
+    yield "  (\"%s\", 0x%0*x, %d, %d, %s, %s),\n" % (mem.name, digits, mem.base_address, mem.size, mem.width,
+                                                  mem.access in ["RW", "RO"], mem.access in ["RW", "WO"])
+  yield "]\n"
+  yield "\n\n"
+
+  yield _MODEL_BEGIN
+
+  # A write without strobes, or with strobes that the slave ignores, writes
+  # whole registers
+  if options.axi_wstrb:
+    yield _WRITE_STROBED
+  else:
+    yield _WRITE
+
+  yield _MODEL_END
+
+
+_MODEL_BEGIN = '''
+class Model:
+
+  # The AXI slave of the block. The registers are one bus word per instance,
+  # which holds the control fields written by the bus and the status fields
+  # driven by the test with drive(). Command fields are not kept, a write of a
+  # command register calls on_command(field, index, value), and a read of a
+  # read and clear register clears its status fields, and calls
+  # on_clear(register). The memories are the RAMs on the memory ports.
+
+  def __init__(self, **parameters):
+
+    self.parameters = parameters
+    self.on_command = None
+    self.on_clear   = None
+    self.cycles     = 0
+
+    self._words   = [] # The bus word of every register instance
+    self._resets  = [] # Its reset value
+    self._wmasks  = [] # The bits which are written by the bus
+    self._cmds    = [] # The bits of the command fields, with their names
+    self._inputs  = [] # The bits of the status fields
+    self._clears  = [] # The instances which a read clears, or None
+    self._names   = [] # The name and index of every instance
+    self._rslots  = {} # The instance of every readable address
+    self._wslots  = {} # The instance of every writable address
+    self._fields  = {} # The first instance, position, mask and repeat of every field
+
+    self.memories = {}
+    self._mems    = [] # (base, high, ram, mask, readable, writable)
+
+    for (name, address, repeat, readable, writable, rc, fields) in REGISTERS:
+
+      first = len(self._words)
+      (_reset, _write, _cmds, _input) = (0, 0, [], 0)
+      position = 0
+
+      for (field, type, at, size, reset) in fields:
+        size     = self._size(field, size)
+        at       = position if at is None else at
+        position = at + size
+        mask     = ((1 << size) - 1) << at & ((1 << BUS_WIDTH) - 1)
+        self._fields[field] = (first, at, mask, repeat)
+        if type == "CMD":
+          _cmds.append((field, at, mask))
+        else:
+          _reset |= (reset << at) & mask
+        if type == "CR":
+          _write |= mask
+        if type in ["SR", "IRQ"]:
+          _input |= mask
+
+      _clears = tuple(range(first, first + repeat)) if rc else None
+      for i in range(repeat):
+        slot = first + i
+        self._words.append(_reset)
+        self._resets.append(_reset)
+        self._wmasks.append(_write)
+        self._cmds.append(tuple(_cmds))
+        self._inputs.append(_input)
+        self._clears.append(_clears)
+        self._names.append((name, i))
+        if readable:
+          self._rslots[address + i*BUS_BYTES] = slot
+        if writable:
+          self._wslots[address + i*BUS_BYTES] = slot
+
+    for (name, base, size, width, readable, writable) in MEMORIES:
+      ram = array("Q", bytes(8*size)) if width <= 64 else [0]*size
+      self.memories[name] = ram
+      self._mems.append((base, base + size*BUS_BYTES, ram, (1 << width) - 1, readable, writable))
+
+
+  def _size(self, field, size):
+
+    # A size which is a parameter of the AXI slave is given to the model
+    if isinstance(size, int):
+      return size
+    if size not in self.parameters:
+      raise ValueError("The size of %s is the parameter %s, give its value to the model" % (field, size))
+    return self.parameters[size]
+
+
+  def reset(self):
+
+    # The registers get their reset values, the status fields are driven by
+    # the test and the memories are outside of the slave
+    for i in range(len(self._words)):
+      self._words[i] = (self._words[i] & self._inputs[i]) | self._resets[i]
+
+
+  # ----------------------------------------------------------------------------
+  # The ports of the fields
+  # ----------------------------------------------------------------------------
+
+  def drive(self, field, value, index = 0):
+
+    # Sets a status field, i.e., an input of the slave
+    (first, at, mask, repeat) = self._fields[field]
+    slot = first + index
+    self._words[slot] = (self._words[slot] & ~mask) | ((value << at) & mask)
+
+
+  def signal(self, field, index = 0):
+
+    # The value of a field, e.g., a control field which is an output
+    (first, at, mask, repeat) = self._fields[field]
+    return (self._words[first + index] & mask) >> at
+
+
+  # ----------------------------------------------------------------------------
+  # Reads
+  # ----------------------------------------------------------------------------
+
+  def read(self, address):
+
+    # Returns (data, response) of a single beat
+    self.cycles += 1 + READ_CYCLES
+    return self._read(address)
+
+
+  def read_burst(self, address, length):
+
+    # Returns the data and responses of the beats of an incrementing burst
+    self.cycles += length + READ_CYCLES
+    beats = [self._read(address + i*BUS_BYTES) for i in range(length)]
+    return ([data for (data, _) in beats], [resp for (_, resp) in beats])
+
+
+  def _read(self, address):
+
+    slot = self._rslots.get(address)
+    if slot is None:
+      return self._read_memory(address)
+    data = self._words[slot]
+    if self._clears[slot] is not None:
+      self._clear(slot)
+    return (data, OKAY)
+
+
+  def _clear(self, slot):
+
+    # The clear port of a read and clear register is common to its instances
+    for i in self._clears[slot]:
+      self._words[i] &= ~self._inputs[i]
+    if self.on_clear is not None:
+      self.on_clear(self._names[slot][0])
+
+
+  def _read_memory(self, address):
+
+    for (base, high, ram, mask, readable, writable) in self._mems:
+      if readable and base <= address < high:
+        return (ram[(address - base) // BUS_BYTES] & mask, OKAY)
+    return (0, SLVERR)
+
+
+  # ----------------------------------------------------------------------------
+  # Writes
+  # ----------------------------------------------------------------------------
+
+  def write(self, address, data, strb = None):
+
+    # Returns the response of a single beat
+    self.cycles += 1 + WRITE_CYCLES
+    return self._write(address, data, strb)
+
+
+  def write_burst(self, address, data, strb = None):
+
+    # Returns the response of an incrementing burst, which is an error if any
+    # of its beats is
+    self.cycles += len(data) + WRITE_CYCLES
+    resp = OKAY
+    for i in range(len(data)):
+      resp |= self._write(address + i*BUS_BYTES, data[i], strb if strb is None or isinstance(strb, int) else strb[i])
+    return resp
+
+
+  def _command(self, slot, data):
+
+    if self.on_command is not None:
+      for (field, at, mask) in self._cmds[slot]:
+        self.on_command(field, self._names[slot][1], (data & mask) >> at)
+'''[1:]
+
+
+_WRITE = '''
+
+  def _write(self, address, data, strb):
+
+    # The strobes are ignored, the slave writes whole registers
+    slot = self._wslots.get(address)
+    if slot is None:
+      return self._write_memory(address, data)
+    mask = self._wmasks[slot]
+    self._words[slot] = (self._words[slot] & ~mask) | (data & mask)
+    if self._cmds[slot]:
+      self._command(slot, data)
+    return OKAY
+
+
+  def _write_memory(self, address, data):
+
+    for (base, high, ram, mask, readable, writable) in self._mems:
+      if writable and base <= address < high:
+        ram[(address - base) // BUS_BYTES] = data & mask
+        return OKAY
+    return SLVERR
+'''
+
+
+_WRITE_STROBED = '''
+
+  def _write(self, address, data, strb):
+
+    # Only the byte lanes which are strobed are written, and the bits of a
+    # command field which are not strobed are 0
+    if strb is not None:
+      lanes = 0
+      for i in range(BUS_BYTES):
+        if (strb >> i) & 1:
+          lanes |= 0xff << 8*i
+      data &= lanes
+    else:
+      lanes = (1 << BUS_WIDTH) - 1
+
+    slot = self._wslots.get(address)
+    if slot is None:
+      return self._write_memory(address, data, lanes)
+    mask = self._wmasks[slot] & lanes
+    self._words[slot] = (self._words[slot] & ~mask) | (data & mask)
+    if self._cmds[slot]:
+      self._command(slot, data)
+    return OKAY
+
+
+  def _write_memory(self, address, data, lanes):
+
+    for (base, high, ram, mask, readable, writable) in self._mems:
+      if writable and base <= address < high:
+        i      = (address - base) // BUS_BYTES
+        ram[i] = ((ram[i] & ~lanes) | data) & mask
+        return OKAY
+    return SLVERR
+'''
+
+
+_MODEL_END = '''
+
+  def __repr__(self):
+    return "<%s model, %d registers, %d memories>" % (BLOCK, len(self._words), len(self._mems))
+'''
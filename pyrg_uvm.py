@@ -23,357 +23,431 @@
 ##
 ################################################################################
 
-import yaml
-import sys, os, math
-from datetime import date
+import pyrg_model
+import pyrg_template
+import pyrg_output
+import pyrg_profile
+import pyrg_options
 
-def generate_uvm(yaml_file_path, git_root, addr_width = 16):
+# ------------------------------------------------------------------------------
+# Loading in the templates
+# ------------------------------------------------------------------------------
 
-  this_path           = os.path.dirname(os.path.abspath(sys.argv[0]))
-  uvm_reg_file_path   = this_path + "/templates/uvm_reg.sv"
-  uvm_block_file_path = this_path + "/templates/uvm_block.sv"
-  field_template_path = this_path + "/templates/reg_field.sv"
-  header_file_path    = this_path + "/templates/header.txt"
+def load_templates():
 
-  # ----------------------------------------------------------------------------
-  # Loading in the templates
-  # ----------------------------------------------------------------------------
+  # Compiled once per process
+  with pyrg_profile.phase("load_templates"):
+    return {
+      "uvm_reg":        pyrg_template.load("uvm_reg.sv",   ["CLASS_DESCRIPTION", "REG_NAME", "UVM_FIELD_DECLARATIONS",
+                                                            "UVM_REG_SIZE", "UVM_BUILD"]),
+      "uvm_block":      pyrg_template.load("uvm_block.sv", ["CLASS_NAME", "UVM_REG_DECLARATIONS", "UVM_BUILD", "MAP_NAME",
+                                                            "BASE_ADDR", "BUS_BIT_WIDTH", "UVM_ADD"]),
+      "field_template": pyrg_template.load("reg_field.sv", ["FIELD_INSTANCE", "FIELD_DESCRIPTION", "FIELD_NAME", "FIELD_SIZE",
+                                                            "FIELD_LSB_POS", "FIELD_ACCESS", "FIELD_RESET", "FIELD_HAS_RESET",
+                                                            "FIELD_INDIVIDUALLY_ACCESSIBLE"]),
+      "uvm_burst_seq":  pyrg_template.load("uvm_burst_seq.sv", ["CLASS_NAME", "BLOCK_CLASS", "BUS_BYTES", "REGISTER_LIST"]),
+      "header":         pyrg_template.load_text("header.txt")
+    }
 
-  uvm_reg = ""
-  with open(uvm_reg_file_path, 'r') as file:
-    uvm_reg = file.read()
 
-  uvm_block = ""
-  with open(uvm_block_file_path, 'r') as file:
-    uvm_block = file.read()
+def _hex(value, addr_width = 16):
+  return str(hex(value)[2:].zfill(addr_width // 4)).upper()
 
-  header = ""
-  with open(header_file_path, 'r') as file:
-    header = file.read()
 
-  field_template = ""
-  with open(field_template_path, 'r') as file:
-    field_template = file.read()
+def _user_path(path, git_root):
 
-  # ----------------------------------------------------------------------------
-  # Loading in the YAML file and the UVM templates
-  # ----------------------------------------------------------------------------
+  # Extracting the user defined paths
+  return path.replace("$GIT_ROOT", git_root)
 
-  # Variables for storing the YAML file contents
-  top_name    = None
-  yml_entries = None
 
-  with open(yaml_file_path, 'r') as file:
-    yaml_reg              = yaml.load(file, Loader = yaml.FullLoader)
-    top_name, yml_entries = list(yaml_reg.items())[0]
+def _writer(writer, path):
 
-  # ----------------------------------------------------------------------------
-  # Extracting the user defined paths
-  # ----------------------------------------------------------------------------
+  # The user defined paths are created if they do not exist
+  writer = writer or pyrg_output.Writer()
+  writer.makedirs(path)
+  return writer
 
-  rtl_path = yml_entries["rtl_path"].replace("$GIT_ROOT", git_root)
-  uvm_path = yml_entries["uvm_path"].replace("$GIT_ROOT", git_root)
-  sw_path  = yml_entries["sw_path"].replace("$GIT_ROOT",  git_root)
 
-  if not os.path.exists(rtl_path):
-    os.makedirs(rtl_path)
+def _block(block):
 
-  if not os.path.exists(uvm_path):
-    os.makedirs(uvm_path)
+  # The emitters can be called with a path to a YAML file or a parsed block
+  if isinstance(block, str):
+    return pyrg_model.load_block(block)
+  return block
 
-  if not os.path.exists(sw_path):
-    os.makedirs(sw_path)
 
-  # ----------------------------------------------------------------------------
-  # PART 1
-  # Creating all register classes (uvm_reg) and their fields (uvm_reg_field).
-  # We are also creating the constants (SV) and defines (C) for the register's
-  # addresses. Each register's name is saved in a list which is used later to
-  # create the register slave's block (uvm_reg_block).
-  # ----------------------------------------------------------------------------
+def generate_uvm(block, git_root, addr_width = None, writer = None, options = None):
 
-  reg_classes    = header
-  register_names = [] # Tuple list
-  sv_address_map = [] # localparams
-  c_address_map  = [] # defines
+  block     = _block(block)
+  templates = load_templates()
+  writer    = writer or pyrg_output.Writer()
 
-  # Iterating through the list of registers
-  for reg in yml_entries['registers']:
-
-    _reg_name   = reg['name']
-    _reg_access = "\"" + reg['access'] + "\""
-    _reg_class  = uvm_reg.replace("CLASS_DESCRIPTION", reg['desc'])
-    _reg_block_body = ""
-
-    # Registers can be repeated with the same name but different numeric suffix
-    if ("repeat" in reg.keys()):
-      _reg_repeat = reg["repeat"]
-      _ri         = "_0" # Repeat index
-    else:
-      _reg_repeat = 1
-      _ri         = ""
-
-    if _reg_repeat > 1:
-      for i in range(_reg_repeat):
-        register_names.append((_reg_name+_ri, _reg_access))
-        sv_address_map.append("  localparam logic [%d : 0] %s_%d_ADDR" % (addr_width-1, _reg_name.upper(), i))
-        c_address_map.append("  #define %s_%d_ADDR" % (_reg_name.upper(), i))
-        _ri = "_" + str(i+1)
-      _ri = "_0"
-    else:
-      register_names.append((_reg_name, _reg_access))
-      sv_address_map.append("  localparam logic [%d : 0] %s_ADDR" % (addr_width-1, _reg_name.upper()))
-      c_address_map.append("  #define %s_ADDR" % (_reg_name.upper()))
-
-    _reg_field_declarations = ""
-    _reg_total_size        = ""
-
-    # Generating the fields (uvm_reg_field) of the register
-    for i in range(_reg_repeat):
-
-      for field in reg['bit_fields']:
-
-        _reg_field_declarations += "  rand uvm_reg_field %s%s;\n" % (field['field']['name'], _ri)
-
-        _field_instance    = "%s%s = uvm_reg_field::type_id::create(\"%s%s\");" % (field['field']['name'], _ri, field['field']['name'], _ri)
-        _field_description = field['field']['description']
-        _field_name        = field['field']['name'] + _ri
-        _field_size        = str(field['field']['size'])
-        _field_lsb_pos     = str(field['field']['lsb_pos'])
-        _reg_total_size   += _field_size+"+"
-
-        _reg_field = field_template
-        _reg_field = _reg_field.replace("FIELD_INSTANCE",    _field_instance)
-        _reg_field = _reg_field.replace("FIELD_DESCRIPTION", _field_description)
-        _reg_field = _reg_field.replace("FIELD_NAME",        _field_name)
-        _reg_field = _reg_field.replace("FIELD_SIZE",        _field_size)
-        _reg_field = _reg_field.replace("FIELD_LSB_POS",     _field_lsb_pos)
-        _reg_field = _reg_field.replace("FIELD_ACCESS",      _reg_access)
-
-        if ("reset_value" in field['field'].keys()):
-          _reg_field = _reg_field.replace("FIELD_RESET",     str(field['field']['reset_value']))
-          _reg_field = _reg_field.replace("FIELD_HAS_RESET", str(1))
-        else:
-          _reg_field = _reg_field.replace("FIELD_RESET",     str(0))
-          _reg_field = _reg_field.replace("FIELD_HAS_RESET", str(0))
-
-        _reg_block_body += _reg_field
-
-
-
-      _reg_class = _reg_class.replace("REG_NAME",               (_reg_name + _ri + "_reg"))
-      _reg_class = _reg_class.replace("UVM_FIELD_DECLARATIONS", _reg_field_declarations)
-      _reg_class = _reg_class.replace("UVM_REG_SIZE",           _reg_total_size[:-1]) # Not all bits need to be implemented.
-      _reg_class = _reg_class.replace("UVM_BUILD",              _reg_block_body)
-
-      reg_classes += _reg_class
-      _reg_block_body    = ""
-
-      if _reg_repeat > 1:
-        _reg_class  = uvm_reg.replace("CLASS_DESCRIPTION", reg['desc'])
-        _reg_field_declarations = ""
-        _reg_total_size         = ""
-        _ri                     = "_" + str(i+1)
+  generate_uvm_regs(block, git_root, templates, writer, options)
+  _latex = generate_sv_address_pkg(block, git_root, addr_width, templates, writer)
+  generate_c_address_header(block, git_root, templates, writer)
+  generate_uvm_block(block, git_root, templates, writer, options)
+
+  return(_latex)
+
+
+# ------------------------------------------------------------------------------
+# PART 1
+# Creating all register classes (uvm_reg) and their fields (uvm_reg_field).
+# ------------------------------------------------------------------------------
+
+def generate_uvm_regs(block, git_root, templates = None, writer = None, options = None):
+
+  block     = _block(block)
+  templates = templates or load_templates()
+  uvm_path  = _user_path(block.uvm_path, git_root)
 
   # Write the register classes to file
-  output_file = uvm_path + '/' + top_name + "_reg.sv"
-  with open(output_file, 'w') as file:
-    file.write(reg_classes)
+  output_file = uvm_path + '/' + block.name + "_reg.sv"
+  _writer(writer, uvm_path).write(output_file, pyrg_profile.section("register_classes", emit_uvm_regs(block, templates, options)))
+
 
-  print("INFO [pyrg] Generated %s" % output_file)
+def emit_uvm_regs(block, templates, options = None):
 
-  # ----------------------------------------------------------------------------
-  # PART 2.0
-  # Parsing memories
-  # ----------------------------------------------------------------------------
+  options        = options or pyrg_options.Options()
+  uvm_reg        = templates["uvm_reg"]
+  field_template = templates["field_template"]
+
+  yield templates["header"]
+
+  # Iterating through the list of registers
+  for reg in block.registers:
 
-  sv_memories = []
-  c_memories  = []
+    _reg_access = "\"" + reg.access + "\""
 
-  # Iterating through the list of memories
-  if ('memories' in yml_entries.keys()):
+    # Generating the fields (uvm_reg_field) of every instance of the register,
+    # or one class for all instances if they are an array
+    for _ri in ("",) if options.uvm_reg_arrays else reg.suffixes:
 
-    for mem in yml_entries['memories']:
+      _reg_field_declarations = []
+      _reg_total_size         = []
+      _reg_block_body         = []
 
-      # Memory information
-      mem_name   = mem['name']
-      mem_access = mem['access']
-      mem_size   = mem['size']
+      for field in reg.fields:
 
-      _mem_base_addr = "  localparam logic [%d : 0] %s_%s_BASE_ADDR = " % (addr_width-1, top_name.upper(), mem_name.upper())
-      _mem_high_addr = "  localparam logic [%d : 0] %s_%s_HIGH_ADDR = " % (addr_width-1, top_name.upper(), mem_name.upper())
-      sv_memories.append((mem_size, _mem_base_addr, _mem_high_addr))
+        _field_size = str(field.size)
+        _reg_total_size.append(_field_size)
+        _reg_field_declarations.append("  rand uvm_reg_field %s%s;\n" % (field.name, _ri))
+        _reg_block_body.append(field_template.render(
+          FIELD_INSTANCE    = "%s%s = uvm_reg_field::type_id::create(\"%s%s\");" % (field.name, _ri, field.name, _ri),
+          FIELD_DESCRIPTION = field.description,
+          FIELD_NAME        = field.name + _ri,
+          FIELD_SIZE        = _field_size,
+          FIELD_LSB_POS     = str(field.lsb_pos),
+          FIELD_ACCESS      = _reg_access,
+          FIELD_RESET       = str(field.reset_value) if field.has_reset else str(0),
+          FIELD_HAS_RESET   = str(1) if field.has_reset else str(0),
+          # The slave writes the strobed byte lanes only, i.e., a field which
+          # fills its byte lanes can be written on its own
+          FIELD_INDIVIDUALLY_ACCESSIBLE = str(1) if options.axi_wstrb else str(0)))
 
-      _mem_base_addr = "  #define %s_%s_BASE_ADDR " % (top_name.upper(), mem_name.upper())
-      _mem_high_addr = "  #define %s_%s_HIGH_ADDR " % (top_name.upper(), mem_name.upper())
-      c_memories.append((mem_size, _mem_base_addr, _mem_high_addr))
+      yield from uvm_reg.render_iter(
+        CLASS_DESCRIPTION      = reg.desc,
+        REG_NAME               = reg.name + _ri + "_reg",
+        UVM_FIELD_DECLARATIONS = _reg_field_declarations,
+        UVM_REG_SIZE           = "+".join(_reg_total_size), # Not all bits need to be implemented.
+        UVM_BUILD              = _reg_block_body)
 
-      # ------------------------------------------------------------------------
-      # all_mem_reads
-      # ------------------------------------------------------------------------
-      if (mem_access in ["RW", "R"]):
-        raise Exception("Only writable memories supported yet!")
 
+def _register_addresses(block, name_format):
 
+  # Yields the name and address of every register instance
+  for reg in block.registers:
+    for (i, _ri) in enumerate(reg.suffixes):
+      yield (name_format % (reg.name.upper(), _ri), reg.address + i*block.bus_bytes)
 
-  # ----------------------------------------------------------------------------
-  # PART 2.1
-  # Creating the System Verilog address map
-  # ----------------------------------------------------------------------------
 
-  _bus_bytes = int(yml_entries['bus_width']/8)
+def _longest_name(block, name_format):
 
   longest_name = 0
-  for addr in sv_address_map:
+  for (addr, _) in _register_addresses(block, name_format):
     if len(addr) > longest_name:
       longest_name = len(addr)
+  return longest_name
 
-  _i = 0
-  for i in range(len(sv_address_map)):
-    sv_address_map[i] = sv_address_map[i].ljust(longest_name, " ") + (" = %d'h" % (addr_width)) + str(hex(i*_bus_bytes)[2:].zfill(4)).upper() + ";\n"
-    _i = i
 
-  ADDRESS_HIGH = (("  localparam logic [%d : 0] " % (addr_width-1)) + top_name.upper() + "_HIGH_ADDRESS").ljust(longest_name, " ") + (" = %d'h" % (addr_width)) + str(hex(len(sv_address_map)*_bus_bytes)[2:].zfill(4)).upper() + ";\n"
+# ------------------------------------------------------------------------------
+# PART 2.1
+# Creating the System Verilog address map
+# ------------------------------------------------------------------------------
 
-  # Adding memories and aligning the lower bits to the size of the memory as the address field of the interface
-  # is used, too
-  _latex = []
-  _aligned_mem_addr = len(sv_address_map) * _bus_bytes
-  for m in sv_memories:
-    (mem_size, _mem_base_addr, _mem_high_addr) = m
-    mem_size_log2  = int(math.ceil(math.log2(mem_size)))
-    bus_bytes_log2 = int(math.ceil(math.log2(_bus_bytes)))
+def generate_sv_address_pkg(block, git_root, addr_width = None, templates = None, writer = None):
 
-    # The first '1' in the address must begin after:
-    # - bus_bytes_log2: Because we are using the address as a counter, the lower bits increase by (AXI_DATA_WIDTH_P/8) in the slave
-    # - mem_size_log2: Because these bits will have the counting value
-    _aligned_mem_addr = ((_aligned_mem_addr + 2**(mem_size_log2+bus_bytes_log2)) >> (mem_size_log2+bus_bytes_log2)) << (mem_size_log2+bus_bytes_log2)
-    _latex.append((str(hex(_aligned_mem_addr)[2:].zfill(4)).upper(),
-                   str(hex(_aligned_mem_addr + mem_size * _bus_bytes)[2:].zfill(4)).upper())
-                 )
-    sv_address_map.append(_mem_base_addr + ("%d'h" % (addr_width)) + str(hex(_aligned_mem_addr)[2:].zfill(4)).upper() + ";\n")
-    sv_address_map.append(_mem_high_addr + ("%d'h" % (addr_width)) + str(hex(_aligned_mem_addr + mem_size * _bus_bytes)[2:].zfill(4)).upper() + ";\n")
-    _aligned_mem_addr += mem_size * _bus_bytes
+  # The address width is the one of the block unless it is given
+  block      = _block(block)
+  templates  = templates or load_templates()
+  addr_width = addr_width or block.addr_width
+  rtl_path   = _user_path(block.rtl_path, git_root)
 
+  pyrg_model.check_memories(block)
 
-  pkt_top  = "\n"
-  pkt_top += "`ifndef %s\n"   % (top_name.upper() + "_ADDRESS_PKG")
-  pkt_top += "`define %s\n" % (top_name.upper() + "_ADDRESS_PKG")
-  pkt_top += "\n"
-  pkt_top += "package %s;\n\n" % (top_name + "_address_pkg")
+  output_file = rtl_path + '/' + block.name + "_address_pkg.sv"
+  _writer(writer, rtl_path).write(output_file, pyrg_profile.section("address_map", emit_sv_address_pkg(block, addr_width, templates)))
 
-  pkt_bot  = "\n\n"
-  pkt_bot  = "\nendpackage\n\n`endif\n"
+  return([(_hex(mem.base_address, addr_width), _hex(mem.high_address, addr_width)) for mem in block.memories])
 
-  output_file = rtl_path + '/' + top_name + "_address_pkg.sv"
-  with open(output_file, 'w') as file:
-    file.write(header)
-    file.write(pkt_top)
-    file.write(ADDRESS_HIGH)
-    file.write(''.join(sv_address_map))
-    file.write(pkt_bot)
 
-  print("INFO [pyrg] Generated %s" % output_file)
+def emit_sv_address_pkg(block, addr_width, templates):
 
+  top_name     = block.name
+  name_format  = "  localparam logic [%d : 0] %%s%%s_ADDR" % (addr_width-1)
+  longest_name = _longest_name(block, name_format)
 
+  yield templates["header"]
 
+  yield "\n"
+  yield "`ifndef %s\n"   % (top_name.upper() + "_ADDRESS_PKG")
+  yield "`define %s\n" % (top_name.upper() + "_ADDRESS_PKG")
+  yield "\n"
+  yield "package %s;\n\n" % (top_name + "_address_pkg")
 
-  # ----------------------------------------------------------------------------
-  # PART 2.2
-  # Creating the C address map
-  # ----------------------------------------------------------------------------
+  yield (("  localparam logic [%d : 0] " % (addr_width-1)) + top_name.upper() + "_HIGH_ADDRESS").ljust(longest_name, " ") + (" = %d'h" % (addr_width)) + _hex(block.high_address, addr_width) + ";\n"
 
-  longest_name = 0
-  for addr in c_address_map:
-    if len(addr) > longest_name:
-      longest_name = len(addr)
+  for (addr, value) in _register_addresses(block, name_format):
+    yield addr.ljust(longest_name, " ") + (" = %d'h" % (addr_width)) + _hex(value, addr_width) + ";\n"
+
+  # Adding memories, they are already aligned by the model
+  for mem in block.memories:
+    yield "  localparam logic [%d : 0] %s_%s_BASE_ADDR = " % (addr_width-1, top_name.upper(), mem.name.upper()) + ("%d'h" % (addr_width)) + _hex(mem.base_address, addr_width) + ";\n"
+    yield "  localparam logic [%d : 0] %s_%s_HIGH_ADDR = " % (addr_width-1, top_name.upper(), mem.name.upper()) + ("%d'h" % (addr_width)) + _hex(mem.high_address, addr_width) + ";\n"
 
-  for i in range(len(c_address_map)):
-    c_address_map[i] = c_address_map[i].ljust(longest_name, " ") +\
-                       " " + top_name.upper() + "_PHYSICAL_ADDRESS_C +" + " 0x%s\n" % str(hex(i*_bus_bytes)[2:].zfill(4)).upper()
+  yield "\nendpackage\n\n`endif\n"
 
-  ADDRESS_HIGH = ("  #define " + top_name.upper() + "_HIGH_ADDRESS").ljust(longest_name, " ") +\
-                  " " + top_name.upper() + "_PHYSICAL_ADDRESS_C +" + " 0x%s\n" % str(hex(len(c_address_map)*_bus_bytes)[2:].zfill(4)).upper()
 
-  # Adding memories and aligning the lower bits to the size of the memory as the address field of the interface
-  # is used, too
-  _aligned_mem_addr = len(c_address_map) * _bus_bytes
-  for m in c_memories:
-    (mem_size, _mem_base_addr, _mem_high_addr) = m
-    mem_size_log2 = int(math.ceil(math.log2(mem_size)))
-    _aligned_mem_addr = ((_aligned_mem_addr + 2**(mem_size_log2+bus_bytes_log2)) >> (mem_size_log2+bus_bytes_log2)) << (mem_size_log2+bus_bytes_log2)
-    c_address_map.append(_mem_base_addr + top_name.upper() + "_PHYSICAL_ADDRESS_C +" + " 0x%s\n" % str(hex(_aligned_mem_addr))[2:].zfill(4).upper())
-    c_address_map.append(_mem_high_addr + top_name.upper() + "_PHYSICAL_ADDRESS_C +" + " 0x%s\n" % str(hex(_aligned_mem_addr + mem_size * _bus_bytes))[2:].zfill(4).upper())
-    _aligned_mem_addr += mem_size * _bus_bytes
+# ------------------------------------------------------------------------------
+# PART 2.2
+# Creating the C address map
+# ------------------------------------------------------------------------------
 
-  pkt_top  = ""
-  pkt_top += "#ifndef %s\n" % (top_name.upper() + "_ADDRESS_H")
-  pkt_top += "#define %s\n" % (top_name.upper() + "_ADDRESS_H")
-  pkt_top += "\n"
+def generate_c_address_header(block, git_root, templates = None, writer = None):
 
-  pkt_bot  = "\n#endif\n"
+  block     = _block(block)
+  templates = templates or load_templates()
+  sw_path   = _user_path(block.sw_path, git_root)
 
-  output_file = sw_path + '/' + top_name + "_address.h"
-  with open(output_file, 'w') as file:
-    file.write(header)
-    file.write(pkt_top)
-    file.write(ADDRESS_HIGH)
-    file.write(''.join(c_address_map))
-    file.write(pkt_bot)
+  pyrg_model.check_memories(block)
 
-  print("INFO [pyrg] Generated %s" % output_file)
+  output_file = sw_path + '/' + block.name + "_address.h"
+  _writer(writer, sw_path).write(output_file, pyrg_profile.section("address_map", emit_c_address_header(block, templates)))
 
 
+def emit_c_address_header(block, templates):
 
+  top_name     = block.name
+  name_format  = "  #define %s%s_ADDR"
+  longest_name = _longest_name(block, name_format)
+  physical     = " " + top_name.upper() + "_PHYSICAL_ADDRESS_C +"
 
+  yield templates["header"]
 
-  # ----------------------------------------------------------------------------
-  # PART 3
-  # Creating the register block
-  # ----------------------------------------------------------------------------
+  yield "#ifndef %s\n" % (top_name.upper() + "_ADDRESS_H")
+  yield "#define %s\n" % (top_name.upper() + "_ADDRESS_H")
+  yield "\n"
 
-  UVM_REG_DECLARATIONS = ""
-  reg_block_body            = ""
-  UVM_ADD              = ""
-  offset   = 0
-  MAP_NAME = "\"" + top_name + "_map\""
+  yield ("  #define " + top_name.upper() + "_HIGH_ADDRESS").ljust(longest_name, " ") + physical + " 0x%s\n" % _hex(block.high_address, block.addr_width)
 
-  for (reg, access) in register_names:
+  for (addr, value) in _register_addresses(block, name_format):
+    yield addr.ljust(longest_name, " ") + physical + " 0x%s\n" % _hex(value, block.addr_width)
 
-    UVM_REG_DECLARATIONS += "  rand %s_reg %s;\n" % (reg, reg)
+  # Adding memories, they are already aligned by the model
+  for mem in block.memories:
+    yield "  #define %s_%s_BASE_ADDR" % (top_name.upper(), mem.name.upper()) + physical + " 0x%s\n" % _hex(mem.base_address, block.addr_width)
+    yield "  #define %s_%s_HIGH_ADDR" % (top_name.upper(), mem.name.upper()) + physical + " 0x%s\n" % _hex(mem.high_address, block.addr_width)
 
-    reg_block_body += "    %s = %s_reg::type_id::create(\"%s\");\n" % (reg, reg, reg)
-    reg_block_body += "    %s.build();\n" % (reg)
-    reg_block_body += "    %s.configure(this);\n\n" % (reg)
+  yield "\n#endif\n"
 
-    _access = ""
-    if 'R' in access:
-      if 'W' in access:
-        _access = "\"RW\""
-      else:
-        _access = "\"RO\""
-    else:
-      _access = "\"WO\""
 
-    UVM_ADD += "    default_map.add_reg(%s, %d, %s);\n" % (reg, offset, _access)
+# ------------------------------------------------------------------------------
+# PART 3
+# Creating the register block
+# ------------------------------------------------------------------------------
 
-    offset += int(yml_entries['bus_width']/8)
+def generate_uvm_block(block, git_root, templates = None, writer = None, options = None):
 
-  block = header + uvm_block
-  block = block.replace("CLASS_NAME",           (top_name + "_block"))
-  block = block.replace("UVM_REG_DECLARATIONS", UVM_REG_DECLARATIONS)
-  block = block.replace("UVM_BUILD",            reg_block_body)
-  block = block.replace("MAP_NAME",             MAP_NAME)
-  block = block.replace("BASE_ADDR",            "0")
-  block = block.replace("BUS_BIT_WIDTH",        str(int(yml_entries['bus_width']/8)))
-  block = block.replace("UVM_ADD",              UVM_ADD)
+  block     = _block(block)
+  templates = templates or load_templates()
+  uvm_path  = _user_path(block.uvm_path, git_root)
 
+  pyrg_model.check_memories(block)
 
   # Write the register block to file
-  output_file = uvm_path + '/' + top_name + "_block.sv"
-  with open(output_file, 'w') as file:
-    file.write(block)
+  output_file = uvm_path + '/' + block.name + "_block.sv"
+  _writer(writer, uvm_path).write(output_file, pyrg_profile.section("register_block", emit_uvm_block(block, templates, options)))
 
-  print("INFO [pyrg] Generated %s" % output_file)
 
-  return(_latex)
+def _map_access(access):
+
+  if 'R' in access:
+    if 'W' in access:
+      return "\"RW\""
+    return "\"RO\""
+  return "\"WO\""
+
+
+# Repeated registers are either unrolled, i.e., every instance is a register of
+# its own (reg_0, reg_1, ...), or an array of registers (reg[0], reg[1], ...)
+# which is built and added to the map in a loop. The array instances keep the
+# names of the unrolled registers, e.g., for get_reg_by_name().
+
+def _uvm_reg_declarations(block, arrays):
+
+  for reg in block.registers:
+    if arrays and reg.repeat > 1:
+      yield "  rand %s_reg %s[%d];\n" % (reg.name, reg.name, reg.repeat)
+      continue
+    for _ri in reg.suffixes:
+      yield "  rand %s_reg %s;\n" % (reg.name + _ri, reg.name + _ri)
+
+  for mem in block.memories:
+    yield "  uvm_mem %s;\n" % (mem.name)
+
+
+def _hdl_root(block, options):
+
+  # The HDL path of the AXI slave, the paths of the fields are its signals
+  if block.hdl_path is not None:
+    return block.hdl_path
+  return options.uvm_hdl_root.replace("$BLOCK", block.name)
+
+
+def _hdl_slices(reg, index):
+
+  # The signals of the fields in the AXI slave, instance i of a repeated
+  # register is element i of the signals. ROM fields are constants, and fields
+  # without a known type are not signals of the slave.
+  for field in reg.fields:
+    if field.type in ["CR", "CMD", "SR", "IRQ"]:
+      yield (field.name if index is None else "%s[%s]" % (field.name, index), field.lsb_pos, field.size)
+
+
+def _no_backdoor(reg, _reg, indent):
+
+  # A register without any signal in the AXI slave, e.g., one of only ROM
+  # fields, which are localparams, has no HDL path and no backdoor. It is
+  # excluded from uvm_reg_access_seq, which reads every register by backdoor.
+  if not any(_hdl_slices(reg, None)):
+    yield indent + "// No backdoor, %s has no signal in the AXI slave\n" % (reg.name)
+    yield indent + "uvm_resource_db#(bit)::set({\"REG::\", %s.get_full_name()}, \"NO_REG_ACCESS_TEST\", 1, this);\n" % (_reg)
+
+
+def _uvm_build(block, arrays, hdl_root = ""):
+
+  if len(hdl_root):
+    yield "    add_hdl_path(\"%s\", \"RTL\");\n\n" % (hdl_root)
+
+  for reg in block.registers:
+    if arrays and reg.repeat > 1:
+      yield "    foreach (%s[i]) begin\n" % (reg.name)
+      yield "      %s[i] = %s_reg::type_id::create($sformatf(\"%s_%%0d\", i));\n" % (reg.name, reg.name, reg.name)
+      yield "      %s[i].build();\n" % (reg.name)
+      yield "      %s[i].configure(this);\n" % (reg.name)
+      for (_signal, _lsb, _size) in _hdl_slices(reg, "%0d"):
+        yield "      %s[i].add_hdl_path_slice($sformatf(\"%s\", i), %s, %s);\n" % (reg.name, _signal, _lsb, _size)
+      yield from _no_backdoor(reg, "%s[i]" % (reg.name), "      ")
+      yield "    end\n\n"
+      continue
+    for (i, _ri) in enumerate(reg.suffixes):
+      _reg = reg.name + _ri
+      yield "    %s = %s_reg::type_id::create(\"%s\");\n" % (_reg, _reg, _reg)
+      yield "    %s.build();\n" % (_reg)
+      yield "    %s.configure(this);\n" % (_reg)
+      for (_signal, _lsb, _size) in _hdl_slices(reg, i if reg.repeat > 1 else None):
+        yield "    %s.add_hdl_path_slice(\"%s\", %s, %s);\n" % (_reg, _signal, _lsb, _size)
+      yield from _no_backdoor(reg, _reg, "    ")
+      yield "\n"
+
+  # A uvm_mem is either "RW" or "RO", a write-only memory is only restricted
+  # by its rights in the map
+  for mem in block.memories:
+    _access = "\"RO\"" if mem.access == "RO" else "\"RW\""
+    yield "    %s = new(\"%s\", %d, %d, %s, UVM_NO_COVERAGE);\n" % (mem.name, mem.name, mem.size, mem.width, _access)
+    yield "    %s.configure(this);\n" % (mem.name)
+    if mem.hdl_path is not None:
+      yield "    %s.add_hdl_path_slice(\"%s\", 0, %d);\n" % (mem.name, mem.hdl_path, mem.width)
+    yield "\n"
+
+
+def _offset(address):
+
+  # Unsized literals are 32-bit integers, the offsets of wide address spaces
+  # are sized
+  if (address < 2**31):
+    return "%d" % (address)
+  return "64'h%X" % (address)
+
+
+def _uvm_add(block, arrays):
+
+  for reg in block.registers:
+    _access = _map_access(reg.access)
+    if arrays and reg.repeat > 1:
+      yield "    foreach (%s[i]) begin\n" % (reg.name)
+      yield "      default_map.add_reg(%s[i], %s + i*%d, %s);\n" % (reg.name, _offset(reg.address), block.bus_bytes, _access)
+      yield "    end\n"
+      continue
+    for (i, _ri) in enumerate(reg.suffixes):
+      yield "    default_map.add_reg(%s, %s, %s);\n" % (reg.name + _ri, _offset(reg.address + i*block.bus_bytes), _access)
+
+  for mem in block.memories:
+    yield "    default_map.add_mem(%s, %s, %s);\n" % (mem.name, _offset(mem.base_address), _map_access(mem.access))
+
+
+def emit_uvm_block(block, templates, options = None):
+
+  options = options or pyrg_options.Options()
+  arrays  = options.uvm_reg_arrays
+
+  yield templates["header"]
+  yield from templates["uvm_block"].render_iter(
+    CLASS_NAME           = block.name + "_block",
+    UVM_REG_DECLARATIONS = _uvm_reg_declarations(block, arrays),
+    UVM_BUILD            = _uvm_build(block, arrays, _hdl_root(block, options)),
+    MAP_NAME             = "\"" + block.name + "_map\"",
+    BASE_ADDR            = "0",
+    BUS_BIT_WIDTH        = str(block.bus_bytes),
+    UVM_ADD              = _uvm_add(block, arrays))
+
+
+# ------------------------------------------------------------------------------
+# PART 4
+# Creating the sequence which updates the register block with bursts
+# ------------------------------------------------------------------------------
+
+def generate_uvm_burst_seq(block, git_root, templates = None, writer = None, options = None):
+
+  block     = _block(block)
+  templates = templates or load_templates()
+  uvm_path  = _user_path(block.uvm_path, git_root)
+
+  output_file = uvm_path + '/' + block.name + "_burst_seq.sv"
+  _writer(writer, uvm_path).write(output_file, pyrg_profile.section("burst_sequence", emit_uvm_burst_seq(block, templates, options)))
+
+
+def _register_list(block, arrays):
+
+  # Every register instance of the model in address order, the bursts are runs
+  # of consecutive instances
+  instances = []
+  for reg in block.registers:
+    for (i, _ri) in enumerate(reg.suffixes):
+      _name = "%s[%d]" % (reg.name, i) if arrays and reg.repeat > 1 else reg.name + _ri
+      instances.append((reg.address + i*block.bus_bytes, _name))
+
+  for (_, _name) in sorted(instances):
+    yield "    registers.push_back(block.%s);\n" % (_name)
+
+
+def emit_uvm_burst_seq(block, templates, options = None):
+
+  options = options or pyrg_options.Options()
+
+  yield templates["header"]
+  yield from templates["uvm_burst_seq"].render_iter(
+    CLASS_NAME    = block.name + "_burst_seq",
+    BLOCK_CLASS   = block.name + "_block",
+    BUS_BYTES     = str(block.bus_bytes),
+    REGISTER_LIST = _register_list(block, options.uvm_reg_arrays))
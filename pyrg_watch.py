@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: Watches directories for changed files. On Linux the kernel
+## reports the changes through inotify, elsewhere (or if inotify cannot be
+## used) the directories are polled.
+##
+## Editors often save a file in several steps, e.g., write a temporary file and
+## rename it, so the changes are collected until the directories have been
+## quiet for a short while before they are reported.
+##
+################################################################################
+
+import os, sys, time, select, struct, ctypes, ctypes.util
+
+# inotify(7) events
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_Q_OVERFLOW  = 0x00004000
+IN_NONBLOCK    = 0x00000800
+IN_CLOEXEC     = 0x00080000
+
+_IN_MASK  = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_IN_EVENT = struct.Struct("iIII") # wd, mask, cookie, len, followed by the name
+
+
+class InotifyWatcher:
+
+  def __init__(self, directories):
+
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno = True)
+
+    self.fd   = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    self.dirs = {} # The directory of every watch descriptor
+    if self.fd < 0:
+      raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    for directory in directories:
+      wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), _IN_MASK)
+      if wd < 0:
+        errno = ctypes.get_errno()
+        os.close(self.fd)
+        raise OSError(errno, "inotify_add_watch failed", directory)
+      self.dirs[wd] = directory
+
+
+  def wait(self, timeout = None):
+
+    # Returns the paths which changed, or an empty set if nothing changed
+    # within the timeout (seconds, None waits forever)
+    (ready, _, _) = select.select([self.fd], [], [], timeout)
+    if not len(ready):
+      return set()
+
+    changed = set()
+    data    = os.read(self.fd, 1 << 16)
+    offset  = 0
+    while offset < len(data):
+      (wd, mask, cookie, length) = _IN_EVENT.unpack_from(data, offset)
+      name    = data[offset + _IN_EVENT.size : offset + _IN_EVENT.size + length].rstrip(b"\0")
+      offset += _IN_EVENT.size + length
+
+      if mask & IN_Q_OVERFLOW:
+        # Events were lost, everything may have changed
+        changed.update(self.dirs.values())
+      elif wd in self.dirs and len(name):
+        changed.add(os.path.join(self.dirs[wd], os.fsdecode(name)))
+
+    return changed
+
+
+  def close(self):
+    os.close(self.fd)
+
+
+class PollingWatcher:
+
+  def __init__(self, directories, interval = 0.1):
+
+    self.directories = list(directories)
+    self.interval    = interval
+    self.snapshot    = self._scan()
+
+
+  def _scan(self):
+
+    snapshot = {}
+    for directory in self.directories:
+      try:
+        with os.scandir(directory) as entries:
+          for entry in entries:
+            try:
+              stat = entry.stat()
+            except OSError:
+              continue
+            snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+      except OSError:
+        pass
+    return snapshot
+
+
+  def wait(self, timeout = None):
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+      snapshot = self._scan()
+      changed  = {path for path in snapshot.keys() | self.snapshot.keys()
+                  if snapshot.get(path, None) != self.snapshot.get(path, None)}
+      self.snapshot = snapshot
+      if len(changed):
+        return changed
+
+      if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+          return set()
+        time.sleep(min(self.interval, remaining))
+      else:
+        time.sleep(self.interval)
+
+
+  def close(self):
+    pass
+
+
+def watcher(directories, polling = False):
+
+  # The polling watcher is used where inotify is not available
+  if not polling and sys.platform.startswith("linux"):
+    try:
+      return InotifyWatcher(directories)
+    except (OSError, AttributeError):
+      pass
+  return PollingWatcher(directories)
+
+
+def watch(directories, on_change, debounce = 0.05, polling = False):
+
+  # Calls on_change with the set of changed paths, until interrupted
+  files = watcher(directories, polling)
+  try:
+    while True:
+      changed = files.wait()
+      while True:
+        more = files.wait(debounce)
+        if not len(more):
+          break
+        changed |= more
+      on_change(changed)
+  finally:
+    files.close()
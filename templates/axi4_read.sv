@@ -0,0 +1,78 @@
+  // ---------------------------------------------------------------------------
+  // Read process
+  // ---------------------------------------------------------------------------
+
+  assign cif.rlast = (arlen_r0 == '0);
+
+  // FSM
+  always_ff @(posedge cif.clk or negedge cif.rst_n) begin
+    if (!cif.rst_n) begin
+
+      read_state  <= WAIT_MST_ARVALID_E;
+      cif.arready <= '0;
+      araddr_r0   <= '0;
+      arlen_r0    <= '0;
+      cif.rvalid  <= '0;
+
+    end
+    else begin
+
+      case (read_state)
+
+        default: begin
+          read_state <= WAIT_MST_ARVALID_E;
+        end
+
+        WAIT_MST_ARVALID_E: begin
+
+          cif.arready <= '1;
+
+          if (cif.arvalid) begin
+            read_state  <= WAIT_SLV_RLAST_E;
+            araddr_r0   <= cif.araddr;
+            arlen_r0    <= cif.arlen;
+            cif.arready <= '0;
+            cif.rvalid  <= '1;
+          end
+
+        end
+
+        WAIT_SLV_RLAST_E: begin
+
+
+          if (cif.rready) begin
+            araddr_r0 <= araddr_r0 + (AXI_DATA_WIDTH_P/8);
+          end
+
+          if (cif.rlast && cif.rready) begin
+            read_state  <= WAIT_MST_ARVALID_E;
+            cif.arready <= '1;
+            cif.rvalid  <= '0;
+          end
+
+          if (arlen_r0 != '0) begin
+            arlen_r0 <= arlen_r0 - 1;
+          end
+
+        end
+      endcase
+    end
+  end
+
+
+  always_comb begin
+
+    cif.rdata = '0;
+    cif.rresp = '0;
+RC_DEFAULT
+
+    AXI_READ_CASE
+
+AXI_READS
+      default: begin
+        cif.rresp = AXI_RESP_SLVERR_C;
+        cif.rdata = '0;
+      end
+
+    endcase
+  end
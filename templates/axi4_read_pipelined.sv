@@ -0,0 +1,157 @@
+  // ---------------------------------------------------------------------------
+  // Read process
+  //
+  // The read data is decoded from the registered address and registered
+  // READ_LATENCY_C times before it enters the output FIFO. A beat is only
+  // issued if there is room for it in the FIFO, so the master can stall the
+  // read channel at any time, and the next burst is accepted in the same
+  // cycle as the last beat of the current burst is issued.
+  //
+  // The read of a memory is issued at the same time as the beat, the read
+  // data of the memory replaces the data of the beat in the stage where it
+  // arrives, i.e., after the read latency of the memory.
+  // ---------------------------------------------------------------------------
+
+  // A beat holds its credit from the cycle after it is issued until the cycle
+  // after it is popped, i.e., READ_LATENCY_C + 1 cycles, so one beat per
+  // cycle needs one more credit than that
+  localparam int READ_LATENCY_C = READ_LATENCY;
+  localparam int READ_DEPTH_C   = READ_LATENCY_C + 2;
+
+  logic                                                  rd_issue;
+  logic                                                  rd_pop;
+  logic                                                  rd_push;
+  logic                 [$clog2(READ_DEPTH_C+1)-1 : 0]  rd_outstanding;
+
+  logic                       [AXI_DATA_WIDTH_P-1 : 0]  rd_data_c;
+  logic                                        [1 : 0]  rd_resp_c;
+
+  logic                         [READ_LATENCY_C-1 : 0]  rd_valid_p;
+  logic                         [READ_LATENCY_C-1 : 0]  rd_last_p;
+  logic [READ_LATENCY_C-1 : 0] [AXI_DATA_WIDTH_P-1 : 0] rd_data_p;
+  logic [READ_LATENCY_C-1 : 0]                 [1 : 0]  rd_resp_p;
+  logic   [READ_LATENCY_C : 0] [AXI_DATA_WIDTH_P-1 : 0] rd_data_d;
+MEM_READ_DECLARATIONS
+
+  logic   [READ_DEPTH_C-1 : 0] [AXI_DATA_WIDTH_P+2 : 0] rd_fifo;
+  logic                   [$clog2(READ_DEPTH_C)-1 : 0]  rd_wr_ptr;
+  logic                   [$clog2(READ_DEPTH_C)-1 : 0]  rd_rd_ptr;
+  logic                 [$clog2(READ_DEPTH_C+1)-1 : 0]  rd_fill;
+
+  // Beats which are issued but not yet accepted by the master, i.e., in the
+  // pipeline or in the FIFO, may never be more than the FIFO can hold
+  assign rd_issue    = (read_state == WAIT_SLV_RLAST_E) && (rd_outstanding < READ_DEPTH_C);
+  assign rd_push     = rd_valid_p[READ_LATENCY_C-1];
+  assign rd_pop      = cif.rvalid && cif.rready;
+  assign cif.arready = (read_state == WAIT_MST_ARVALID_E) || (rd_issue && arlen_r0 == '0);
+
+  // FSM
+  always_ff @(posedge cif.clk or negedge cif.rst_n) begin
+    if (!cif.rst_n) begin
+
+      read_state     <= WAIT_MST_ARVALID_E;
+      araddr_r0      <= '0;
+      arlen_r0       <= '0;
+      rd_outstanding <= '0;
+
+    end
+    else begin
+
+      rd_outstanding <= rd_outstanding + rd_issue - rd_pop;
+
+      if (rd_issue) begin
+        araddr_r0 <= araddr_r0 + (AXI_DATA_WIDTH_P/8);
+        arlen_r0  <= arlen_r0 - 1;
+        if (arlen_r0 == '0) begin
+          read_state <= WAIT_MST_ARVALID_E;
+        end
+      end
+
+      if (cif.arvalid && cif.arready) begin
+        read_state <= WAIT_SLV_RLAST_E;
+        araddr_r0  <= cif.araddr;
+        arlen_r0   <= cif.arlen;
+      end
+
+    end
+  end
+
+
+  always_comb begin
+
+    rd_data_c = '0;
+    rd_resp_c = '0;
+RC_DEFAULT
+
+    AXI_READ_CASE
+
+AXI_READS
+      default: begin
+        rd_resp_c = AXI_RESP_SLVERR_C;
+        rd_data_c = '0;
+      end
+
+    endcase
+AXI_MEM_READS
+  end
+
+  // The input data of every stage, the last one is the input of the FIFO
+  always_comb begin
+    rd_data_d[0] = rd_data_c;
+    for (int i = 1; i <= READ_LATENCY_C; i++) begin
+      rd_data_d[i] = rd_data_p[i-1];
+    end
+MEM_READ_MERGE
+  end
+
+  // Pipeline
+  always_ff @(posedge cif.clk or negedge cif.rst_n) begin
+    if (!cif.rst_n) begin
+      rd_valid_p <= '0;
+      rd_last_p  <= '0;
+      rd_data_p  <= '0;
+      rd_resp_p  <= '0;
+MEM_READ_RESETS
+    end
+    else begin
+      rd_valid_p[0] <= rd_issue;
+      rd_last_p[0]  <= rd_issue && arlen_r0 == '0;
+      rd_resp_p[0]  <= rd_resp_c;
+      for (int i = 1; i < READ_LATENCY_C; i++) begin
+        rd_valid_p[i] <= rd_valid_p[i-1];
+        rd_last_p[i]  <= rd_last_p[i-1];
+        rd_resp_p[i]  <= rd_resp_p[i-1];
+      end
+      for (int i = 0; i < READ_LATENCY_C; i++) begin
+        rd_data_p[i]  <= rd_data_d[i];
+      end
+MEM_READ_PIPELINE
+    end
+  end
+
+  // Output FIFO
+  assign cif.rvalid = (rd_fill != '0);
+  assign {cif.rlast, cif.rresp, cif.rdata} = rd_fifo[rd_rd_ptr];
+
+  always_ff @(posedge cif.clk or negedge cif.rst_n) begin
+    if (!cif.rst_n) begin
+      rd_fifo   <= '0;
+      rd_wr_ptr <= '0;
+      rd_rd_ptr <= '0;
+      rd_fill   <= '0;
+    end
+    else begin
+
+      rd_fill <= rd_fill + rd_push - rd_pop;
+
+      if (rd_push) begin
+        rd_fifo[rd_wr_ptr] <= {rd_last_p[READ_LATENCY_C-1], rd_resp_p[READ_LATENCY_C-1], rd_data_d[READ_LATENCY_C]};
+        rd_wr_ptr          <= (rd_wr_ptr == READ_DEPTH_C-1) ? '0 : rd_wr_ptr + 1;
+      end
+
+      if (rd_pop) begin
+        rd_rd_ptr <= (rd_rd_ptr == READ_DEPTH_C-1) ? '0 : rd_rd_ptr + 1;
+      end
+
+    end
+  end
@@ -41,162 +41,6 @@ LOGIC_DECLARATIONS
 
   assign cif.rid = AXI_ID_P;
 
-  // ---------------------------------------------------------------------------
-  // Write processes
-  // ---------------------------------------------------------------------------
-  always_ff @(posedge cif.clk or negedge cif.rst_n) begin
-    if (!cif.rst_n) begin
-
-      write_state <= WAIT_MST_AWVALID_E;
-      awaddr_r0   <= '0;
-      cif.awready <= '0;
-      cif.wready  <= '0;
-      cif.bvalid  <= '0;
-      cif.bresp   <= '0;
-RESETS
-    end
-    else begin
-CMD_REGISTERS
-MEM_INTERFACES
-
-      case (write_state)
-
-        default: begin
-          write_state <= WAIT_MST_AWVALID_E;
-        end
-
-        WAIT_MST_AWVALID_E: begin
-
-          cif.awready <= '1;
-
-          if (cif.awvalid) begin
-            write_state <= WAIT_MST_WLAST_E;
-            cif.awready <= '0;
-            awaddr_r0   <= cif.awaddr;
-            cif.wready  <= '1;
-          end
-
-        end
-
-
-        WAIT_FOR_BREADY_E: begin
-
-          if (cif.bvalid && cif.bready) begin
-            write_state <= WAIT_MST_AWVALID_E;
-            cif.awready <= '1;
-            cif.bvalid  <= '0;
-            cif.bresp   <= '0;
-          end
-
-        end
-
-
-        WAIT_MST_WLAST_E: begin
-
-          if (cif.wlast && cif.wvalid) begin
-            write_state <= WAIT_FOR_BREADY_E;
-            cif.bvalid  <= '1;
-            cif.wready  <= '0;
-          end
-
-
-          if (cif.wvalid) begin
-
-            awaddr_r0 <= awaddr_r0 + (AXI_DATA_WIDTH_P/8);
-
-            case (awaddr_r0)
-
-AXI_WRITES
-              default: begin
-                cif.bresp <= AXI_RESP_SLVERR_C;
-              end
-
-            endcase
-
-AXI_MEM_WRITES
-          end
-        end
-      endcase
-    end
-  end
-
-  // ---------------------------------------------------------------------------
-  // Read process
-  // ---------------------------------------------------------------------------
-
-  assign cif.rlast = (arlen_r0 == '0);
-
-  // FSM
-  always_ff @(posedge cif.clk or negedge cif.rst_n) begin
-    if (!cif.rst_n) begin
-
-      read_state  <= WAIT_MST_ARVALID_E;
-      cif.arready <= '0;
-      araddr_r0   <= '0;
-      arlen_r0    <= '0;
-      cif.rvalid  <= '0;
-
-    end
-    else begin
-
-      case (read_state)
-
-        default: begin
-          read_state <= WAIT_MST_ARVALID_E;
-        end
-
-        WAIT_MST_ARVALID_E: begin
-
-          cif.arready <= '1;
-
-          if (cif.arvalid) begin
-            read_state  <= WAIT_SLV_RLAST_E;
-            araddr_r0   <= cif.araddr;
-            arlen_r0    <= cif.arlen;
-            cif.arready <= '0;
-            cif.rvalid  <= '1;
-          end
-
-        end
-
-        WAIT_SLV_RLAST_E: begin
-
-
-          if (cif.rready) begin
-            araddr_r0 <= araddr_r0 + (AXI_DATA_WIDTH_P/8);
-          end
-
-          if (cif.rlast && cif.rready) begin
-            read_state  <= WAIT_MST_ARVALID_E;
-            cif.arready <= '1;
-            cif.rvalid  <= '0;
-          end
-
-          if (arlen_r0 != '0) begin
-            arlen_r0 <= arlen_r0 - 1;
-          end
-
-        end
-      endcase
-    end
-  end
-
-
-  always_comb begin
-
-    cif.rdata = '0;
-    cif.rresp = '0;
-RC_DEFAULT
-
-    case (araddr_r0)
-
-AXI_READS
-      default: begin
-        cif.rresp = AXI_RESP_SLVERR_C;
-        cif.rdata = '0;
-      end
-
-    endcase
-  end
-
+WRITE_PROCESS
+READ_PROCESS
 endmodule
@@ -0,0 +1,78 @@
+  // ---------------------------------------------------------------------------
+  // Write processes
+  // ---------------------------------------------------------------------------
+  always_ff @(posedge cif.clk or negedge cif.rst_n) begin
+    if (!cif.rst_n) begin
+
+      write_state <= WAIT_MST_AWVALID_E;
+      awaddr_r0   <= '0;
+      cif.awready <= '0;
+      cif.wready  <= '0;
+      cif.bvalid  <= '0;
+      cif.bresp   <= '0;
+RESETS
+    end
+    else begin
+CMD_REGISTERS
+MEM_INTERFACES
+
+      case (write_state)
+
+        default: begin
+          write_state <= WAIT_MST_AWVALID_E;
+        end
+
+        WAIT_MST_AWVALID_E: begin
+
+          cif.awready <= '1;
+
+          if (cif.awvalid) begin
+            write_state <= WAIT_MST_WLAST_E;
+            cif.awready <= '0;
+            awaddr_r0   <= cif.awaddr;
+            cif.wready  <= '1;
+          end
+
+        end
+
+
+        WAIT_FOR_BREADY_E: begin
+
+          if (cif.bvalid && cif.bready) begin
+            write_state <= WAIT_MST_AWVALID_E;
+            cif.awready <= '1;
+            cif.bvalid  <= '0;
+            cif.bresp   <= '0;
+          end
+
+        end
+
+
+        WAIT_MST_WLAST_E: begin
+
+          if (cif.wlast && cif.wvalid) begin
+            write_state <= WAIT_FOR_BREADY_E;
+            cif.bvalid  <= '1;
+            cif.wready  <= '0;
+          end
+
+
+          if (cif.wvalid) begin
+
+            awaddr_r0 <= awaddr_r0 + (AXI_DATA_WIDTH_P/8);
+
+            AXI_WRITE_CASE
+
+AXI_WRITES
+              default: begin
+AXI_WRITE_ERROR
+              end
+
+            endcase
+
+AXI_MEM_WRITES
+          end
+        end
+      endcase
+    end
+  end
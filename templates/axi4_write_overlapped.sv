@@ -0,0 +1,138 @@
+  // ---------------------------------------------------------------------------
+  // Write processes
+  //
+  // The write address, data and response channels are decoupled. Up to two
+  // write addresses are buffered, so the next address is accepted while the
+  // data of the current burst is written, and the next burst starts in the
+  // cycle after the last beat of the current one. The responses are queued,
+  // i.e., a response which is not yet accepted by the master does not stop
+  // the next burst.
+  // ---------------------------------------------------------------------------
+
+  localparam int AW_DEPTH_C = 2;
+  localparam int B_DEPTH_C  = 4;
+
+  logic                                        wr_beat;
+  logic                                        wr_next;
+  logic                                        wr_beat_r0;
+  logic                                        wr_last_r0;
+  logic                                        wr_beat_error;
+  logic                                        wr_error;
+
+  logic [AW_DEPTH_C-1 : 0] [AXI_ADDR_WIDTH_P-1 : 0] aw_fifo;
+  logic                                        aw_wr_ptr;
+  logic                                        aw_rd_ptr;
+  logic           [$clog2(AW_DEPTH_C+1)-1 : 0] aw_fill;
+  logic                                        aw_push;
+  logic                                        aw_pop;
+
+  logic                  [B_DEPTH_C-1 : 0] [1 : 0] b_fifo;
+  logic             [$clog2(B_DEPTH_C)-1 : 0] b_wr_ptr;
+  logic             [$clog2(B_DEPTH_C)-1 : 0] b_rd_ptr;
+  logic           [$clog2(B_DEPTH_C+1)-1 : 0] b_fill;
+  logic                                        b_push;
+  logic                                        b_pop;
+
+  // A beat is accepted if there is room for the response of its burst, the
+  // response of a burst is queued the cycle after its last beat
+  assign cif.awready = (aw_fill < AW_DEPTH_C);
+  assign cif.wready  = (write_state == WAIT_MST_WLAST_E) && (b_fill < B_DEPTH_C - 1);
+  assign cif.bvalid  = (b_fill != '0);
+  assign cif.bresp   = b_fifo[b_rd_ptr];
+
+  assign wr_beat = cif.wvalid && cif.wready;
+  assign wr_next = (write_state == WAIT_MST_AWVALID_E) || (wr_beat && cif.wlast);
+  assign aw_push = cif.awvalid && cif.awready;
+  assign aw_pop  = wr_next && (aw_fill != '0);
+  assign b_push  = wr_beat_r0 && wr_last_r0;
+  assign b_pop   = cif.bvalid && cif.bready;
+
+  always_ff @(posedge cif.clk or negedge cif.rst_n) begin
+    if (!cif.rst_n) begin
+
+      write_state   <= WAIT_MST_AWVALID_E;
+      awaddr_r0     <= '0;
+      aw_fifo       <= '0;
+      aw_wr_ptr     <= '0;
+      aw_rd_ptr     <= '0;
+      aw_fill       <= '0;
+      b_fifo        <= '0;
+      b_wr_ptr      <= '0;
+      b_rd_ptr      <= '0;
+      b_fill        <= '0;
+      wr_beat_r0    <= '0;
+      wr_last_r0    <= '0;
+      wr_beat_error <= '0;
+      wr_error      <= '0;
+RESETS
+    end
+    else begin
+CMD_REGISTERS
+MEM_INTERFACES
+
+      // Write addresses
+      aw_fill <= aw_fill + aw_push - aw_pop;
+
+      if (aw_push) begin
+        aw_fifo[aw_wr_ptr] <= cif.awaddr;
+        aw_wr_ptr          <= aw_wr_ptr + 1;
+      end
+
+      if (aw_pop) begin
+        aw_rd_ptr   <= aw_rd_ptr + 1;
+        awaddr_r0   <= aw_fifo[aw_rd_ptr];
+        write_state <= WAIT_MST_WLAST_E;
+      end
+      else if (wr_next) begin
+        write_state <= WAIT_MST_AWVALID_E;
+      end
+
+      // Responses, an address which is not decoded fails the whole burst
+      wr_beat_r0    <= wr_beat;
+      wr_last_r0    <= cif.wlast;
+      wr_beat_error <= '0;
+
+      if (wr_beat_r0) begin
+        wr_error <= wr_last_r0 ? '0 : (wr_error || wr_beat_error);
+      end
+
+      b_fill <= b_fill + b_push - b_pop;
+
+      if (b_push) begin
+        b_fifo[b_wr_ptr] <= (wr_error || wr_beat_error) ? AXI_RESP_SLVERR_C : '0;
+        b_wr_ptr         <= (b_wr_ptr == B_DEPTH_C-1) ? '0 : b_wr_ptr + 1;
+      end
+
+      if (b_pop) begin
+        b_rd_ptr <= (b_rd_ptr == B_DEPTH_C-1) ? '0 : b_rd_ptr + 1;
+      end
+
+      // Write data, beats are only accepted while a burst is active
+      case (write_state)
+
+        default: begin
+        end
+
+        WAIT_MST_WLAST_E: begin
+
+          if (wr_beat) begin
+
+            if (!aw_pop) begin
+              awaddr_r0 <= awaddr_r0 + (AXI_DATA_WIDTH_P/8);
+            end
+
+            AXI_WRITE_CASE
+
+AXI_WRITES
+              default: begin
+AXI_WRITE_ERROR
+              end
+
+            endcase
+
+AXI_MEM_WRITES
+          end
+        end
+      endcase
+    end
+  end
@@ -12,6 +12,5 @@
       .reset(FIELD_RESET),
       .has_reset(FIELD_HAS_RESET),
       .is_rand(0),
-      .individually_accessible(0)
+      .individually_accessible(FIELD_INDIVIDUALLY_ACCESSIBLE)
     );
-    add_hdl_path_slice("FIELD_NAME", 0, FIELD_SIZE);
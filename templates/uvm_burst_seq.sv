@@ -0,0 +1,228 @@
+// -----------------------------------------------------------------------------
+// Writes the registers of the block which need to be updated, i.e., whose
+// desired value differs from the mirrored value, as bursts. The registers are
+// visited in address order and every run of registers at consecutive addresses
+// is one burst, of at most max_burst_length beats and not crossing a 4KB
+// boundary. The AXI slave increments the address of every beat, so a burst
+// writes one register per beat.
+//
+// The burst of a run is a uvm_reg_item of kind UVM_BURST_WRITE, with the
+// address of the run as offset and one value per register. burst2bus() is the
+// hook which converts it to one AXI write of the bus agent with
+//
+//   awaddr  = rw.offset
+//   awlen   = rw.value.size() - 1
+//   awsize  = $clog2(BUS_BYTES)
+//   awburst = INCR
+//
+// By default it calls reg2bus() of the adapter of the map with the first beat,
+// and the adapter gets the burst from get_item(), like uvm_mem::burst_write()
+// does. This needs an adapter which writes the bursts of its items, so it is
+// only done if adapter_bursts is set, otherwise burst2bus() is overridden,
+// e.g., with a factory override, to create the item of the agent.
+//
+// The item is sent on the sequencer of the map, and its status is converted by
+// the adapter of the map. The written registers are then predicted if the map
+// predicts automatically, else the predictor of the bus has to predict bursts.
+// If burst2bus() returns null the registers of the run are written one at a
+// time with write(), which predicts them itself, and a warning is issued once.
+// -----------------------------------------------------------------------------
+class CLASS_NAME extends uvm_reg_sequence;
+
+  `uvm_object_utils(CLASS_NAME)
+
+  // The maximum number of beats of a burst, 256 is the limit of AXI4
+  int unsigned max_burst_length = 256;
+
+  // Set if the adapter of the map writes all values of a UVM_BURST_WRITE item
+  bit adapter_bursts = 0;
+
+  // The map of the bursts, the default map of the model if null
+  uvm_reg_map  map;
+  uvm_status_e status;
+
+  // The registers of the model in address order
+  local uvm_reg registers[$];
+
+  // The fallback to single writes is only reported once
+  local static bit warned = 0;
+
+
+  function new(string name = "CLASS_NAME");
+    super.new(name);
+  endfunction
+
+
+  // Updates a block, e.g., after randomizing it in a test
+  static task update_block(BLOCK_CLASS block, output uvm_status_e status,
+                           input uvm_sequencer_base sequencer = null, input uvm_sequence_base parent = null,
+                           input bit adapter_bursts = 0);
+
+    CLASS_NAME seq = CLASS_NAME::type_id::create("CLASS_NAME");
+
+    seq.model          = block;
+    seq.adapter_bursts = adapter_bursts;
+    seq.start(sequencer, parent);
+    status = seq.status;
+
+  endtask
+
+
+  virtual task body();
+    update_bursts(status);
+  endtask
+
+
+  virtual task update_bursts(output uvm_status_e status);
+
+    uvm_reg        run[$];
+    uvm_reg_addr_t next;
+
+    status = UVM_IS_OK;
+    get_registers();
+
+    foreach (registers[i]) begin
+
+      uvm_reg_addr_t address;
+
+      if (!registers[i].needs_update() || registers[i].get_rights(map) == "RO") begin
+        continue;
+      end
+
+      // A register which does not follow the run, or starts a 4KB page, starts
+      // a new run
+      address = registers[i].get_address(map);
+      if (run.size() && (address != next || run.size() == max_burst_length || address[11:0] == '0)) begin
+        write_run(run, status);
+      end
+
+      run.push_back(registers[i]);
+      next = address + BUS_BYTES;
+    end
+
+    write_run(run, status);
+
+  endtask
+
+
+  // The bus item of a burst, null if the bus agent has no bursts
+  virtual function uvm_sequence_item burst2bus(uvm_reg_item rw);
+
+    uvm_reg_adapter   adapter = rw.map.get_adapter();
+    uvm_reg_bus_op    op;
+    uvm_sequence_item item;
+
+    if (!adapter_bursts) begin
+      return null;
+    end
+
+    op.kind    = UVM_WRITE;
+    op.addr    = rw.offset;
+    op.data    = rw.value[0];
+    op.n_bits  = BUS_BYTES * 8;
+    op.byte_en = '1;
+    op.status  = UVM_IS_OK;
+
+    adapter.m_set_item(rw);
+    item = adapter.reg2bus(op);
+    adapter.m_set_item(null);
+
+    return item;
+
+  endfunction
+
+
+  virtual task write_burst(uvm_reg run[$], uvm_reg_item rw);
+
+    uvm_sequence_item item = burst2bus(rw);
+    uvm_sequence_item rsp;
+    uvm_reg_adapter   adapter;
+    uvm_reg_bus_op    op;
+
+    rw.status = UVM_IS_OK;
+
+    if (item == null) begin
+      if (run.size() > 1 && !warned) begin
+        `uvm_warning(get_type_name(), {"burst2bus() returned no bus item, the runs of registers are written one ",
+                                       "register at a time, set adapter_bursts or override burst2bus()"})
+        warned = 1;
+      end
+      foreach (run[i]) begin
+        uvm_status_e _status;
+        run[i].write(_status, rw.value[i], UVM_FRONTDOOR, rw.map, this);
+        rw.status = (_status != UVM_IS_OK) ? _status : rw.status;
+      end
+      return;
+    end
+
+    adapter = rw.map.get_adapter();
+    start_item(item, -1, rw.map.get_sequencer());
+    finish_item(item);
+
+    rsp = item;
+    if (adapter.provides_responses) begin
+      get_base_response(rsp, item.get_transaction_id());
+    end
+
+    adapter.bus2reg(rsp, op);
+    rw.status = op.status;
+
+    if (rw.status == UVM_IS_OK && rw.map.get_root_map().get_auto_predict()) begin
+      foreach (run[i]) begin
+        void'(run[i].predict(rw.value[i], .kind(UVM_PREDICT_WRITE), .path(UVM_FRONTDOOR), .map(rw.map)));
+      end
+    end
+
+  endtask
+
+
+  local task write_run(ref uvm_reg run[$], inout uvm_status_e status);
+
+    uvm_reg_item rw;
+
+    if (!run.size()) begin
+      return;
+    end
+
+    rw              = uvm_reg_item::type_id::create("burst");
+    rw.kind         = UVM_BURST_WRITE;
+    rw.element_kind = UVM_REG;
+    rw.element      = run[0];
+    rw.path         = UVM_FRONTDOOR;
+    rw.map          = map;
+    rw.parent       = this;
+    rw.offset       = run[0].get_address(map);
+    rw.value        = new[run.size()];
+
+    foreach (run[i]) begin
+      rw.value[i] = run[i].get();
+    end
+
+    write_burst(run, rw);
+
+    if (rw.status != UVM_IS_OK) begin
+      status = rw.status;
+    end
+
+    run.delete();
+
+  endtask
+
+
+  local function void get_registers();
+
+    BLOCK_CLASS block;
+
+    if (!$cast(block, model)) begin
+      `uvm_fatal(get_type_name(), "The model is not a BLOCK_CLASS")
+    end
+
+    if (map == null) begin
+      map = block.get_default_map();
+    end
+
+    registers.delete();
+REGISTER_LIST
+  endfunction
+
+endclass
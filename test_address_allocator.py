@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: Tests of the address allocator, run with "python -m pytest".
+##
+################################################################################
+
+import pytest
+import pyrg_model
+
+
+def allocate(regions, addr_width = 16):
+
+  # The regions are (name, fixed address or None, size, align), returns the
+  # address of every name
+  keys      = {name: object() for (name, _, _, _) in regions}
+  addresses = pyrg_model.AddressAllocator(addr_width).allocate(
+    [(keys[name], "register " + name, address, size, align) for (name, address, size, align) in regions])
+  return {name: addresses[id(key)] for (name, key) in keys.items()}
+
+
+def block(registers, memories = (), addr_width = 16):
+
+  # A block of single field registers as (name, address or None, repeat) and
+  # memories as (name, address or None, size)
+  def register(name, address, repeat):
+    entries = {"name": name, "access": "RW", "desc": name, "repeat": repeat,
+               "bit_fields": [{"field": {"name": "cr_" + name, "description": name, "size": 8, "lsb_pos": 0}}]}
+    if address is not None:
+      entries["address"] = address
+    return entries
+
+  def memory(name, address, size):
+    entries = {"name": name, "access": "RW", "size": size, "width": 32}
+    if address is not None:
+      entries["address"] = address
+    return entries
+
+  return pyrg_model.block_from_dict({"blk": {
+    "bus_width": 32, "addr_width": addr_width, "rtl_path": "rtl", "uvm_path": "uvm", "sw_path": "sw",
+    "registers": [register(*r) for r in registers],
+    "memories":  [memory(*m) for m in memories]}})
+
+
+# ------------------------------------------------------------------------------
+# Placement
+# ------------------------------------------------------------------------------
+
+def test_floating_regions_are_placed_in_order():
+  assert allocate([("a", None, 4, 4), ("b", None, 8, 4), ("c", None, 4, 4)]) == {"a": 0x0, "b": 0x4, "c": 0xc}
+
+
+def test_floating_regions_skip_fixed_regions():
+
+  # The fixed regions are not in address order, and a floating region which
+  # does not fit before a fixed region is placed after it
+  addresses = allocate([("a", None, 4, 4), ("f1", 0x10, 4, 4), ("b", None, 8, 4), ("f0", 0x8, 4, 4),
+                        ("c", None, 4, 4), ("d", None, 4, 4)])
+  assert addresses == {"a": 0x0, "f1": 0x10, "b": 0x14, "f0": 0x8, "c": 0x1c, "d": 0x20}
+
+
+def test_floating_regions_fill_the_gaps_before_fixed_regions():
+  addresses = allocate([("f", 0x8, 4, 4), ("a", None, 4, 4), ("b", None, 4, 4), ("c", None, 4, 4)])
+  assert addresses == {"f": 0x8, "a": 0x0, "b": 0x4, "c": 0xc}
+
+
+def test_floating_regions_are_aligned():
+  addresses = allocate([("a", None, 4, 4), ("m", None, 0x40, 0x40), ("b", None, 4, 4)])
+  assert addresses == {"a": 0x0, "m": 0x40, "b": 0x80}
+
+
+def test_aligned_region_skips_a_fixed_region():
+  addresses = allocate([("f", 0x20, 4, 4), ("m", None, 0x40, 0x40)])
+  assert addresses == {"f": 0x20, "m": 0x40}
+
+
+def test_region_may_end_at_the_top_of_the_address_space():
+  assert allocate([("a", 0xfffc, 4, 4)]) == {"a": 0xfffc}
+  assert allocate([("a", 0xfff8, 4, 4), ("b", None, 4, 4)]) == {"a": 0xfff8, "b": 0x0}
+
+
+# ------------------------------------------------------------------------------
+# Errors
+# ------------------------------------------------------------------------------
+
+def test_misaligned_fixed_region():
+  with pytest.raises(Exception, match = "The address 0x42 of register a is not aligned to 0x4"):
+    allocate([("a", 0x42, 4, 4)])
+
+
+def test_overlapping_fixed_regions():
+
+  # A region overlaps a region before it which is not the previous one
+  with pytest.raises(Exception, match = "Register c at 0x8 overlaps register a at 0x0"):
+    allocate([("a", 0x0, 0x10, 4), ("b", 0x4, 4, 4), ("c", 0x8, 4, 4)])
+
+
+def test_region_past_the_address_space():
+  with pytest.raises(Exception, match = "Register a at 0xfffc ends at 0x10004, past the 16 bit address space"):
+    allocate([("a", 0xfffc, 8, 4)])
+
+
+def test_floating_region_past_the_address_space():
+  with pytest.raises(Exception, match = "Register b at 0x10000 ends at 0x10004, past the 16 bit address space"):
+    allocate([("a", 0x0, 0x10000, 4), ("b", None, 4, 4)])
+
+
+def test_all_errors_are_reported():
+  with pytest.raises(Exception) as error:
+    allocate([("a", 0x2, 4, 4), ("b", 0x4, 4, 4), ("c", 0xfffc, 8, 4)])
+  assert len(str(error.value).split("\n")) == 3
+
+
+# ------------------------------------------------------------------------------
+# Blocks
+# ------------------------------------------------------------------------------
+
+def test_block_registers_and_memories():
+
+  # The memories are placed after the registers, the largest first, aligned
+  # to their size in bytes, so the smaller ones follow without any space
+  blk = block([("a", None, 1), ("b", 0x10, 2), ("c", None, 4)], [("small", None, 16), ("large", None, 64)])
+  assert [reg.address for reg in blk.registers] == [0x0, 0x10, 0x18]
+  assert [(mem.base_address, mem.high_address) for mem in blk.memories] == [(0x200, 0x240), (0x100, 0x200)]
+  assert blk.high_address == 0x28
+
+
+def test_block_fixed_memory():
+  blk = block([("a", None, 1)], [("m", 0x400, 16), ("n", None, 16)])
+  assert [mem.base_address for mem in blk.memories] == [0x400, 0x40]
+
+
+def test_block_register_at_the_top_of_the_address_space():
+  blk = block([("a", 0xfffc, 1)])
+  assert blk.registers[0].address == 0xfffc
+
+
+def test_block_memory_high_address_must_be_in_the_address_space():
+  with pytest.raises(Exception, match = "The high address 0x10000 of memory m, the first address after it, must be below 0x10000"):
+    block([("a", None, 1)], [("m", 0xffc0, 16)])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: Tests of the errors in the YML files, run with "python -m pytest".
+##
+################################################################################
+
+import pytest
+import pyrg_check
+import pyrg_model
+
+
+def spec(**register):
+
+  # A block with one register of one field, the keys of the register are
+  # replaced by the arguments, a key is removed if its value is None
+  field   = {"name": "cr_gain", "description": "gain", "size": 8, "lsb_pos": 0}
+  entries = {"name": "cr_config", "access": "RW", "desc": "config", "bit_fields": [{"field": field}]}
+  for (key, value) in register.items():
+    if value is None:
+      del entries[key]
+    else:
+      entries[key] = value
+  return {"blk": {"bus_width": 32, "rtl_path": "rtl", "uvm_path": "uvm", "sw_path": "sw", "registers": [entries]}}
+
+
+def test_repeat_which_is_a_string():
+  with pytest.raises(Exception, match = "block blk, register cr_config: the repeat must be an integer, not '4'"):
+    pyrg_model.block_from_dict(spec(repeat = "4"))
+
+
+def test_repeat_which_is_not_positive():
+  block = pyrg_model.block_from_dict(spec(repeat = 0))
+  assert (pyrg_check.ERROR, "register cr_config", "the repeat must be a positive integer, not 0") in pyrg_check.check_block(block)
+
+
+def test_missing_register_key():
+  with pytest.raises(Exception, match = "block blk, register cr_config: the key 'access' is missing"):
+    pyrg_model.block_from_dict(spec(access = None))
+
+
+def test_missing_register_name():
+  with pytest.raises(Exception, match = "block blk, register #0: the key 'name' is missing"):
+    pyrg_model.block_from_dict(spec(name = None))
+
+
+def test_missing_field_key():
+  with pytest.raises(Exception, match = "block blk, register cr_config, field cr_gain: the key 'size' is missing"):
+    pyrg_model.block_from_dict(spec(bit_fields = [{"field": {"name": "cr_gain", "description": "gain", "lsb_pos": 0}}]))
+
+
+def test_missing_block_key():
+  entries = spec()
+  del entries["blk"]["bus_width"]
+  with pytest.raises(Exception, match = "block blk: the key 'bus_width' is missing"):
+    pyrg_model.block_from_dict(entries)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+################################################################################
+##
+## Copyright (C) 2020 Fredrik Åkerlund
+## https://github.com/akerlund/PYRG
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <https:##www.gnu.org/licenses/>.
+##
+## Description: Tests of the generated files, run with "python -m pytest".
+##
+################################################################################
+
+import pytest
+import pyrg_model
+import pyrg_options
+import pyrg_axi
+import pyrg_tlm
+import pyrg_numpy
+
+
+def block(registers, bus_width = 32):
+
+  # A block of registers as (name, access, [(field, size, lsb_pos)], repeat)
+  def register(name, access, fields, repeat = 1):
+    return {"name": name, "access": access, "desc": name, "repeat": repeat, "bit_fields": [
+      {"field": {"name": _name, "description": _name, "size": _size, "lsb_pos": _lsb, "reset_value": 0}}
+      for (_name, _size, _lsb) in fields]}
+
+  return pyrg_model.block_from_dict({"blk": {
+    "bus_width": bus_width, "rtl_path": "rtl", "uvm_path": "uvm", "sw_path": "sw",
+    "registers": [register(*r) for r in registers]}})
+
+
+# ------------------------------------------------------------------------------
+# Field positions
+# ------------------------------------------------------------------------------
+
+def test_field_positions_agree_with_the_axi_slave():
+
+  # A single field of more than one bit is at bit 0 in the AXI slave, whatever
+  # its lsb position, the fields of a register with several are concatenated
+  blk = block([("cr_gain",  "RW", [("cr_gain", 8, 4)]),
+               ("cr_start", "RW", [("cr_start", 1, 3)]),
+               ("cr_pair",  "RW", [("cr_lo", 4, 0), ("cr_hi", 8, 4)])])
+
+  assert [pyrg_axi._axi_range(reg) for reg in blk.registers[:2]] == ["7 : 0", "3"]
+  assert [(_name, _lsb, _size) for (_name, _, _lsb, _size) in pyrg_numpy._fields(blk)] == [
+    ("cr_gain", 0, 8), ("cr_start", 3, 1), ("cr_lo", 0, 4), ("cr_hi", 4, 8)]
+  assert [(_name, _at) for (_name, _, _at, _, _) in pyrg_tlm._field_list(blk.registers[0])] == [("cr_gain", 0)]
+
+
+def test_numpy_decoder_bus_width():
+  with pytest.raises(Exception, match = "blk: the NumPy decoder needs a bus width of 8, 16, 32 or 64 bits, not 128"):
+    list(pyrg_numpy.emit_numpy_decoder(block([("cr_gain", "RW", [("cr_gain", 8, 0)])], 128), ""))
+
+
+# ------------------------------------------------------------------------------
+# AXI slave
+# ------------------------------------------------------------------------------
+
+def test_range_decode_rejects_unaligned_addresses():
+
+  # The range of a register array also matches the addresses between its
+  # instances, which are errors like in the unrolled decode
+  blk     = block([("cr_coef", "RW", [("cr_coef", 16, 0)], 4)])
+  options = pyrg_options.Options(axi_range_decode = True)
+
+  writes = "".join(pyrg_axi._writes(blk, options))
+  assert "[CR_COEF_0_ADDR : CR_COEF_3_ADDR]: begin\n" in writes
+  assert "if (awaddr_r0 % (AXI_DATA_WIDTH_P/8) == 0) begin\n" in writes
+  assert "else begin\n" + 18*" " + "cif.bresp <= AXI_RESP_SLVERR_C;\n" in writes
+
+  reads = "".join(pyrg_axi._reads(blk, options))
+  assert "if (araddr_r0 % (AXI_DATA_WIDTH_P/8) == 0) begin\n" in reads
+  assert "cif.rresp = AXI_RESP_SLVERR_C;\n" in reads
+
+
+def test_range_decode_resets_with_a_replication():
+  blk = block([("cr_coef", "RW", [("cr_coef", 16, 0)], 4)])
+  assert list(pyrg_axi._reset_list(blk, pyrg_options.Options(axi_range_decode = True))) == [("cr_coef", "{4{16'(0)}}")]
+
+
+def test_strobed_command_bits_are_not_kept():
+
+  # The command bits of a register which also has a control field are '0 when
+  # they are not strobed, so a partial write does not repeat the pulse
+  blk    = block([("cr_mixed", "RW", [("cmd_go", 1, 0), ("cr_mode", 7, 1)])])
+  writes = "".join(pyrg_axi._writes(blk, pyrg_options.Options(axi_wstrb = True)))
+  assert "{cr_mode, cmd_go} <= (cif.wdata & wr_mask) | ({cr_mode, 1'(0)} & ~wr_mask);\n" in writes
+
+  blk    = block([("cmd_go", "WO", [("cmd_go", 1, 0)])])
+  writes = "".join(pyrg_axi._writes(blk, pyrg_options.Options(axi_wstrb = True)))
+  assert "cmd_go <= cif.wdata[0] & wr_mask[0];\n" in writes
+
+
+def test_tlm_model_partial_strobe_of_command_bits():
+
+  # Like the AXI slave, a write which does not strobe the byte of a command
+  # field does not pulse it, and the strobed control field is written
+  blk   = block([("cr_mixed", "RW", [("cr_mode", 8, 0), ("cr_level", 8, 8), ("cmd_go", 1, 16)])])
+  scope = {}
+  exec("".join(pyrg_tlm.emit_tlm_model(blk, "", pyrg_options.Options(axi_wstrb = True))), scope)
+
+  model    = scope["Model"]()
+  commands = []
+  model.on_command = lambda field, index, value: commands.append((field, value))
+
+  model.write(0x0, 0x1_0203, strb = 0b0001)
+  assert model.signal("cr_mode") == 0x03 and model.signal("cr_level") == 0
+  assert commands == [("cmd_go", 0)]
+
+  model.write(0x0, 0x1_0203, strb = 0b0100)
+  assert commands[-1] == ("cmd_go", 1)